@@ -0,0 +1,479 @@
+import argparse
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import tkinter as tk
+from tkinter import filedialog, ttk, messagebox
+import threading
+
+import cv2
+import numpy as np
+
+from image_metadata import ImageIndex, PERIODS, label_for, normalize_class
+from label_remap import load_names
+from naming import NameIndex
+
+
+AUGMENT_MANIFEST = ".augment_names.json"
+DEFAULT_TARGET = 500
+DEFAULT_MAX_COPIES = 10
+DEFAULT_NIGHT_PROB = 0.3
+SCALE_RANGE = (0.75, 1.25)
+# caixa cortada pelo zoom precisa manter essa fracao da area para continuar no label
+MIN_VISIBLE = 0.4
+JPEG_QUALITY = 95
+
+
+def read_yolo_label(path):
+    """(N, 5) float32 com cls, xc, yc, w, h normalizados"""
+    if path is None:
+        return np.zeros((0, 5), dtype=np.float32)
+    rows = [line.split()[:5] for line in Path(path).read_text(encoding='utf-8').splitlines() if line.strip()]
+    return np.array(rows, dtype=np.float32).reshape(-1, 5)
+
+
+def format_yolo_label(labels):
+    return "".join(f"{int(c)} {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n" for c, x, y, w, h in labels.tolist())
+
+
+def flip_horizontal(image, labels):
+    labels = labels.copy()
+    labels[:, 1] = 1.0 - labels[:, 1]
+    return image[:, ::-1], labels
+
+
+def zoom(image, labels, scale, rng):
+    """
+    amplia (recorte) ou reduz (borda cinza) mantendo o tamanho da imagem; caixas em lote
+    caixas que ficam com menos de MIN_VISIBLE da area visivel saem do label
+    """
+    h, w = image.shape[:2]
+    new_w, new_h = max(1, round(w * scale)), max(1, round(h * scale))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+
+    # deslocamento da janela de saida dentro da imagem redimensionada (negativo = borda)
+    ox = int(rng.integers(min(0, new_w - w), max(0, new_w - w) + 1))
+    oy = int(rng.integers(min(0, new_h - h), max(0, new_h - h) + 1))
+
+    canvas = np.full_like(image, 114)
+    x0, x1 = max(ox, 0), min(ox + w, new_w)
+    y0, y1 = max(oy, 0), min(oy + h, new_h)
+    canvas[y0 - oy:y1 - oy, x0 - ox:x1 - ox] = resized[y0:y1, x0:x1]
+
+    if not len(labels):
+        return canvas, labels
+
+    xy = labels[:, 1:3] * [w, h]
+    wh = labels[:, 3:5] * [w, h]
+    boxes = np.concatenate([xy - wh / 2, xy + wh / 2], axis=1) * scale - [ox, oy, ox, oy]
+    clipped = np.clip(boxes, 0, [w, h, w, h])
+
+    full_area = np.prod(boxes[:, 2:] - boxes[:, :2], axis=1)
+    visible_area = np.prod(np.clip(clipped[:, 2:] - clipped[:, :2], 0, None), axis=1)
+    keep = visible_area >= MIN_VISIBLE * np.maximum(full_area, 1e-9)
+
+    clipped = clipped[keep]
+    out = np.empty((len(clipped), 5), dtype=np.float32)
+    out[:, 0] = labels[keep, 0]
+    out[:, 1:3] = (clipped[:, :2] + clipped[:, 2:]) / 2 / [w, h]
+    out[:, 3:5] = (clipped[:, 2:] - clipped[:, :2]) / [w, h]
+    return canvas, out
+
+
+def color_jitter(image, rng, hue=0.015, saturation=0.5, value=0.3):
+    """ganhos aleatorios em hsv (mesma ideia do augment do yolo), via tabela de 256 entradas"""
+    gains = rng.uniform(-1, 1, 3) * [hue, saturation, value] + 1
+    h, s, v = cv2.split(cv2.cvtColor(image, cv2.COLOR_BGR2HSV))
+
+    x = np.arange(256, dtype=np.float32)
+    lut_h = ((x * gains[0]) % 180).astype(np.uint8)
+    lut_s = np.clip(x * gains[1], 0, 255).astype(np.uint8)
+    lut_v = np.clip(x * gains[2], 0, 255).astype(np.uint8)
+
+    hsv = cv2.merge((cv2.LUT(h, lut_h), cv2.LUT(s, lut_s), cv2.LUT(v, lut_v)))
+    return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+
+
+def simulate_night(image, rng):
+    """imita a camera infravermelha: cinza, escuro (gamma), vinheta e ruido de sensor"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY).astype(np.float32) / 255.0
+    gray = gray ** rng.uniform(1.4, 2.2) * rng.uniform(0.5, 0.8)
+
+    h, w = gray.shape
+    yy, xx = np.ogrid[:h, :w]
+    distance = np.sqrt(((xx - w / 2) / (w / 2)) ** 2 + ((yy - h / 2) / (h / 2)) ** 2)
+    gray *= 1.0 - 0.35 * np.clip(distance / np.sqrt(2), 0, 1) ** 2
+
+    gray += rng.normal(0, rng.uniform(0.01, 0.03), gray.shape)
+    gray = (np.clip(gray, 0, 1) * 255).astype(np.uint8)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def sample_seed(seed, relative_path, copy_index):
+    """semente so depende da imagem e do numero da copia: a saida nao muda com a ordem dos processos"""
+    digest = hashlib.blake2b(relative_path.encode('utf-8'), digest_size=8).digest()
+    return [seed, int.from_bytes(digest, 'little'), copy_index]
+
+
+def augment_sample(task):
+    """
+    gera uma copia aumentada de uma imagem; roda em outro processo
+    task = (imagem, label, copia, semente, periodo de origem, probabilidade de noite)
+    retorna (imagem, copia, bytes do jpeg, texto do label, periodo, erro)
+    """
+    image_path, label_path, copy_index, seed, period, night_prob = task
+
+    try:
+        rng = np.random.default_rng(seed)
+        image = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("imagem nao pode ser decodificada")
+        labels = read_yolo_label(label_path)
+
+        if rng.random() < 0.5:
+            image, labels = flip_horizontal(image, labels)
+
+        image, labels = zoom(image, labels, rng.uniform(*SCALE_RANGE), rng)
+
+        if period != 'noite' and rng.random() < night_prob:
+            image = simulate_night(image, rng)
+            period = 'noite'
+        elif period != 'noite':
+            image = color_jitter(image, rng)
+
+        ok, encoded = cv2.imencode('.jpg', np.ascontiguousarray(image), [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        if not ok:
+            raise ValueError("falha ao codificar jpeg")
+
+        return image_path, copy_index, encoded.tobytes(), format_yolo_label(labels), period, None
+
+    except Exception as e:
+        return image_path, copy_index, None, None, period, str(e)
+
+
+def plan_augmentation(index, num_classes, target=DEFAULT_TARGET, max_copies=DEFAULT_MAX_COPIES, class_ids=None):
+    """
+    quantas copias gerar de cada imagem: classes com menos de target imagens recebem copias ate
+    chegar perto do alvo (no maximo max_copies por imagem); class_ids limita a essas classes
+    retorna (linhas do indice, copias por linha, classes presentes em cada linha, imagens por classe)
+    """
+    usable = (index.data['status'] <= 0) & (index.data['label_count'] > 0)
+    rows = np.flatnonzero(usable)
+
+    shifts = np.arange(num_classes, dtype=np.uint64)
+    presence = ((index.data['label_mask'][rows, None] >> shifts[None, :]) & np.uint64(1)).astype(bool)
+    counts = presence.sum(axis=0)
+
+    wanted = np.zeros(num_classes, dtype=np.int64)
+    present = counts > 0
+    wanted[present] = np.ceil((target - counts[present]) / counts[present]).clip(0, max_copies)
+    if class_ids is not None:
+        only = np.zeros(num_classes, dtype=bool)
+        only[[c for c in class_ids if 0 <= c < num_classes]] = True
+        wanted[~only] = 0
+
+    # cada imagem recebe as copias pedidas pela sua classe mais rara
+    copies = np.where(presence, wanted[None, :], 0).max(axis=1, initial=0)
+    selected = copies > 0
+    return rows[selected], copies[selected], presence[selected], counts
+
+
+def augment_dataset(folder, output_folder, data_yaml, target=DEFAULT_TARGET, max_copies=DEFAULT_MAX_COPIES,
+                    class_ids=None, night_prob=DEFAULT_NIGHT_PROB, seed=0, workers=None,
+                    progress_callback=None, stop_event=None):
+    """
+    gera pares imagem/label aumentados das classes raras em output_folder
+    nomes no padrao do renomeador (classe_periodo_id), com id derivado do conteudo gerado;
+    mesma semente -> mesmos arquivos, e rodar de novo nao duplica nada
+    """
+    folder = Path(folder)
+    output_folder = Path(output_folder)
+    output_folder.mkdir(parents=True, exist_ok=True)
+    names = load_names(data_yaml)
+    num_classes = min(max(len(names), 1), 64)
+
+    if progress_callback:
+        progress_callback(0, "atualizando indice de metadados...")
+    index = ImageIndex(folder)
+    index.refresh()
+    index.save()
+
+    rows, copies, presence, counts = plan_augmentation(index, num_classes, target, max_copies, class_ids)
+    if not len(rows):
+        return False, "nenhuma classe abaixo do alvo (ou nenhuma imagem com label)"
+
+    tasks = []
+    prefixes = {}
+    classes = index.column('class')
+    for row, n in zip(rows.tolist(), copies.tolist()):
+        relative = index.paths[row]
+        image_path = index.root / relative
+        label = label_for(image_path)
+        period = PERIODS[index.data['period'][row]] if index.data['period'][row] >= 0 else 'dia'
+
+        class_name = classes[row]
+        if class_name is None:
+            # frame de video sem classe no nome: usa a classe mais frequente do label
+            ids = read_yolo_label(label)[:, 0].astype(np.int64)
+            ids = ids[(ids >= 0) & (ids < len(names))]
+            class_name = normalize_class(names[np.bincount(ids).argmax()]) if len(ids) else "aug"
+        prefixes[str(image_path)] = class_name
+
+        for k in range(n):
+            tasks.append((str(image_path), str(label) if label else None, k, sample_seed(seed, relative, k), period, night_prob))
+
+    name_index = NameIndex.from_folder(output_folder, manifest_path=output_folder / AUGMENT_MANIFEST)
+    written = 0
+    existing = 0
+    errors = []
+    workers = workers or os.cpu_count() or 2
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(augment_sample, tasks, chunksize=max(1, min(16, len(tasks) // (workers * 4) or 1)))
+        for idx, (image_path, copy_index, data, label_text, period, error) in enumerate(results, 1):
+            if stop_event is not None and stop_event.is_set():
+                executor.shutdown(wait=False, cancel_futures=True)
+                break
+
+            if error:
+                errors.append((image_path, error))
+                continue
+
+            digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+            name = name_index.assign(f"{prefixes[image_path]}_{period}", digest)
+            image_out = output_folder / f"{name}.jpg"
+
+            if image_out.exists():
+                existing += 1
+            else:
+                image_out.write_bytes(data)
+                image_out.with_suffix('.txt').write_text(label_text, encoding='utf-8')
+                written += 1
+
+            if progress_callback and (idx % 20 == 0 or idx == len(tasks)):
+                progress_callback(idx / len(tasks) * 100, f"aumentadas: {idx}/{len(tasks)}")
+
+    name_index.save()
+
+    return True, {
+        'sources': len(rows),
+        'tasks': len(tasks),
+        'written': written,
+        'existing': existing,
+        'errors': errors,
+        'images_per_class': dict(zip(names[:num_classes], counts.tolist())),
+        'copies_per_class': {
+            names[c]: int(n) for c, n in enumerate((presence * copies[:, None]).sum(axis=0)) if n
+        }
+    }
+
+
+class AugmentDatasetGUI:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("augmentacao offline de classes raras")
+        self.root.geometry("700x600")
+
+        self.folder_path = tk.StringVar()
+        self.output_path = tk.StringVar()
+        self.yaml_path = tk.StringVar()
+        self.target = tk.IntVar(value=DEFAULT_TARGET)
+        self.max_copies = tk.IntVar(value=DEFAULT_MAX_COPIES)
+        self.night_prob = tk.DoubleVar(value=DEFAULT_NIGHT_PROB)
+        self.seed = tk.IntVar(value=0)
+        self.workers = tk.IntVar(value=os.cpu_count() or 2)
+        self.stop_event = None
+        self.is_processing = False
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        rows = [
+            ("pasta com imagens e labels:", self.folder_path, self.browse_folder),
+            ("pasta de saida (pares aumentados):", self.output_path, self.browse_folder),
+            ("data.yaml:", self.yaml_path, self.browse_yaml)
+        ]
+        for i, (text, variable, command) in enumerate(rows):
+            ttk.Label(main_frame, text=text).grid(row=i * 2, column=0, sticky=tk.W, pady=(5, 0))
+            frame = ttk.Frame(main_frame)
+            frame.grid(row=i * 2 + 1, column=0, sticky=(tk.W, tk.E))
+            ttk.Entry(frame, textvariable=variable, width=50).pack(side=tk.LEFT, fill=tk.X, expand=True)
+            ttk.Button(frame, text="procurar", command=lambda v=variable, c=command: c(v)).pack(side=tk.LEFT, padx=5)
+
+        options_frame = ttk.Frame(main_frame)
+        options_frame.grid(row=6, column=0, sticky=tk.W, pady=(10, 0))
+        ttk.Label(options_frame, text="alvo de imagens por classe:").pack(side=tk.LEFT)
+        ttk.Spinbox(options_frame, from_=10, to=100000, textvariable=self.target, width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Label(options_frame, text="copias max por imagem:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Spinbox(options_frame, from_=1, to=50, textvariable=self.max_copies, width=5).pack(side=tk.LEFT, padx=5)
+
+        options_frame2 = ttk.Frame(main_frame)
+        options_frame2.grid(row=7, column=0, sticky=tk.W, pady=5)
+        ttk.Label(options_frame2, text="chance de virar noite:").pack(side=tk.LEFT)
+        ttk.Entry(options_frame2, textvariable=self.night_prob, width=6).pack(side=tk.LEFT, padx=5)
+        ttk.Label(options_frame2, text="semente:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Entry(options_frame2, textvariable=self.seed, width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Label(options_frame2, text="processos:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Spinbox(options_frame2, from_=1, to=64, textvariable=self.workers, width=5).pack(side=tk.LEFT, padx=5)
+
+        info_frame = ttk.LabelFrame(main_frame, text="transformacoes (caixas ajustadas junto):", padding="10")
+        info_frame.grid(row=8, column=0, sticky=(tk.W, tk.E), pady=10)
+        ttk.Label(info_frame, text="espelhamento horizontal, zoom 0.75-1.25 com recorte/borda, variacao de cor").pack(anchor=tk.W)
+        ttk.Label(info_frame, text="fotos de dia podem virar 'noite' (cinza infravermelho escurecido) e o nome acompanha").pack(anchor=tk.W)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=9, column=0, pady=10)
+        self.start_button = ttk.Button(button_frame, text="gerar", command=self.start_processing)
+        self.start_button.pack(side=tk.LEFT, padx=5)
+        self.stop_button = ttk.Button(button_frame, text="parar", command=self.stop_processing, state='disabled')
+        self.stop_button.pack(side=tk.LEFT, padx=5)
+
+        self.progress = ttk.Progressbar(main_frame, mode='determinate', length=400)
+        self.progress.grid(row=10, column=0, pady=5)
+
+        self.status_label = ttk.Label(main_frame, text="pronto")
+        self.status_label.grid(row=11, column=0, pady=5)
+
+        log_frame = ttk.LabelFrame(main_frame, text="log", padding="5")
+        log_frame.grid(row=12, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+
+        self.log_text = tk.Text(log_frame, height=10, width=70)
+        self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.log_text.config(yscrollcommand=scrollbar.set)
+
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(12, weight=1)
+
+    def browse_folder(self, variable):
+        folder = filedialog.askdirectory(title="selecionar pasta")
+        if folder:
+            variable.set(folder)
+
+    def browse_yaml(self, variable):
+        path = filedialog.askopenfilename(title="selecionar data.yaml", filetypes=[("yaml", "*.yaml"), ("todos", "*.*")])
+        if path:
+            variable.set(path)
+
+    def log_message(self, message):
+        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.see(tk.END)
+        self.root.update_idletasks()
+
+    def update_progress(self, value, status):
+        if value is not None:
+            self.progress['value'] = value
+        self.status_label.config(text=status)
+
+    def start_processing(self):
+        if self.is_processing:
+            messagebox.showwarning("aviso", "processamento ja em andamento")
+            return
+
+        if not self.folder_path.get() or not Path(self.folder_path.get()).exists():
+            messagebox.showerror("erro", "selecione a pasta com imagens e labels")
+            return
+
+        if not self.output_path.get() or not self.yaml_path.get():
+            messagebox.showerror("erro", "selecione a pasta de saida e o data.yaml")
+            return
+
+        if Path(self.output_path.get()).resolve() == Path(self.folder_path.get()).resolve():
+            messagebox.showerror("erro", "a pasta de saida precisa ser diferente da de entrada")
+            return
+
+        self.is_processing = True
+        self.stop_event = threading.Event()
+        self.start_button.config(state='disabled')
+        self.stop_button.config(state='normal')
+        self.progress['value'] = 0
+
+        thread = threading.Thread(target=self.process, daemon=True)
+        thread.start()
+
+    def process(self):
+        try:
+            success, result = augment_dataset(
+                self.folder_path.get(), self.output_path.get(), self.yaml_path.get(),
+                target=self.target.get(), max_copies=self.max_copies.get(), night_prob=self.night_prob.get(),
+                seed=self.seed.get(), workers=self.workers.get(),
+                progress_callback=self.update_progress, stop_event=self.stop_event
+            )
+
+            if not success:
+                self.log_message(result)
+                messagebox.showinfo("aviso", result)
+                return
+
+            for name, count in result['images_per_class'].items():
+                if name in result['copies_per_class']:
+                    self.log_message(f"{name}: {count} imagens, +{result['copies_per_class'][name]} copias")
+            for path, error in result['errors']:
+                self.log_message(f"erro em {Path(path).name}: {error}")
+
+            summary = (
+                f"imagens de origem: {result['sources']}\n"
+                f"pares novos: {result['written']} (ja existentes: {result['existing']})\n"
+                f"erros: {len(result['errors'])}"
+            )
+            self.log_message("\n" + summary)
+            messagebox.showinfo("concluido", summary)
+
+        except Exception as e:
+            self.log_message(f"\nerro durante processamento: {str(e)}")
+            messagebox.showerror("erro", f"erro durante processamento:\n{str(e)}")
+
+        finally:
+            self.is_processing = False
+            self.start_button.config(state='normal')
+            self.stop_button.config(state='disabled')
+
+    def stop_processing(self):
+        if self.stop_event is not None:
+            self.stop_event.set()
+            self.log_message("parando...")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="augmentacao offline das classes raras (pares imagem/label novos)")
+    parser.add_argument("--folder", help="pasta com imagens e labels; sem isso abre a interface grafica")
+    parser.add_argument("--output", help="pasta de saida")
+    parser.add_argument("--data", help="data.yaml com os nomes das classes")
+    parser.add_argument("--target", type=int, default=DEFAULT_TARGET, help="imagens por classe desejadas")
+    parser.add_argument("--max-copies", type=int, default=DEFAULT_MAX_COPIES)
+    parser.add_argument("--classes", help="ids de classe separados por virgula (padrao: todas abaixo do alvo)")
+    parser.add_argument("--night-prob", type=float, default=DEFAULT_NIGHT_PROB)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.folder:
+        if not args.output or not args.data:
+            parser.error("--output e --data sao obrigatorios junto com --folder")
+        class_ids = [int(c) for c in args.classes.split(',')] if args.classes else None
+        success, result = augment_dataset(
+            args.folder, args.output, args.data, target=args.target, max_copies=args.max_copies,
+            class_ids=class_ids, night_prob=args.night_prob, seed=args.seed, workers=args.workers,
+            progress_callback=lambda value, status: print(status)
+        )
+        if not success:
+            print(result)
+            return
+        print(f"{result['written']} pares novos, {result['existing']} ja existiam, {len(result['errors'])} erros")
+        return
+
+    root = tk.Tk()
+    app = AugmentDatasetGUI(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+import argparse
+import json
+import os
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+import tkinter as tk
+from tkinter import filedialog, ttk, messagebox
+import threading
+
+import numpy as np
+
+from image_metadata import find_images, label_for
+from label_remap import load_names, mapping_by_name
+
+
+DEFAULT_MODEL = "yolov8n-detector-gamba.pt"
+DEFAULT_CONF = 0.25
+DEFAULT_IOU = 0.7
+DEFAULT_BATCH = 16
+PREDICTIONS_FILE = "pre_anotacoes.json"
+# prefixo do label studio para arquivos locais (LOCAL_FILES_DOCUMENT_ROOT apontando para a pasta)
+DEFAULT_URL_PREFIX = "/data/local-files/?d="
+# nomes do <RectangleLabels> e da <Image> na configuracao de rotulagem do projeto
+LS_FROM_NAME = "label"
+LS_TO_NAME = "image"
+
+_model = None
+_predict_options = {}
+
+
+def has_annotation(image_path):
+    """True se a imagem ja tem label com pelo menos uma caixa (label vazio conta como sem anotacao)"""
+    label = label_for(image_path)
+    if label is None:
+        return False
+    try:
+        if label.stat().st_size == 0:
+            return False
+        with open(label, 'r', encoding='utf-8') as f:
+            return any(line.strip() for line in f)
+    except OSError:
+        return False
+
+
+def label_destination(image_path):
+    """label existente (vazio) ou o lugar padrao: labels/ irma de images/, senao ao lado da imagem"""
+    label = label_for(image_path)
+    if label is not None:
+        return label
+    if image_path.parent.name == 'images':
+        return image_path.parent.parent / 'labels' / f"{image_path.stem}.txt"
+    return image_path.with_suffix('.txt')
+
+
+def find_unlabeled(folder):
+    """imagens da pasta e subpastas sem label ou com label vazio"""
+    return [path for path in find_images(folder) if not has_annotation(path)]
+
+
+def _init_worker(model_path, imgsz, conf, iou, threads):
+    """carrega o modelo uma vez por processo; os lotes seguintes so fazem a inferencia"""
+    global _model, _predict_options
+    import torch
+    from ultralytics import YOLO
+
+    # cada processo com sua fatia de cpu, sem disputar threads com os outros
+    torch.set_num_threads(threads)
+    _model = YOLO(model_path)
+    _predict_options = {'imgsz': imgsz, 'conf': conf, 'iou': iou, 'verbose': False}
+
+
+def _predict(paths):
+    results = _model.predict(source=paths, **_predict_options)
+    return [
+        (path, result.boxes.data.cpu().numpy()[:, :6].astype(np.float32), tuple(result.orig_shape[:2]), None)
+        for path, result in zip(paths, results)
+    ]
+
+
+def predict_batch(paths):
+    """
+    roda no processo do pool: retorna [(caminho, deteccoes (N, 6) em pixels, (altura, largura), erro)]
+    se o lote falhar (imagem corrompida), refaz uma a uma para perder so a imagem ruim
+    """
+    try:
+        return _predict(paths)
+    except Exception as e:
+        if len(paths) == 1:
+            return [(paths[0], None, None, str(e))]
+    results = []
+    for path in paths:
+        results.extend(predict_batch([path]))
+    return results
+
+
+def model_class_names(model_path):
+    from ultralytics import YOLO
+    names = YOLO(model_path).names
+    return [names[i] for i in sorted(names)] if isinstance(names, dict) else list(names)
+
+
+def to_yolo_text(detections, shape):
+    """caixas (N, 6) xyxy em pixels -> linhas 'classe xc yc w h' normalizadas (sem a confianca, como no treino)"""
+    if not len(detections):
+        return ""
+    height, width = shape
+    x1, y1, x2, y2 = (detections[:, i] for i in range(4))
+    boxes = np.stack([(x1 + x2) / 2 / width, (y1 + y2) / 2 / height, (x2 - x1) / width, (y2 - y1) / height], axis=1)
+    boxes = np.clip(boxes, 0.0, 1.0)
+    return "".join(
+        f"{cls} {xc:.6f} {yc:.6f} {w:.6f} {h:.6f}\n"
+        for cls, (xc, yc, w, h) in zip(detections[:, 5].astype(np.int64).tolist(), boxes.tolist())
+    )
+
+
+def to_labelstudio_result(detections, shape, names):
+    """caixas (N, 6) -> itens 'rectanglelabels' do label studio (coordenadas em % da imagem) com o score"""
+    height, width = shape
+    results = []
+    for x1, y1, x2, y2, conf, cls in detections.tolist():
+        results.append({
+            'id': uuid.uuid4().hex[:10],
+            'type': 'rectanglelabels',
+            'from_name': LS_FROM_NAME,
+            'to_name': LS_TO_NAME,
+            'original_width': int(width),
+            'original_height': int(height),
+            'image_rotation': 0,
+            'value': {
+                'rotation': 0,
+                'x': x1 / width * 100,
+                'y': y1 / height * 100,
+                'width': (x2 - x1) / width * 100,
+                'height': (y2 - y1) / height * 100,
+                'rectanglelabels': [names[int(cls)]]
+            },
+            'score': round(conf, 4)
+        })
+    return results
+
+
+def auto_label(folder, model_path=DEFAULT_MODEL, output_json=None, data_yaml=None, conf=DEFAULT_CONF,
+               iou=DEFAULT_IOU, imgsz=640, batch_size=DEFAULT_BATCH, workers=None, url_prefix=DEFAULT_URL_PREFIX,
+               progress_callback=None, stop_event=None):
+    """
+    pre-anota as imagens sem label com o detector: grava o .txt yolo de cada uma e um json de importacao
+    do label studio (predictions com score) para o revisor so corrigir as caixas
+    data_yaml opcional: ids do modelo viram os ids do dataset pelo nome; classes fora do dataset sao descartadas
+    imagens que ganharam label durante a execucao nao sao sobrescritas
+    """
+    folder = Path(folder)
+    images = find_unlabeled(folder)
+    if not images:
+        return False, "nenhuma imagem sem label encontrada"
+
+    model_names = model_class_names(model_path)
+    if data_yaml:
+        names = load_names(data_yaml)
+        lut = mapping_by_name(model_names, names)
+    else:
+        names = model_names
+        lut = np.arange(len(model_names))
+
+    output_json = Path(output_json) if output_json else folder / PREDICTIONS_FILE
+    workers = max(1, workers or min(4, (os.cpu_count() or 2) // 2))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    model_version = Path(model_path).stem
+
+    batches = [[str(p) for p in images[i:i + batch_size]] for i in range(0, len(images), batch_size)]
+    stats = {'images': len(images), 'labeled': 0, 'boxes': 0, 'empty': 0, 'skipped': 0, 'errors': []}
+    done = 0
+
+    tmp_json = output_json.with_name(output_json.name + ".tmp")
+    with open(tmp_json, 'w', encoding='utf-8') as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(str(model_path), imgsz, conf, iou, threads)) as executor:
+        out.write("[\n")
+        first_task = True
+        pending = deque()
+        queue = iter(batches)
+
+        # poucos lotes em voo por processo: os resultados saem na ordem e a memoria fica limitada
+        for batch in queue:
+            pending.append(executor.submit(predict_batch, batch))
+            if len(pending) >= workers * 2:
+                break
+
+        while pending:
+            if stop_event is not None and stop_event.is_set():
+                executor.shutdown(wait=False, cancel_futures=True)
+                break
+
+            for path, detections, shape, error in pending.popleft().result():
+                done += 1
+                if error:
+                    stats['errors'].append((path, error))
+                    continue
+
+                image_path = Path(path)
+                if has_annotation(image_path):
+                    # alguem rotulou enquanto o modelo rodava
+                    stats['skipped'] += 1
+                    continue
+
+                cls = detections[:, 5].astype(np.int64)
+                inside = (cls >= 0) & (cls < len(lut))
+                detections = detections[inside]
+                detections[:, 5] = lut[cls[inside]]
+                detections = detections[detections[:, 5] >= 0]
+
+                label = label_destination(image_path)
+                label.parent.mkdir(parents=True, exist_ok=True)
+                label.write_text(to_yolo_text(detections, shape), encoding='utf-8')
+                stats['labeled'] += 1
+                stats['boxes'] += len(detections)
+                if not len(detections):
+                    # entra no json mesmo sem caixa: o revisor confere se o modelo deixou passar algum animal
+                    stats['empty'] += 1
+
+                relative = image_path.relative_to(folder).as_posix()
+                task = {
+                    'data': {LS_TO_NAME: url_prefix + quote(relative)},
+                    'predictions': [{
+                        'model_version': model_version,
+                        'score': round(float(detections[:, 4].mean()), 4) if len(detections) else 0.0,
+                        'result': to_labelstudio_result(detections, shape, names)
+                    }]
+                }
+                out.write(("" if first_task else ",\n") + json.dumps(task, ensure_ascii=False))
+                first_task = False
+
+            batch = next(queue, None)
+            if batch is not None:
+                pending.append(executor.submit(predict_batch, batch))
+
+            if progress_callback:
+                progress_callback(done / len(images) * 100, f"pre-anotadas: {done}/{len(images)}")
+
+        out.write("\n]\n")
+
+    os.replace(tmp_json, output_json)
+    stats['output_json'] = str(output_json)
+    return True, stats
+
+
+class AutoLabelGUI:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("pre-anotacao automatica com o detector")
+        self.root.geometry("700x600")
+
+        self.folder_path = tk.StringVar()
+        self.model_path = tk.StringVar(value=DEFAULT_MODEL)
+        self.yaml_path = tk.StringVar()
+        self.conf = tk.DoubleVar(value=DEFAULT_CONF)
+        self.batch_size = tk.IntVar(value=DEFAULT_BATCH)
+        self.workers = tk.IntVar(value=max(1, min(4, (os.cpu_count() or 2) // 2)))
+        self.stop_event = None
+        self.is_processing = False
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        rows = [
+            ("pasta com as imagens:", self.folder_path, self.browse_folder),
+            ("modelo (.pt):", self.model_path, self.browse_model),
+            ("data.yaml (opcional, ids do dataset):", self.yaml_path, self.browse_yaml)
+        ]
+        for i, (text, variable, command) in enumerate(rows):
+            ttk.Label(main_frame, text=text).grid(row=i * 2, column=0, sticky=tk.W, pady=(5, 0))
+            frame = ttk.Frame(main_frame)
+            frame.grid(row=i * 2 + 1, column=0, sticky=(tk.W, tk.E))
+            ttk.Entry(frame, textvariable=variable, width=50).pack(side=tk.LEFT, fill=tk.X, expand=True)
+            ttk.Button(frame, text="procurar", command=lambda v=variable, c=command: c(v)).pack(side=tk.LEFT, padx=5)
+
+        options_frame = ttk.Frame(main_frame)
+        options_frame.grid(row=6, column=0, sticky=tk.W, pady=(10, 0))
+        ttk.Label(options_frame, text="confianca minima:").pack(side=tk.LEFT)
+        ttk.Entry(options_frame, textvariable=self.conf, width=6).pack(side=tk.LEFT, padx=5)
+        ttk.Label(options_frame, text="lote:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Spinbox(options_frame, from_=1, to=256, textvariable=self.batch_size, width=5).pack(side=tk.LEFT, padx=5)
+        ttk.Label(options_frame, text="processos:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Spinbox(options_frame, from_=1, to=32, textvariable=self.workers, width=5).pack(side=tk.LEFT, padx=5)
+
+        info_frame = ttk.LabelFrame(main_frame, text="como funciona:", padding="10")
+        info_frame.grid(row=7, column=0, sticky=(tk.W, tk.E), pady=10)
+        ttk.Label(info_frame, text="1. so imagens sem label ou com label vazio; labels com caixas nao sao tocados").pack(anchor=tk.W)
+        ttk.Label(info_frame, text=f"2. grava o .txt yolo de cada imagem e {PREDICTIONS_FILE} para importar no label studio").pack(anchor=tk.W)
+        ttk.Label(info_frame, text="3. no label studio as caixas chegam como predicoes com score: e so corrigir").pack(anchor=tk.W)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=8, column=0, pady=10)
+        self.start_button = ttk.Button(button_frame, text="pre-anotar", command=self.start_processing)
+        self.start_button.pack(side=tk.LEFT, padx=5)
+        self.stop_button = ttk.Button(button_frame, text="parar", command=self.stop_processing, state='disabled')
+        self.stop_button.pack(side=tk.LEFT, padx=5)
+
+        self.progress = ttk.Progressbar(main_frame, mode='determinate', length=400)
+        self.progress.grid(row=9, column=0, pady=5)
+
+        self.status_label = ttk.Label(main_frame, text="pronto")
+        self.status_label.grid(row=10, column=0, pady=5)
+
+        log_frame = ttk.LabelFrame(main_frame, text="log", padding="5")
+        log_frame.grid(row=11, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+
+        self.log_text = tk.Text(log_frame, height=10, width=70)
+        self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.log_text.config(yscrollcommand=scrollbar.set)
+
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(11, weight=1)
+
+    def browse_folder(self, variable):
+        folder = filedialog.askdirectory(title="selecionar pasta")
+        if folder:
+            variable.set(folder)
+
+    def browse_model(self, variable):
+        path = filedialog.askopenfilename(
+            title="selecionar modelo",
+            filetypes=[("modelo yolo", "*.pt"), ("todos os arquivos", "*.*")]
+        )
+        if path:
+            variable.set(path)
+
+    def browse_yaml(self, variable):
+        path = filedialog.askopenfilename(title="selecionar data.yaml", filetypes=[("yaml", "*.yaml"), ("todos", "*.*")])
+        if path:
+            variable.set(path)
+
+    def log_message(self, message):
+        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.see(tk.END)
+        self.root.update_idletasks()
+
+    def update_progress(self, value, status):
+        if value is not None:
+            self.progress['value'] = value
+        self.status_label.config(text=status)
+
+    def start_processing(self):
+        if self.is_processing:
+            messagebox.showwarning("aviso", "processamento ja em andamento")
+            return
+
+        if not self.folder_path.get() or not Path(self.folder_path.get()).exists():
+            messagebox.showerror("erro", "selecione a pasta com as imagens")
+            return
+
+        if not Path(self.model_path.get()).exists():
+            messagebox.showerror("erro", "modelo nao encontrado")
+            return
+
+        self.is_processing = True
+        self.stop_event = threading.Event()
+        self.start_button.config(state='disabled')
+        self.stop_button.config(state='normal')
+        self.progress['value'] = 0
+
+        thread = threading.Thread(target=self.process, daemon=True)
+        thread.start()
+
+    def process(self):
+        try:
+            self.log_message("procurando imagens sem label...")
+            success, result = auto_label(
+                self.folder_path.get(), self.model_path.get(), data_yaml=self.yaml_path.get() or None,
+                conf=self.conf.get(), batch_size=self.batch_size.get(), workers=self.workers.get(),
+                progress_callback=self.update_progress, stop_event=self.stop_event
+            )
+
+            if not success:
+                self.log_message(result)
+                messagebox.showinfo("aviso", result)
+                return
+
+            for path, error in result['errors']:
+                self.log_message(f"erro em {Path(path).name}: {error}")
+
+            summary = (
+                f"imagens sem label: {result['images']}\n"
+                f"labels gravados: {result['labeled']} ({result['boxes']} caixas, {result['empty']} sem deteccao)\n"
+                f"rotuladas durante a execucao: {result['skipped']}\n"
+                f"erros: {len(result['errors'])}\n"
+                f"label studio: {result['output_json']}"
+            )
+            self.log_message("\n" + summary)
+            messagebox.showinfo("concluido", summary)
+
+        except Exception as e:
+            self.log_message(f"\nerro durante processamento: {str(e)}")
+            messagebox.showerror("erro", f"erro durante processamento:\n{str(e)}")
+
+        finally:
+            self.is_processing = False
+            self.start_button.config(state='normal')
+            self.stop_button.config(state='disabled')
+
+    def stop_processing(self):
+        if self.stop_event is not None:
+            self.stop_event.set()
+            self.log_message("parando...")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pre-anota imagens sem label com o detector (yolo .txt + json do label studio)")
+    parser.add_argument("--folder", help="pasta com as imagens; sem isso abre a interface grafica")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="pesos do detector (.pt)")
+    parser.add_argument("--data", help="data.yaml do dataset (ids de classe pelo nome)")
+    parser.add_argument("--output", help=f"json de importacao do label studio (padrao: <pasta>/{PREDICTIONS_FILE})")
+    parser.add_argument("--conf", type=float, default=DEFAULT_CONF)
+    parser.add_argument("--iou", type=float, default=DEFAULT_IOU)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH)
+    parser.add_argument("--workers", type=int, default=None, help="processos com uma copia do modelo cada")
+    parser.add_argument("--url-prefix", default=DEFAULT_URL_PREFIX, help="prefixo das imagens no label studio")
+    args = parser.parse_args()
+
+    if args.folder:
+        success, result = auto_label(
+            args.folder, args.model, output_json=args.output, data_yaml=args.data, conf=args.conf, iou=args.iou,
+            imgsz=args.imgsz, batch_size=args.batch, workers=args.workers, url_prefix=args.url_prefix,
+            progress_callback=lambda value, status: print(status)
+        )
+        if not success:
+            print(result)
+            return
+        for path, error in result['errors']:
+            print(f"erro em {path}: {error}")
+        print(f"{result['labeled']} labels gravados ({result['boxes']} caixas), {result['skipped']} pulados, "
+              f"{len(result['errors'])} erros -> {result['output_json']}")
+        return
+
+    root = tk.Tk()
+    app = AutoLabelGUI(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
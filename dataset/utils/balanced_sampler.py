@@ -0,0 +1,370 @@
+import argparse
+import json
+from pathlib import Path
+import tkinter as tk
+from tkinter import filedialog, ttk, messagebox
+import threading
+
+import numpy as np
+import yaml
+
+from image_metadata import ImageIndex
+from threshold_sweep import load_raw_predictions
+
+
+MAX_CLASSES = 64
+DEFAULT_MAX_REPEAT = 8
+DEFAULT_HARD_CONF = 0.25
+# negativas faceis entram ate essa fracao do numero de imagens positivas da lista
+DEFAULT_NEGATIVE_RATIO = 0.1
+
+
+def class_presence(label_mask, num_classes):
+    """matriz (imagens, classes) booleana a partir da mascara de bits do indice"""
+    shifts = np.arange(num_classes, dtype=np.uint64)
+    return ((label_mask[:, None] >> shifts[None, :]) & np.uint64(1)).astype(bool)
+
+
+def negative_scores(raw, paths):
+    """
+    maior confianca que o modelo deu em cada imagem (0 se nenhuma caixa), a partir do .npz de
+    candidatos do threshold_sweep; imagens que nao estao no .npz ficam com -1
+    """
+    boxes = raw['boxes']
+    offsets = raw['offsets']
+
+    per_image = np.zeros(len(raw['paths']), dtype=np.float32)
+    filled = offsets[1:] > offsets[:-1]
+    if filled.any():
+        # reduceat nao aceita segmento vazio: so aplica nos que tem caixa
+        per_image[filled] = np.maximum.reduceat(boxes[:, 4], offsets[:-1][filled])
+
+    position = {str(Path(p).resolve()): i for i, p in enumerate(raw['paths'])}
+    scores = np.full(len(paths), -1.0, dtype=np.float32)
+    for i, path in enumerate(paths):
+        row = position.get(str(Path(path).resolve()))
+        if row is not None:
+            scores[i] = per_image[row]
+    return scores
+
+
+def build_training_list(index, num_classes, target=None, cap=None, max_repeat=DEFAULT_MAX_REPEAT,
+                        raw_predictions=None, hard_conf=DEFAULT_HARD_CONF, hard_repeat=2,
+                        negative_ratio=DEFAULT_NEGATIVE_RATIO, seed=0):
+    """
+    lista de treino balanceada a partir do indice de metadados (nenhuma imagem e aberta ou copiada)
+    - classes raras sao repetidas ate ~target imagens (no maximo max_repeat vezes cada imagem)
+    - classes com mais de cap imagens sao subamostradas (imagem com alguma classe rara nunca sai)
+    - negativas (.txt vazio) onde o modelo dispara com conf >= hard_conf entram todas, hard_repeat vezes;
+      das negativas faceis entra so uma amostra
+    retorna (lista de caminhos com repeticoes, estatisticas)
+    """
+    rng = np.random.default_rng(seed)
+
+    usable = index.data['status'] <= 0
+    positives = usable & (index.data['label_count'] > 0)
+    negatives = usable & (index.data['label_count'] == 0)
+
+    pos_rows = np.flatnonzero(positives)
+    presence = class_presence(index.data['label_mask'][pos_rows], num_classes)
+    counts = presence.sum(axis=0)
+
+    present = counts > 0
+    if target is None:
+        target = int(np.median(counts[present])) if present.any() else 0
+
+    safe_counts = np.maximum(counts, 1)
+    repeat_factor = np.clip(target / safe_counts, 1.0, max_repeat)
+    keep_prob = np.ones(num_classes) if cap is None else np.minimum(1.0, cap / safe_counts)
+
+    # cada imagem fica com o fator da sua classe mais rara
+    image_repeat = np.where(presence, repeat_factor[None, :], 0).max(axis=1, initial=1.0)
+    image_keep = np.where(presence, keep_prob[None, :], 0).max(axis=1, initial=0.0)
+    # id de classe fora do data.yaml: a imagem entra como esta
+    image_keep[~presence.any(axis=1)] = 1.0
+
+    kept = rng.random(len(pos_rows)) < image_keep
+    # parte fracionaria do fator vira sorteio, assim a media bate com o alvo
+    repeats = np.floor(image_repeat) + (rng.random(len(pos_rows)) < image_repeat % 1)
+    repeats = np.where(kept, repeats, 0).astype(np.int64)
+
+    rows = [np.repeat(pos_rows, repeats)]
+
+    neg_rows = np.flatnonzero(negatives)
+    hard_rows = np.zeros(0, dtype=np.int64)
+    if raw_predictions is not None and len(neg_rows):
+        scores = negative_scores(raw_predictions, index.select(mask=negatives))
+        hard_rows = neg_rows[scores >= hard_conf]
+        neg_rows = neg_rows[scores < hard_conf]
+        rows.append(np.repeat(hard_rows, hard_repeat))
+
+    easy_budget = int(round(negative_ratio * repeats.sum()))
+    easy_rows = rng.choice(neg_rows, size=min(easy_budget, len(neg_rows)), replace=False) if len(neg_rows) else neg_rows
+    rows.append(easy_rows)
+
+    selected = np.concatenate(rows)
+    rng.shuffle(selected)
+
+    sampled = presence * repeats[:, None]
+    stats = {
+        'target': target,
+        'images_per_class': counts.tolist(),
+        'sampled_per_class': sampled.sum(axis=0).tolist(),
+        'positives': int(len(pos_rows)),
+        'positive_entries': int(repeats.sum()),
+        'hard_negatives': int(len(hard_rows)),
+        'easy_negatives': int(len(easy_rows)),
+        'entries': int(len(selected))
+    }
+    return [index.root / index.paths[i] for i in selected], stats
+
+
+def write_training_list(paths, output_path, data_yaml=None):
+    """
+    grava a lista (um caminho por linha, repeticoes incluidas) e, se data_yaml for dado,
+    uma copia do yaml com train apontando para a lista
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text("\n".join(str(p) for p in paths) + "\n", encoding='utf-8')
+
+    yaml_out = None
+    if data_yaml:
+        with open(data_yaml, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f)
+        data['train'] = str(output_path.resolve())
+        # o yaml novo fica em outra pasta: sem 'path' o ultralytics resolveria val/test a partir dela
+        if not data.get('path'):
+            data['path'] = str(Path(data_yaml).resolve().parent)
+        yaml_out = output_path.with_suffix('.yaml')
+        with open(yaml_out, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+
+    return yaml_out
+
+
+def load_class_names(data_yaml):
+    with open(data_yaml, 'r', encoding='utf-8') as f:
+        names = yaml.safe_load(f).get('names', [])
+    return list(names.values()) if isinstance(names, dict) else list(names)
+
+
+def balance_dataset(train_folder, data_yaml, output_path, target=None, cap=None, max_repeat=DEFAULT_MAX_REPEAT,
+                    raw_path=None, hard_conf=DEFAULT_HARD_CONF, negative_ratio=DEFAULT_NEGATIVE_RATIO,
+                    seed=0, progress_callback=None):
+    names = load_class_names(data_yaml)
+    num_classes = min(max(len(names), 1), MAX_CLASSES)
+
+    if progress_callback:
+        progress_callback(5, "atualizando indice de metadados...")
+    index = ImageIndex(train_folder)
+    index.refresh(progress_callback=progress_callback)
+    index.save()
+
+    if progress_callback:
+        progress_callback(60, "montando lista balanceada...")
+    raw = load_raw_predictions(raw_path) if raw_path else None
+    paths, stats = build_training_list(
+        index, num_classes, target=target, cap=cap, max_repeat=max_repeat, raw_predictions=raw,
+        hard_conf=hard_conf, negative_ratio=negative_ratio, seed=seed
+    )
+
+    yaml_out = write_training_list(paths, output_path, data_yaml)
+    stats['names'] = names[:num_classes]
+    stats['output'] = str(output_path)
+    stats['yaml'] = str(yaml_out)
+
+    Path(output_path).with_suffix('.json').write_text(json.dumps(stats, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    if progress_callback:
+        progress_callback(100, f"lista gravada: {output_path} ({stats['entries']} entradas)")
+    return True, stats
+
+
+def format_stats(stats):
+    lines = [f"{'classe':<20} {'imagens':>8} {'na lista':>9}"]
+    for name, count, sampled in zip(stats['names'], stats['images_per_class'], stats['sampled_per_class']):
+        lines.append(f"{name:<20} {count:>8} {sampled:>9}")
+    lines.append(f"alvo por classe: {stats['target']}")
+    lines.append(f"negativas dificeis: {stats['hard_negatives']}  negativas faceis: {stats['easy_negatives']}")
+    lines.append(f"entradas na lista: {stats['entries']}")
+    return "\n".join(lines)
+
+
+class BalancedSamplerGUI:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("lista de treino balanceada")
+        self.root.geometry("700x600")
+
+        self.train_path = tk.StringVar()
+        self.yaml_path = tk.StringVar()
+        self.raw_path = tk.StringVar()
+        self.output_path = tk.StringVar()
+        self.target = tk.StringVar()
+        self.cap = tk.StringVar()
+        self.max_repeat = tk.IntVar(value=DEFAULT_MAX_REPEAT)
+        self.hard_conf = tk.DoubleVar(value=DEFAULT_HARD_CONF)
+        self.is_processing = False
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        rows = [
+            ("pasta de treino (imagens + labels):", self.train_path, self.browse_folder),
+            ("data.yaml:", self.yaml_path, lambda v: self.browse_file(v, [("yaml", "*.yaml")])),
+            ("candidatos do threshold_sweep (.npz, opcional, para negativas dificeis):", self.raw_path,
+             lambda v: self.browse_file(v, [("npz", "*.npz")])),
+            ("lista de saida (.txt):", self.output_path, self.browse_output)
+        ]
+        for i, (text, variable, command) in enumerate(rows):
+            ttk.Label(main_frame, text=text).grid(row=i * 2, column=0, sticky=tk.W, pady=(5, 0))
+            frame = ttk.Frame(main_frame)
+            frame.grid(row=i * 2 + 1, column=0, sticky=(tk.W, tk.E))
+            ttk.Entry(frame, textvariable=variable, width=50).pack(side=tk.LEFT, fill=tk.X, expand=True)
+            ttk.Button(frame, text="procurar", command=lambda v=variable, c=command: c(v)).pack(side=tk.LEFT, padx=5)
+
+        options_frame = ttk.Frame(main_frame)
+        options_frame.grid(row=8, column=0, sticky=tk.W, pady=10)
+        ttk.Label(options_frame, text="alvo por classe (vazio = mediana):").pack(side=tk.LEFT)
+        ttk.Entry(options_frame, textvariable=self.target, width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Label(options_frame, text="teto:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Entry(options_frame, textvariable=self.cap, width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Label(options_frame, text="repeticao max:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Spinbox(options_frame, from_=1, to=50, textvariable=self.max_repeat, width=5).pack(side=tk.LEFT, padx=5)
+        ttk.Label(options_frame, text="conf negativa dificil:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Entry(options_frame, textvariable=self.hard_conf, width=6).pack(side=tk.LEFT, padx=5)
+
+        self.process_button = ttk.Button(main_frame, text="gerar lista", command=self.start_processing)
+        self.process_button.grid(row=9, column=0, pady=10)
+
+        self.progress = ttk.Progressbar(main_frame, mode='determinate', length=400)
+        self.progress.grid(row=10, column=0, pady=5)
+
+        self.status_label = ttk.Label(main_frame, text="pronto")
+        self.status_label.grid(row=11, column=0, pady=5)
+
+        log_frame = ttk.LabelFrame(main_frame, text="log", padding="5")
+        log_frame.grid(row=12, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+
+        self.log_text = tk.Text(log_frame, height=12, width=70, font=('Courier', 9))
+        self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.log_text.config(yscrollcommand=scrollbar.set)
+
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(12, weight=1)
+
+    def browse_folder(self, variable):
+        folder = filedialog.askdirectory(title="selecionar pasta de treino")
+        if folder:
+            variable.set(folder)
+            if not self.output_path.get():
+                self.output_path.set(str(Path(folder).parent / "train_balanced.txt"))
+
+    def browse_file(self, variable, filetypes):
+        path = filedialog.askopenfilename(title="selecionar arquivo", filetypes=filetypes + [("todos", "*.*")])
+        if path:
+            variable.set(path)
+
+    def browse_output(self, variable):
+        path = filedialog.asksaveasfilename(title="salvar lista", defaultextension=".txt", filetypes=[("txt", "*.txt")])
+        if path:
+            variable.set(path)
+
+    def log_message(self, message):
+        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.see(tk.END)
+        self.root.update_idletasks()
+
+    def update_progress(self, value, status):
+        if value is not None:
+            self.progress['value'] = value
+        self.status_label.config(text=status)
+
+    def start_processing(self):
+        if self.is_processing:
+            messagebox.showwarning("aviso", "processamento ja em andamento")
+            return
+
+        if not self.train_path.get() or not Path(self.train_path.get()).exists():
+            messagebox.showerror("erro", "selecione a pasta de treino")
+            return
+
+        if not self.yaml_path.get() or not self.output_path.get():
+            messagebox.showerror("erro", "selecione o data.yaml e a lista de saida")
+            return
+
+        try:
+            target = int(self.target.get()) if self.target.get().strip() else None
+            cap = int(self.cap.get()) if self.cap.get().strip() else None
+        except ValueError:
+            messagebox.showerror("erro", "alvo e teto precisam ser numeros inteiros")
+            return
+
+        self.is_processing = True
+        self.process_button.config(state='disabled')
+        self.progress['value'] = 0
+
+        thread = threading.Thread(target=self.process, args=(target, cap), daemon=True)
+        thread.start()
+
+    def process(self, target, cap):
+        try:
+            success, stats = balance_dataset(
+                self.train_path.get(), self.yaml_path.get(), self.output_path.get(),
+                target=target, cap=cap, max_repeat=self.max_repeat.get(),
+                raw_path=self.raw_path.get() or None, hard_conf=self.hard_conf.get(),
+                progress_callback=self.update_progress
+            )
+            self.log_message(format_stats(stats))
+            self.log_message(f"\nyaml para o treino: {stats['yaml']}")
+            messagebox.showinfo("concluido", f"lista com {stats['entries']} entradas gravada em:\n{stats['output']}")
+
+        except Exception as e:
+            self.log_message(f"\nerro durante processamento: {str(e)}")
+            messagebox.showerror("erro", f"erro durante processamento:\n{str(e)}")
+
+        finally:
+            self.is_processing = False
+            self.process_button.config(state='normal')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gera uma lista de treino balanceada por classe, com negativas dificeis")
+    parser.add_argument("--train", help="pasta de treino; sem isso abre a interface grafica")
+    parser.add_argument("--data", help="data.yaml com os nomes das classes")
+    parser.add_argument("--output", help="lista de saida (.txt); o .yaml e o .json ficam ao lado")
+    parser.add_argument("--target", type=int, help="imagens por classe (padrao: mediana)")
+    parser.add_argument("--cap", type=int, help="maximo de imagens por classe")
+    parser.add_argument("--max-repeat", type=int, default=DEFAULT_MAX_REPEAT)
+    parser.add_argument("--raw", help=".npz de candidatos do threshold_sweep para minerar negativas dificeis")
+    parser.add_argument("--hard-conf", type=float, default=DEFAULT_HARD_CONF)
+    parser.add_argument("--negative-ratio", type=float, default=DEFAULT_NEGATIVE_RATIO)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.train:
+        if not args.data or not args.output:
+            parser.error("--data e --output sao obrigatorios junto com --train")
+        success, stats = balance_dataset(
+            args.train, args.data, args.output, target=args.target, cap=args.cap, max_repeat=args.max_repeat,
+            raw_path=args.raw, hard_conf=args.hard_conf, negative_ratio=args.negative_ratio, seed=args.seed
+        )
+        print(format_stats(stats))
+        return
+
+    root = tk.Tk()
+    app = BalancedSamplerGUI(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from create_empty_labels import find_images_without_labels
+from merge_dataset import merge_folders
+from organize_by_class import organize_images_by_class
+from organize_dataset import organize_dataset
+from remove_labelstudio_hash import remove_hash_from_txt_files
+from video_to_frames import extract_frames_from_video
+
+
+DEFAULT_SCALES = [1000, 10000, 100000]
+DEFAULT_OUTPUT_DIR = Path(__file__).resolve().parent.parent.parent / "runs" / "bench"
+DEFAULT_SEED = 1234
+
+SYNTH_CLASSES = ["gamba", "tatu", "capivara", "cutia", "paca", "onca"]
+SYNTH_PERIODS = ["dia", "noite"]
+# imagem pequena de proposito: o que interessa e o custo por arquivo, nao o tamanho dos pixels
+SYNTH_IMAGE_SIZE = (64, 48)
+VIDEO_SIZE = (320, 240)
+VIDEO_FPS = 30
+MERGE_SOURCES = 4
+
+
+def synthetic_jpegs(rng, variants=16):
+    """algumas variantes de jpeg ja codificadas, reaproveitadas para escrever milhares de arquivos rapido"""
+    width, height = SYNTH_IMAGE_SIZE
+    encoded = []
+    for _ in range(variants):
+        image = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        ok, data = cv2.imencode('.jpg', image)
+        encoded.append(data.tobytes())
+    return encoded
+
+
+def synthetic_label(rng):
+    cls = int(rng.integers(0, len(SYNTH_CLASSES)))
+    x, y = rng.uniform(0.2, 0.8, 2)
+    w, h = rng.uniform(0.05, 0.3, 2)
+    return f"{cls} {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n"
+
+
+def synthetic_names(count, rng):
+    """nomes no formato classe_periodo_hash, o mesmo do banco de fotos"""
+    names = []
+    for i in range(count):
+        class_name = SYNTH_CLASSES[int(rng.integers(0, len(SYNTH_CLASSES)))]
+        period = SYNTH_PERIODS[i % 2]
+        names.append(f"{class_name}_{period}_{i:07d}")
+    return names
+
+
+def write_tree(folder, names, jpegs, rng, label_ratio=1.0, label_name=None):
+    """escreve <nome>.jpg para todos os nomes e <nome>.txt para uma fracao label_ratio deles"""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    label_name = label_name or (lambda name: f"{name}.txt")
+
+    for i, name in enumerate(names):
+        (folder / f"{name}.jpg").write_bytes(jpegs[i % len(jpegs)])
+        if rng.random() < label_ratio:
+            (folder / label_name(name)).write_text(synthetic_label(rng))
+
+
+def write_video(path, frames, rng):
+    """video sintetico (mjpg em .avi, funciona no opencv headless sem codecs extras)"""
+    width, height = VIDEO_SIZE
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), VIDEO_FPS, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"nao foi possivel criar o video sintetico: {path}")
+
+    background = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    for i in range(frames):
+        frame = background.copy()
+        x = (i * 4) % (width - 40)
+        cv2.rectangle(frame, (x, 100), (x + 40, 140), (255, 255, 255), -1)
+        writer.write(frame)
+
+    writer.release()
+
+
+# cada caso recebe (pasta de trabalho, escala, rng) e devolve (funcao a cronometrar, numero de itens)
+# a preparacao fica fora do tempo medido; as funcoes movem/renomeiam arquivos, por isso tudo e recriado a cada repeticao
+
+def setup_extract_frames(workdir, scale, rng):
+    video_path = workdir / "video.avi"
+    write_video(video_path, scale, rng)
+    # 30 fps extraindo a 3 fps -> um frame salvo a cada 10 lidos
+    return lambda: extract_frames_from_video(str(video_path), "bench", 3, str(workdir / "frames")), scale
+
+
+def setup_merge_folders(workdir, scale, rng):
+    jpegs = synthetic_jpegs(rng)
+    names = synthetic_names(scale, rng)
+    folders = []
+    for i in range(MERGE_SOURCES):
+        folder = workdir / f"origem{i}"
+        # metade em subpastas para exercitar a busca recursiva
+        write_tree(folder / "sub", names[i::MERGE_SOURCES][::2], jpegs, rng)
+        write_tree(folder, names[i::MERGE_SOURCES][1::2], jpegs, rng)
+        folders.append(str(folder))
+    return lambda: merge_folders(folders, str(workdir / "merged")), scale
+
+
+def setup_organize_dataset(workdir, scale, rng):
+    folder = workdir / "dataset"
+    write_tree(folder, synthetic_names(scale, rng), synthetic_jpegs(rng), rng, label_ratio=0.9)
+    return lambda: organize_dataset(str(folder)), scale
+
+
+def setup_organize_by_class(workdir, scale, rng):
+    folder = workdir / "banco" / "todas"
+    write_tree(folder, synthetic_names(scale, rng), synthetic_jpegs(rng), rng, label_ratio=0.0)
+    return lambda: organize_images_by_class(str(folder)), scale
+
+
+def setup_remove_hash(workdir, scale, rng):
+    folder = workdir / "labelstudio"
+    # 90% dos labels com o prefixo de 8 hex que o label studio adiciona
+    hashed = lambda name: (f"{rng.integers(0, 1 << 32):08x}-{name}.txt" if rng.random() < 0.9 else f"{name}.txt")
+    write_tree(folder, synthetic_names(scale, rng), synthetic_jpegs(rng), rng, label_name=hashed)
+    return lambda: remove_hash_from_txt_files(str(folder)), scale
+
+
+def setup_find_without_labels(workdir, scale, rng):
+    folder = workdir / "sem_labels"
+    write_tree(folder, synthetic_names(scale, rng), synthetic_jpegs(rng), rng, label_ratio=0.5)
+
+    def run():
+        # essa funcao devolve (lista, erro) em vez de (sucesso, resultado)
+        images, error = find_images_without_labels(str(folder))
+        return (False, error) if error else (True, {'without_labels': len(images)})
+
+    return run, scale
+
+
+BENCHMARKS = {
+    'extract_frames_from_video': setup_extract_frames,
+    'merge_folders': setup_merge_folders,
+    'organize_dataset': setup_organize_dataset,
+    'organize_images_by_class': setup_organize_by_class,
+    'remove_hash_from_txt_files': setup_remove_hash,
+    'find_images_without_labels': setup_find_without_labels
+}
+
+
+def git_commit():
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).resolve().parent,
+            capture_output=True, text=True, timeout=10
+        )
+        return output.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def peak_rss_mb():
+    # ru_maxrss vem em kb no linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_benchmark(name, scale, repeat=3, seed=DEFAULT_SEED, workdir=None, progress_callback=None):
+    """roda um caso `repeat` vezes, cada uma numa arvore sintetica nova (mesma semente)"""
+    setup = BENCHMARKS[name]
+    times = []
+    result = None
+
+    for i in range(repeat):
+        rng = np.random.default_rng(seed)
+        run_dir = Path(tempfile.mkdtemp(prefix=f"bench_{name}_", dir=workdir))
+
+        try:
+            func, items = setup(run_dir, scale, rng)
+
+            start = time.perf_counter()
+            success, result = func()
+            times.append(time.perf_counter() - start)
+
+            if not success:
+                raise RuntimeError(f"{name} falhou: {result}")
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+        if progress_callback:
+            progress_callback(name, scale, i + 1, times[-1])
+
+    return {
+        'name': name,
+        'scale': scale,
+        'items': items,
+        'repeat': repeat,
+        'times_s': [round(t, 4) for t in times],
+        'min_s': round(min(times), 4),
+        'median_s': round(statistics.median(times), 4),
+        'items_per_s': round(items / min(times), 1),
+        'result': result if isinstance(result, dict) else None
+    }
+
+
+def run_suite(names=None, scales=None, repeat=3, seed=DEFAULT_SEED, workdir=None, progress_callback=None):
+    names = names or list(BENCHMARKS)
+    scales = scales or DEFAULT_SCALES
+
+    results = []
+    for name in names:
+        for scale in scales:
+            results.append(run_benchmark(name, scale, repeat, seed, workdir, progress_callback))
+
+    return {
+        'commit': git_commit(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'seed': seed,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'results': results
+    }
+
+
+def save_report(report, output_dir=DEFAULT_OUTPUT_DIR):
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    output_path = output_dir / f"bench_{report['commit'] or 'sem-git'}_{stamp}.json"
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    return output_path
+
+
+def compare_reports(baseline, current):
+    """linhas de texto com a razao (atual / base) do tempo minimo de cada caso em comum"""
+    base = {(r['name'], r['scale']): r for r in baseline['results']}
+    lines = [f"base {baseline.get('commit')} -> atual {current.get('commit')}"]
+
+    for result in current['results']:
+        old = base.get((result['name'], result['scale']))
+        if old is None:
+            continue
+        ratio = result['min_s'] / old['min_s'] if old['min_s'] else float('inf')
+        flag = "  <-- regressao" if ratio > 1.1 else ""
+        lines.append(
+            f"{result['name']:<28} {result['scale']:>7}  {old['min_s']:>8.3f}s -> {result['min_s']:>8.3f}s  x{ratio:.2f}{flag}"
+        )
+
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark das ferramentas do dataset com dados sinteticos")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="numero de arquivos (ou frames de video) por caso, separados por virgula")
+    parser.add_argument("--only", nargs="*", choices=list(BENCHMARKS), help="roda apenas estes casos")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--workdir", default=None, help="onde criar as arvores sinteticas (padrao: pasta temporaria)")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT_DIR))
+    parser.add_argument("--compare", default=None, help="json de uma execucao anterior para comparar")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+
+    def progress(name, scale, run, elapsed):
+        print(f"{name} [{scale}] execucao {run}: {elapsed:.3f}s")
+
+    report = run_suite(args.only, scales, args.repeat, args.seed, args.workdir, progress)
+    output_path = save_report(report, args.output)
+    print(f"resultado salvo em: {output_path}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print(compare_reports(json.load(f), report))
+
+
+if __name__ == "__main__":
+    main()
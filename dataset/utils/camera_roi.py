@@ -0,0 +1,142 @@
+import hashlib
+from pathlib import Path
+
+import cv2
+import numpy as np
+import yaml
+
+
+DEFAULT_ROI_PATH = Path(__file__).resolve().parent.parent / "camera_rois.yaml"
+# o nome da camera so casa se vier inteiro: CAM01_..., CAM01-..., nunca CAM010 ou "C" dentro de "C:"
+NAME_SEPARATORS = ('_', '-', '.', ' ')
+
+
+class CameraROI:
+    """
+    regiao de interesse de uma camera fixa (poligono em coordenadas normalizadas 0-1)
+    o frame e recortado no retangulo que envolve o poligono e o resto fica preto
+    """
+
+    def __init__(self, name, polygon):
+        self.name = name
+        self.polygon = np.asarray(polygon, dtype=np.float32).reshape(-1, 2)
+        self.key = hashlib.blake2b(self.polygon.tobytes(), digest_size=6).hexdigest()
+        self._shape_cache = {}
+
+    def _prepare(self, height, width):
+        if (height, width) not in self._shape_cache:
+            points = np.round(self.polygon * [width, height]).astype(np.int32)
+            x1, y1 = np.clip(points.min(axis=0), 0, [width, height])
+            x2, y2 = np.clip(points.max(axis=0) + 1, 0, [width, height])
+
+            mask = np.zeros((y2 - y1, x2 - x1), dtype=np.uint8)
+            cv2.fillPoly(mask, [points - [x1, y1]], 255)
+
+            self._shape_cache[(height, width)] = ((int(x1), int(y1), int(x2), int(y2)), mask)
+
+        return self._shape_cache[(height, width)]
+
+    def bounds(self, height, width):
+        return self._prepare(height, width)[0]
+
+    def mask(self, height, width):
+        """mascara (uint8) do poligono recortada no retangulo da roi"""
+        return self._prepare(height, width)[1]
+
+    def crop(self, frame):
+        """retorna (recorte mascarado, (x1, y1)) para mapear as caixas de volta depois"""
+        (x1, y1, x2, y2), mask = self._prepare(*frame.shape[:2])
+        cropped = frame[y1:y2, x1:x2]
+        return cv2.bitwise_and(cropped, cropped, mask=mask), (x1, y1)
+
+    def map_back(self, detections, offset):
+        """leva as deteccoes (N, 6) do recorte para coordenadas do frame inteiro"""
+        if len(detections) == 0:
+            return detections
+        detections = detections.copy()
+        detections[:, [0, 2]] += offset[0]
+        detections[:, [1, 3]] += offset[1]
+        return detections
+
+
+def load_rois(yaml_path=DEFAULT_ROI_PATH):
+    """le camera_rois.yaml -> lista de CameraROI (prefixo mais longo primeiro)"""
+    yaml_path = Path(yaml_path)
+    if not yaml_path.exists():
+        return []
+
+    with open(yaml_path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+
+    rois = [CameraROI(name, polygon) for name, polygon in (data.get('cameras') or {}).items()]
+    return sorted(rois, key=lambda roi: len(roi.name), reverse=True)
+
+
+def _matches(part, name):
+    return part == name or (part.startswith(name) and part[len(name)] in NAME_SEPARATORS)
+
+
+def roi_for(path, rois, root=None):
+    """
+    procura a roi pelo prefixo da camera no nome do video/imagem ou nas pastas do caminho
+    so contam as pastas abaixo de root (sem root, so a pasta do arquivo): disco, usuario,
+    Documents... nunca entram na busca
+    ex: cameras: {CAM01: ...} casa com CAM01_2024-05-01.mp4 e com Teste/CAM01/frame.jpg
+    """
+    path = Path(path)
+    folders = (path.parent.name,)
+    if root is not None:
+        try:
+            folders = path.parent.resolve().relative_to(Path(root).resolve()).parts
+        except ValueError:
+            pass
+
+    parts = (path.stem,) + tuple(folders)
+    for roi in rois:
+        if any(_matches(part, roi.name) for part in parts):
+            return roi
+    return None
+
+
+class MotionGate:
+    """
+    portao de movimento barato para cameras fixas: compara o frame atual com uma media
+    movel do fundo, em escala reduzida e so dentro da roi; sem movimento nao ha inferencia
+    cada pixel que mudou mais que pixel_threshold conta; ha movimento quando a fracao de pixels
+    mudados passa de min_area (a media da roi inteira nao enxergava bicho pequeno, ex: gamba, tatu)
+    """
+
+    def __init__(self, pixel_threshold=25.0, min_area=0.002, scale=0.125, alpha=0.05, roi=None):
+        self.pixel_threshold = pixel_threshold
+        self.min_area = min_area
+        self.scale = scale
+        self.alpha = alpha
+        self.roi = roi
+        self.background = None
+        self._small_mask = None
+
+    def has_motion(self, frame):
+        full_mask = None
+        if self.roi is not None:
+            full_mask = self.roi.mask(*frame.shape[:2])
+            frame, _ = self.roi.crop(frame)
+
+        small = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+        # tira o ruido de sensor (infravermelho a noite) antes de comparar pixel a pixel
+        gray = cv2.GaussianBlur(gray, (3, 3), 0)
+
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.copy()
+            if full_mask is not None:
+                self._small_mask = cv2.resize(
+                    full_mask, (gray.shape[1], gray.shape[0]), interpolation=cv2.INTER_NEAREST
+                ) > 0
+            return True
+
+        changed = np.abs(gray - self.background) > self.pixel_threshold
+        cv2.accumulateWeighted(gray, self.background, self.alpha)
+
+        if self._small_mask is not None and self._small_mask.any():
+            changed = changed[self._small_mask]
+        return float(changed.mean()) > self.min_area
@@ -0,0 +1,205 @@
+import threading
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from inference_cache import InferenceCache, cached_predict
+from inference_server import InferenceClient
+
+
+CACHE_PATH = Path(__file__).resolve().parent.parent.parent / "runs" / "cache" / "inference.sqlite"
+
+# armadilhas fotograficas a noite gravam em infravermelho: imagem sem cor (r = g = b)
+NIGHT_MAX_SATURATION = 12
+NIGHT_MAX_BRIGHTNESS = 50
+
+
+def estimate_period(path):
+    """
+    palpite barato de dia/noite a partir de uma miniatura 64x48 (draft do jpeg, quase sem custo)
+    retorna (periodo, saturacao media, brilho medio) com saturacao e brilho em 0-255
+    """
+    with Image.open(path) as img:
+        img.draft('RGB', (64, 48))
+        hsv = np.asarray(img.convert('RGB').resize((64, 48)).convert('HSV'), dtype=np.float32)
+
+    saturation = float(hsv[..., 1].mean())
+    brightness = float(hsv[..., 2].mean())
+
+    if saturation < NIGHT_MAX_SATURATION or brightness < NIGHT_MAX_BRIGHTNESS:
+        return 'noite', saturation, brightness
+    return 'dia', saturation, brightness
+
+
+def _normalize(name):
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode()
+    return name.lower().replace('-', ' ').replace('_', ' ').strip()
+
+
+def match_class_names(model_names, classes):
+    """mapeia os nomes do detector para as classes do data.yaml (sem acento/caixa); sem par fica o nome do modelo"""
+    lookup = {_normalize(c): c for c in classes}
+    return [lookup.get(_normalize(name), name) for name in model_names]
+
+
+def propose_class(detections, names, min_conf=0.25):
+    """classe com maior soma de confianca entre as deteccoes; (None, 0.0) se nada passou de min_conf"""
+    detections = detections[detections[:, 4] >= min_conf] if len(detections) else detections
+    if len(detections) == 0:
+        return None, 0.0
+
+    votes = np.bincount(detections[:, 5].astype(np.int64), weights=detections[:, 4])
+    cls = int(votes.argmax())
+    conf = float(detections[detections[:, 5] == cls, 4].max())
+    return (names[cls] if cls < len(names) else str(cls)), conf
+
+
+def make_detector(model_path, conf=0.25):
+    """
+    devolve (detect, names) onde detect(lista de caminhos) -> lista de arrays (N, 6)
+    usa o servidor de inferencia se estiver rodando, senao carrega o modelo aqui com o cache em disco
+    """
+    client = InferenceClient()
+
+    if client.available():
+        names = client.model_names(model_path)
+
+        def detect(paths):
+            return [client.predict(model_path, path, conf=conf)[0]['detections'] for path in paths]
+
+        return detect, names
+
+    from ultralytics import YOLO
+    model = YOLO(model_path)
+    names = [model.names[i] for i in sorted(model.names)]
+    cache = InferenceCache(CACHE_PATH)
+
+    def detect(paths):
+        results = cached_predict(model, model_path, paths, cache, conf=conf)
+        return [results[Path(path)] for path in paths]
+
+    return detect, names
+
+
+class ProposalWorker:
+    """
+    roda o detector em segundo plano sobre a pasta, sempre a partir do cursor do revisor para frente
+    (depois volta para o comeco), e guarda {caminho: {'class', 'conf', 'period'}}
+    """
+
+    def __init__(self, detect, names, image_paths, batch_size=8, min_conf=0.25):
+        self.detect = detect
+        self.names = list(names)
+        self.paths = [Path(p) for p in image_paths]
+        self.batch_size = batch_size
+        self.min_conf = min_conf
+
+        self.proposals = {}
+        self.error = None
+        self._done = set()
+
+        self._next = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def set_cursor(self, index):
+        with self._lock:
+            self._next = max(0, min(index, len(self.paths)))
+
+    def get(self, path):
+        with self._lock:
+            return self.proposals.get(Path(path))
+
+    def progress(self):
+        with self._lock:
+            return len(self._done), len(self.paths)
+
+    def _next_batch(self):
+        with self._lock:
+            batch = []
+            scanned = 0
+            while len(batch) < self.batch_size and scanned < len(self.paths):
+                if self._next >= len(self.paths):
+                    self._next = 0
+                path = self.paths[self._next]
+                if path not in self._done:
+                    batch.append(path)
+                    self._done.add(path)
+                self._next += 1
+                scanned += 1
+            return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if not batch:
+                break
+
+            # imagem renomeada/excluida pelo revisor no meio do caminho: so ignora
+            batch = [path for path in batch if path.exists()]
+            try:
+                all_detections = self.detect(batch) if batch else []
+            except Exception as e:
+                self.error = e
+                break
+
+            for path, detections in zip(batch, all_detections):
+                class_name, conf = propose_class(detections, self.names, self.min_conf)
+                try:
+                    period = estimate_period(path)[0]
+                except OSError:
+                    period = None
+
+                with self._lock:
+                    self.proposals[path] = {'class': class_name, 'conf': conf, 'period': period}
+
+    def stop(self):
+        self._stop.set()
+
+
+def apply_renames(plan, progress_callback=None):
+    """
+    aplica uma lista de (caminho atual, caminho novo) de uma vez
+    nao sobrescreve nada: destino existente ou repetido no plano vira erro daquele item
+    itens que ja estao com o nome certo sao ignorados (nao entram em renamed)
+    """
+    renamed = []
+    errors = []
+    targets = set()
+
+    for idx, (old_path, new_path) in enumerate(plan):
+        old_path, new_path = Path(old_path), Path(new_path)
+
+        if old_path == new_path:
+            continue
+
+        try:
+            if new_path in targets or new_path.exists():
+                raise FileExistsError(f"{new_path.name} ja existe")
+
+            old_path.rename(new_path)
+
+            # label do yolo acompanha a imagem
+            old_label = old_path.with_suffix('.txt')
+            if old_label.exists():
+                old_label.rename(new_path.with_suffix('.txt'))
+
+            targets.add(new_path)
+            renamed.append((old_path, new_path))
+
+            if progress_callback:
+                progress_callback((idx + 1) / len(plan) * 100, f"renomeado: {old_path.name} -> {new_path.name}")
+
+        except Exception as e:
+            errors.append((old_path, str(e)))
+            if progress_callback:
+                progress_callback(None, f"erro ao renomear {old_path.name}: {str(e)}")
+
+    return True, {
+        'renamed': renamed,
+        'errors': errors
+    }
@@ -5,16 +5,17 @@ from tkinter import filedialog, ttk, messagebox
 import threading
 
 
-def find_images_without_labels(folder_path, progress_callback=None):
+def find_images_without_labels(folder_path, progress_callback=None, jpg_files=None):
     """
     verifica todas as imagens .jpg na pasta e retorna aquelas que nao tem arquivo .txt correspondente
+    jpg_files opcional: verifica so essas imagens (modo incremental do ingest_watcher)
     """
     folder = Path(folder_path)
     
     if not folder.exists():
         return [], f"pasta nao encontrada: {folder_path}"
     
-    jpg_files = list(folder.glob("*.jpg"))
+    jpg_files = list(folder.glob("*.jpg")) if jpg_files is None else [Path(f) for f in jpg_files]
     
     if not jpg_files:
         return [], "nenhuma imagem .jpg encontrada na pasta"
@@ -0,0 +1,133 @@
+import json
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+THUMBNAIL_SIZE = 256
+
+
+class CrossingEventAggregator:
+    """
+    transforma o fluxo de deteccoes por frame em eventos de travessia
+    um evento abre na primeira deteccao e fecha depois de gap_seconds sem nenhuma deteccao
+    a memoria e constante: por evento aberto guardamos so contadores e uma miniatura
+    cada evento fechado vira uma linha no arquivo .jsonl
+    """
+
+    def __init__(self, output_path, names, fps, video_name="", gap_seconds=2.0, min_frames=2,
+                 thumbnails_dir=None):
+        self.output_path = Path(output_path)
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.thumbnails_dir = Path(thumbnails_dir) if thumbnails_dir else None
+        if self.thumbnails_dir:
+            self.thumbnails_dir.mkdir(parents=True, exist_ok=True)
+
+        self.names = [names[i] for i in sorted(names)] if isinstance(names, dict) else list(names)
+        self.fps = fps or 30
+        self.video_name = video_name
+        self.gap_seconds = gap_seconds
+        self.min_frames = min_frames
+
+        self.events_written = 0
+        self._file = open(self.output_path, 'w', encoding='utf-8')
+        self._event = None
+
+    def _open(self, timestamp):
+        self._event = {
+            'start': timestamp,
+            'end': timestamp,
+            'frames': 0,
+            'peak_count': 0,
+            'votes': np.zeros(len(self.names), dtype=np.float64),
+            'best_conf': 0.0,
+            'thumbnail': None
+        }
+
+    def update(self, frame_index, frame, detections):
+        timestamp = frame_index / self.fps
+        event = self._event
+
+        if len(detections) == 0:
+            if event is not None and timestamp - event['end'] > self.gap_seconds:
+                self._close()
+            return
+
+        if event is None:
+            self._open(timestamp)
+            event = self._event
+
+        event['end'] = timestamp
+        event['frames'] += 1
+        event['peak_count'] = max(event['peak_count'], len(detections))
+
+        # voto da especie ponderado pela confianca
+        classes = detections[:, 5].astype(np.int64)
+        votes = np.bincount(classes, weights=detections[:, 4], minlength=len(event['votes']))
+        if len(votes) > len(event['votes']):
+            event['votes'] = np.pad(event['votes'], (0, len(votes) - len(event['votes'])))
+        event['votes'][:len(votes)] += votes
+
+        best = int(detections[:, 4].argmax())
+        if detections[best, 4] > event['best_conf']:
+            event['best_conf'] = float(detections[best, 4])
+            event['thumbnail'] = self._thumbnail(frame, detections[best])
+
+    def _thumbnail(self, frame, box):
+        height, width = frame.shape[:2]
+        x1, y1, x2, y2 = box[:4]
+        pad_x, pad_y = (x2 - x1) * 0.25, (y2 - y1) * 0.25
+        x1, y1 = int(max(x1 - pad_x, 0)), int(max(y1 - pad_y, 0))
+        x2, y2 = int(min(x2 + pad_x, width)), int(min(y2 + pad_y, height))
+
+        crop = frame[y1:y2, x1:x2]
+        if crop.size == 0:
+            return None
+
+        scale = THUMBNAIL_SIZE / max(crop.shape[:2])
+        if scale < 1:
+            crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        ok, encoded = cv2.imencode('.jpg', crop, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        return encoded.tobytes() if ok else None
+
+    def _close(self):
+        event = self._event
+        self._event = None
+
+        if event is None or event['frames'] < self.min_frames:
+            return
+
+        votes = event['votes']
+        species = int(votes.argmax())
+        total = votes.sum()
+
+        record = {
+            'event': self.events_written,
+            'video': self.video_name,
+            'start': round(event['start'], 2),
+            'end': round(event['end'], 2),
+            'duration': round(event['end'] - event['start'], 2),
+            'species': self.names[species] if species < len(self.names) else str(species),
+            'species_share': round(float(votes[species] / total), 3) if total else 0.0,
+            'peak_count': event['peak_count'],
+            'frames_with_detections': event['frames'],
+            'best_conf': round(event['best_conf'], 3),
+            'thumbnail': None
+        }
+
+        if self.thumbnails_dir and event['thumbnail']:
+            thumbnail_path = self.thumbnails_dir / f"{Path(self.video_name).stem}_evento{self.events_written:04d}.jpg"
+            thumbnail_path.write_bytes(event['thumbnail'])
+            record['thumbnail'] = str(thumbnail_path)
+
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.events_written += 1
+
+    def close(self):
+        """fecha o evento em aberto (se houver) e o arquivo"""
+        self._close()
+        self._file.close()
+        return self.events_written
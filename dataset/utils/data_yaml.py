@@ -0,0 +1,464 @@
+import argparse
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import tkinter as tk
+from tkinter import filedialog, ttk, messagebox
+import threading
+
+import numpy as np
+import yaml
+
+from image_metadata import IMAGE_EXTENSIONS, NEUTRAL_FOLDERS
+from label_remap import find_label_files, iter_label_files, mapping_by_name, normalize_name, read_label_ids, remap_labels
+
+
+# layouts de split que o ultralytics entende, na ordem de preferencia
+SPLIT_LAYOUTS = [
+    ('images/train', 'images/val'),
+    ('train/images', 'valid/images'),
+    ('train/images', 'val/images'),
+    ('train', 'val'),
+    ('train', 'valid')
+]
+
+
+def load_data_yaml(yaml_path):
+    with open(yaml_path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+    names = data.get('names', [])
+    data['names'] = [names[i] for i in sorted(names)] if isinstance(names, dict) else list(names)
+    return data
+
+
+def scan_label_ids(label_files, workers=None, progress_callback=None):
+    """
+    le todos os labels em paralelo e conta, por id de classe, caixas e arquivos
+    retorna (caixas por id, arquivos por id, erros)
+    """
+    label_files = list(label_files)
+    workers = workers or min(os.cpu_count() or 2, 16)
+    ids_per_file = []
+    errors = []
+
+    def work(path):
+        try:
+            return read_label_ids(path), None
+        except Exception as e:
+            return None, f"{path.name}: {str(e)}"
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for idx, (ids, error) in enumerate(executor.map(work, label_files), 1):
+            if error:
+                errors.append(error)
+            elif len(ids):
+                ids_per_file.append(ids)
+
+            if progress_callback and (idx % 1000 == 0 or idx == len(label_files)):
+                progress_callback(idx / len(label_files) * 100, f"labels lidos: {idx}/{len(label_files)}")
+
+    if not ids_per_file:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), errors
+
+    all_ids = np.concatenate(ids_per_file)
+    negative = int((all_ids < 0).sum())
+    if negative:
+        errors.append(f"{negative} caixas com id de classe negativo")
+
+    boxes = np.bincount(all_ids[all_ids >= 0])
+    files = np.bincount(np.concatenate([np.unique(ids[ids >= 0]) for ids in ids_per_file]), minlength=len(boxes))
+    return boxes, files, errors
+
+
+def class_folders(root):
+    """nomes das pastas que tem imagens e nao sao images/train/val (ex: all-images/<Classe>)"""
+    folders = set()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.') and d != '_quarentena']
+        folder = Path(dirpath)
+        if folder != Path(root) and folder.name.lower() not in NEUTRAL_FOLDERS and \
+                any(name.lower().endswith(IMAGE_EXTENSIONS) for name in filenames):
+            folders.add(folder.name)
+    return sorted(folders)
+
+
+def reconcile(names, nc, boxes, other_lists=None):
+    """
+    compara os nomes do yaml com os ids usados nos labels e com outras listas de classes
+    retorna lista de problemas (texto) e lista de avisos
+    """
+    problems = []
+    warnings = []
+
+    if nc is None:
+        warnings.append(f"nc ausente (names tem {len(names)} nomes)")
+    elif nc != len(names):
+        problems.append(f"nc: {nc} mas names tem {len(names)} nomes")
+
+    normalized = [normalize_name(n) for n in names]
+    duplicated = sorted({n for n in normalized if normalized.count(n) > 1})
+    if duplicated:
+        problems.append(f"nomes repetidos: {', '.join(duplicated)}")
+
+    used = np.flatnonzero(boxes)
+    unnamed = [int(i) for i in used if i >= len(names)]
+    if unnamed:
+        problems.append(
+            "ids usados nos labels sem nome no yaml: " +
+            ", ".join(f"{i} ({int(boxes[i])} caixas)" for i in unnamed)
+        )
+
+    unused = [names[i] for i in range(len(names)) if i >= len(boxes) or boxes[i] == 0]
+    if unused:
+        warnings.append(f"classes sem nenhuma caixa: {', '.join(unused)}")
+
+    known = set(normalized)
+    for source, values in (other_lists or {}).items():
+        missing = [v for v in values if normalize_name(v) not in known]
+        if missing:
+            warnings.append(f"{source} tem classes fora do yaml: {', '.join(missing)}")
+
+    return problems, warnings
+
+
+def find_splits(root):
+    root = Path(root)
+    for train, val in SPLIT_LAYOUTS:
+        if (root / train).is_dir() and (root / val).is_dir():
+            return train, val
+    return None, None
+
+
+def _is_absolute(value):
+    # 'C:\\Users\\...' tambem conta como absoluto quando o yaml e lido no linux
+    value = value.strip()
+    return Path(value).is_absolute() or bool(re.match(r'^[A-Za-z]:[\\/]', value)) or value.startswith('\\')
+
+
+def _portable(value, root):
+    """caminho absoluto dentro da raiz vira relativo; o resto fica como esta"""
+    if not isinstance(value, str):
+        return value
+    path = Path(value.replace('\\', '/').strip())
+    if _is_absolute(value):
+        try:
+            return path.relative_to(root).as_posix()
+        except ValueError:
+            return path.as_posix()
+    return path.as_posix()
+
+
+def build_data_yaml(root, names, current=None):
+    """
+    data.yaml portavel: sem 'path' (o ultralytics usa a pasta do proprio yaml), train/val relativos
+    e nc sempre igual a len(names)
+    """
+    root = Path(root).resolve()
+    current = current or {}
+    train, val = find_splits(root)
+
+    data = {
+        'train': train or _portable(current.get('train'), root),
+        'val': val or _portable(current.get('val'), root)
+    }
+    if current.get('test'):
+        data['test'] = _portable(current['test'], root)
+    data['nc'] = len(names)
+    data['names'] = list(names)
+    return data
+
+
+def write_data_yaml(yaml_path, data):
+    tmp = Path(yaml_path).with_name(Path(yaml_path).name + ".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False, default_flow_style=None)
+    os.replace(tmp, yaml_path)
+
+
+def parse_new_order(text):
+    """
+    uma classe por linha na ordem nova; 'antigo = novo' junta a classe antiga na nova
+    retorna (nomes novos, aliases)
+    """
+    names = []
+    aliases = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if '=' in line:
+            old, new = (part.strip() for part in line.split('=', 1))
+            aliases[old] = new
+            line = new
+        if normalize_name(line) not in {normalize_name(n) for n in names}:
+            names.append(line)
+    return names, aliases
+
+
+def check_dataset(root, yaml_path, progress_callback=None):
+    from video_to_frames import CLASSES
+
+    data = load_data_yaml(yaml_path)
+    label_files = find_label_files(root)
+    boxes, files, errors = scan_label_ids(label_files, progress_callback=progress_callback)
+
+    problems, warnings = reconcile(
+        data['names'], data.get('nc'), boxes,
+        {'video_to_frames.CLASSES': CLASSES, 'pastas de classe': class_folders(root)}
+    )
+
+    if isinstance(data.get('path'), str) and _is_absolute(data['path']):
+        problems.append(f"path absoluto (nao funciona em outra maquina): {data['path']}")
+    if data.get('train') and data.get('train') == data.get('val'):
+        warnings.append("train e val apontam para a mesma pasta (metricas de validacao otimistas)")
+
+    return True, {
+        'names': data['names'],
+        'labels': len(label_files),
+        'boxes': boxes,
+        'files': files,
+        'problems': problems,
+        'warnings': warnings + errors
+    }
+
+
+def reorder_classes(root, yaml_path, new_names, aliases=None, progress_callback=None):
+    """muda a ordem/junta classes: reescreve os ids de todos os labels e depois o data.yaml"""
+    data = load_data_yaml(yaml_path)
+    lut = mapping_by_name(data['names'], new_names, aliases)
+
+    removed = [data['names'][i] for i in np.flatnonzero(lut < 0)]
+    # atomic: com qualquer erro nenhum label muda, entao labels e yaml continuam na ordem antiga
+    success, result = remap_labels(iter_label_files(root), lut, progress_callback=progress_callback, atomic=True)
+    if result['committed']:
+        write_data_yaml(yaml_path, build_data_yaml(Path(yaml_path).parent, new_names, data))
+
+    result['removed_classes'] = removed
+    return success, result
+
+
+def format_report(report):
+    lines = [f"{report['labels']} arquivos de label", "", f"{'id':>3}  {'classe':<20} {'caixas':>8} {'arquivos':>9}"]
+    for i in range(max(len(report['names']), len(report['boxes']))):
+        name = report['names'][i] if i < len(report['names']) else "(sem nome)"
+        boxes = int(report['boxes'][i]) if i < len(report['boxes']) else 0
+        files = int(report['files'][i]) if i < len(report['files']) else 0
+        lines.append(f"{i:>3}  {name:<20} {boxes:>8} {files:>9}")
+
+    lines.append("")
+    lines.extend(f"PROBLEMA: {p}" for p in report['problems'])
+    lines.extend(f"aviso: {w}" for w in report['warnings'])
+    if not report['problems']:
+        lines.append("nenhum problema encontrado")
+    return "\n".join(lines)
+
+
+class DataYamlGUI:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("verificador do data.yaml")
+        self.root.geometry("750x650")
+
+        self.dataset_path = tk.StringVar()
+        self.yaml_path = tk.StringVar()
+        self.is_processing = False
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        ttk.Label(main_frame, text="pasta do dataset:").grid(row=0, column=0, sticky=tk.W, pady=(5, 0))
+        dataset_frame = ttk.Frame(main_frame)
+        dataset_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=5)
+        ttk.Entry(dataset_frame, textvariable=self.dataset_path, width=50).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(dataset_frame, text="procurar", command=self.browse_folder).pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(main_frame, text="data.yaml:").grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
+        yaml_frame = ttk.Frame(main_frame)
+        yaml_frame.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=5)
+        ttk.Entry(yaml_frame, textvariable=self.yaml_path, width=50).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(yaml_frame, text="procurar", command=self.browse_yaml).pack(side=tk.LEFT, padx=5)
+
+        order_frame = ttk.LabelFrame(
+            main_frame, text="ordem das classes (uma por linha; 'antigo = novo' junta classes; apagar a linha remove)",
+            padding="5"
+        )
+        order_frame.grid(row=4, column=0, sticky=(tk.W, tk.E), pady=10)
+        self.order_text = tk.Text(order_frame, height=8, width=70)
+        self.order_text.pack(fill=tk.BOTH, expand=True)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=5, column=0, pady=5)
+        self.check_button = ttk.Button(button_frame, text="verificar", command=lambda: self.start_processing(self.check))
+        self.check_button.pack(side=tk.LEFT, padx=5)
+        self.generate_button = ttk.Button(button_frame, text="gerar data.yaml portavel", command=lambda: self.start_processing(self.generate))
+        self.generate_button.pack(side=tk.LEFT, padx=5)
+        self.reorder_button = ttk.Button(button_frame, text="aplicar nova ordem nos labels", command=self.confirm_reorder)
+        self.reorder_button.pack(side=tk.LEFT, padx=5)
+
+        self.progress = ttk.Progressbar(main_frame, mode='determinate', length=400)
+        self.progress.grid(row=6, column=0, pady=5)
+
+        self.status_label = ttk.Label(main_frame, text="pronto")
+        self.status_label.grid(row=7, column=0, pady=5)
+
+        log_frame = ttk.LabelFrame(main_frame, text="log", padding="5")
+        log_frame.grid(row=8, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+
+        self.log_text = tk.Text(log_frame, height=12, width=70, font=('Courier', 9))
+        self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.log_text.config(yscrollcommand=scrollbar.set)
+
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(8, weight=1)
+
+    def browse_folder(self):
+        folder = filedialog.askdirectory(title="selecionar pasta do dataset")
+        if folder:
+            self.dataset_path.set(folder)
+            if not self.yaml_path.get() and (Path(folder) / "data.yaml").exists():
+                self.set_yaml(str(Path(folder) / "data.yaml"))
+
+    def browse_yaml(self):
+        path = filedialog.askopenfilename(title="selecionar data.yaml", filetypes=[("yaml", "*.yaml"), ("todos", "*.*")])
+        if path:
+            self.set_yaml(path)
+
+    def set_yaml(self, path):
+        self.yaml_path.set(path)
+        try:
+            names = load_data_yaml(path)['names']
+        except Exception as e:
+            messagebox.showerror("erro", f"erro ao ler o yaml:\n{str(e)}")
+            return
+        self.order_text.delete("1.0", tk.END)
+        self.order_text.insert("1.0", "\n".join(names))
+
+    def log_message(self, message):
+        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.see(tk.END)
+        self.root.update_idletasks()
+
+    def update_progress(self, value, status):
+        if value is not None:
+            self.progress['value'] = value
+        self.status_label.config(text=status)
+
+    def set_buttons(self, state):
+        for button in (self.check_button, self.generate_button, self.reorder_button):
+            button.config(state=state)
+
+    def start_processing(self, task):
+        if self.is_processing:
+            messagebox.showwarning("aviso", "processamento ja em andamento")
+            return
+
+        if not self.dataset_path.get() or not Path(self.dataset_path.get()).exists():
+            messagebox.showerror("erro", "selecione a pasta do dataset")
+            return
+
+        if not self.yaml_path.get() or not Path(self.yaml_path.get()).exists():
+            messagebox.showerror("erro", "selecione o data.yaml")
+            return
+
+        self.is_processing = True
+        self.set_buttons('disabled')
+        self.progress['value'] = 0
+
+        thread = threading.Thread(target=self.run_task, args=(task,), daemon=True)
+        thread.start()
+
+    def run_task(self, task):
+        try:
+            task()
+        except Exception as e:
+            self.log_message(f"\nerro durante processamento: {str(e)}")
+            messagebox.showerror("erro", f"erro durante processamento:\n{str(e)}")
+        finally:
+            self.is_processing = False
+            self.set_buttons('normal')
+
+    def check(self):
+        success, report = check_dataset(self.dataset_path.get(), self.yaml_path.get(), self.update_progress)
+        self.log_message(format_report(report))
+
+    def generate(self):
+        current = load_data_yaml(self.yaml_path.get())
+        data = build_data_yaml(Path(self.yaml_path.get()).parent, current['names'], current)
+        write_data_yaml(self.yaml_path.get(), data)
+        self.log_message(f"data.yaml gravado:\n{yaml.safe_dump(data, allow_unicode=True, sort_keys=False)}")
+        if data['train'] == data['val']:
+            self.log_message("aviso: train e val continuam iguais; crie images/train e images/val para separar")
+
+    def confirm_reorder(self):
+        new_names, aliases = parse_new_order(self.order_text.get("1.0", tk.END))
+        if not new_names:
+            messagebox.showerror("erro", "a lista de classes esta vazia")
+            return
+
+        if not messagebox.askyesno(
+            "confirmar",
+            f"reescrever os ids de todos os labels para a nova ordem ({len(new_names)} classes)?\n"
+            "faca backup antes: caixas de classes removidas sao apagadas"
+        ):
+            return
+
+        self.start_processing(lambda: self.reorder(new_names, aliases))
+
+    def reorder(self, new_names, aliases):
+        success, result = reorder_classes(
+            self.dataset_path.get(), self.yaml_path.get(), new_names, aliases, self.update_progress
+        )
+        for path, error in result['errors']:
+            self.log_message(f"erro em {path}: {error}")
+        if result['errors']:
+            self.log_message("nenhum label nem o data.yaml foram alterados por causa dos erros acima")
+        self.log_message(
+            f"labels: {result['files']}, alterados: {result['changed']}, caixas removidas: {result['dropped_boxes']}"
+        )
+        if result['removed_classes']:
+            self.log_message(f"classes removidas: {', '.join(result['removed_classes'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="verifica o data.yaml contra os labels e gera uma versao portavel")
+    parser.add_argument("--dataset", help="pasta do dataset; sem isso abre a interface grafica")
+    parser.add_argument("--yaml", help="data.yaml (padrao: <dataset>/data.yaml)")
+    parser.add_argument("--write", action="store_true", help="regrava o data.yaml portavel")
+    parser.add_argument("--order", help="arquivo com a nova ordem das classes (uma por linha, 'antigo = novo' junta)")
+    args = parser.parse_args()
+
+    if args.dataset:
+        yaml_path = args.yaml or str(Path(args.dataset) / "data.yaml")
+
+        if args.order:
+            new_names, aliases = parse_new_order(Path(args.order).read_text(encoding='utf-8'))
+            success, result = reorder_classes(args.dataset, yaml_path, new_names, aliases)
+            print(f"labels: {result['files']}, alterados: {result['changed']}, caixas removidas: {result['dropped_boxes']}")
+            for path, error in result['errors']:
+                print(f"erro em {path}: {error}")
+
+        success, report = check_dataset(args.dataset, yaml_path)
+        print(format_report(report))
+
+        if args.write:
+            current = load_data_yaml(yaml_path)
+            write_data_yaml(yaml_path, build_data_yaml(Path(yaml_path).parent, current['names'], current))
+            print(f"data.yaml gravado: {yaml_path}")
+        return
+
+    root = tk.Tk()
+    app = DataYamlGUI(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
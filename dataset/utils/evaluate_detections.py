@@ -0,0 +1,564 @@
+from pathlib import Path
+import tkinter as tk
+from tkinter import filedialog, ttk, messagebox
+import threading
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from image_metadata import image_shape
+from threshold_sweep import load_raw_predictions, apply_thresholds, box_iou
+
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+PERIODS = ['dia', 'noite']
+
+
+def period_from_name(name):
+    """extrai o periodo do nome gerado pelo ImageRenamerGUI (classe_periodo_hash.jpg)"""
+    name = Path(name).stem.lower()
+    for period in PERIODS:
+        if f"_{period}_" in name:
+            return period
+    return None
+
+
+def read_image_shape(image_path):
+    """(altura, largura) pelo indice do verify_images.py se houver, senao lendo apenas o cabecalho"""
+    return image_shape(image_path)
+
+
+def read_yolo_label(label_path):
+    """
+    le um .txt no formato yolo (cls cx cy w h [conf]) como array float32 (N, 6)
+    linha a linha: o mesmo arquivo pode misturar linhas com e sem conf (label editado a mao);
+    sem conf a coluna fica 1.0, e linhas com menos de 5 valores sao ignoradas
+    """
+    try:
+        with open(label_path, 'r') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return np.zeros((0, 6), dtype=np.float32)
+
+    rows = []
+    for line in lines:
+        values = line.split()
+        if len(values) >= 6:
+            rows.append(values[:6])
+        elif len(values) == 5:
+            rows.append(values + ['1'])
+
+    return np.array(rows, dtype=np.float32).reshape(-1, 6)
+
+
+def xywhn_to_xyxy(xywhn, height, width):
+    boxes = np.empty_like(xywhn)
+    boxes[:, 0] = (xywhn[:, 0] - xywhn[:, 2] / 2) * width
+    boxes[:, 1] = (xywhn[:, 1] - xywhn[:, 3] / 2) * height
+    boxes[:, 2] = (xywhn[:, 0] + xywhn[:, 2] / 2) * width
+    boxes[:, 3] = (xywhn[:, 1] + xywhn[:, 3] / 2) * height
+    return boxes
+
+
+def _flatten(per_image, with_conf):
+    """junta listas por imagem em arrays planos (image, cls, [conf], boxes)"""
+    counts = np.array([len(a) for a in per_image], dtype=np.int64)
+    stacked = np.concatenate(per_image) if per_image else np.zeros((0, 6 if with_conf else 5), dtype=np.float32)
+
+    flat = {
+        'image': np.repeat(np.arange(len(per_image)), counts),
+        'cls': stacked[:, 0].astype(np.int64),
+        'boxes': stacked[:, 1:5]
+    }
+    if with_conf:
+        flat['conf'] = stacked[:, 5]
+    return flat
+
+
+def load_ground_truth(image_paths, labels_dir, shapes):
+    """
+    carrega todos os labels yolo para arrays planos em pixels
+    imagens sem .txt contam como imagens sem objetos
+    """
+    labels_dir = Path(labels_dir)
+    per_image = []
+
+    for path, (height, width) in zip(image_paths, shapes):
+        label = read_yolo_label(labels_dir / (Path(path).stem + '.txt'))
+        rows = np.zeros((len(label), 5), dtype=np.float32)
+        if len(label):
+            rows[:, 0] = label[:, 0]
+            rows[:, 1:5] = xywhn_to_xyxy(label[:, 1:5], height, width)
+        per_image.append(rows)
+
+    return _flatten(per_image, with_conf=False)
+
+
+def load_predictions_npz(raw, conf=0.001, iou=0.7):
+    """aplica nms nos candidatos salvos pelo threshold_sweep e devolve arrays planos"""
+    boxes = raw['boxes']
+    offsets = raw['offsets']
+    per_image = []
+
+    for i in range(len(raw['paths'])):
+        dets = apply_thresholds(boxes[offsets[i]:offsets[i + 1]], conf, iou)
+        # reordena para (cls, x1, y1, x2, y2, conf)
+        per_image.append(dets[:, [5, 0, 1, 2, 3, 4]])
+
+    return _flatten(per_image, with_conf=True)
+
+
+def load_predictions_txt(image_paths, predictions_dir, shapes):
+    """le predicoes salvas com save_txt=True, save_conf=True (cls cx cy w h conf)"""
+    predictions_dir = Path(predictions_dir)
+    per_image = []
+
+    for path, (height, width) in zip(image_paths, shapes):
+        label = read_yolo_label(predictions_dir / (Path(path).stem + '.txt'))
+        rows = np.zeros((len(label), 6), dtype=np.float32)
+        if len(label):
+            rows[:, 0] = label[:, 0]
+            rows[:, 1:5] = xywhn_to_xyxy(label[:, 1:5], height, width)
+            rows[:, 5] = label[:, 5]
+        per_image.append(rows)
+
+    return _flatten(per_image, with_conf=True)
+
+
+def _image_slices(image_ids, num_images):
+    """inicio/fim de cada imagem num array plano ordenado por imagem"""
+    bounds = np.searchsorted(image_ids, np.arange(num_images + 1))
+    return bounds[:-1], bounds[1:]
+
+
+def match_predictions(gt, preds, num_images, iou_thresholds=IOU_THRESHOLDS):
+    """
+    marca cada predicao como tp/fp para cada limiar de iou (mesma regra do ultralytics)
+    retorna bool (n_preds, n_iou)
+    """
+    tp = np.zeros((len(preds['cls']), len(iou_thresholds)), dtype=bool)
+
+    gt_start, gt_end = _image_slices(gt['image'], num_images)
+    pred_start, pred_end = _image_slices(preds['image'], num_images)
+
+    has_both = np.nonzero((gt_end > gt_start) & (pred_end > pred_start))[0]
+
+    for image in has_both:
+        gs, ge = gt_start[image], gt_end[image]
+        ps, pe = pred_start[image], pred_end[image]
+
+        iou = box_iou(gt['boxes'][gs:ge], preds['boxes'][ps:pe])
+        iou = iou * (gt['cls'][gs:ge, None] == preds['cls'][None, ps:pe])
+
+        for t, threshold in enumerate(iou_thresholds):
+            gt_idx, pred_idx = np.nonzero(iou >= threshold)
+            if len(gt_idx) == 0:
+                continue
+
+            order = np.argsort(-iou[gt_idx, pred_idx], kind='stable')
+            gt_idx, pred_idx = gt_idx[order], pred_idx[order]
+
+            _, first = np.unique(pred_idx, return_index=True)
+            gt_idx, pred_idx = gt_idx[first], pred_idx[first]
+
+            _, first = np.unique(gt_idx, return_index=True)
+            tp[ps + pred_idx[first], t] = True
+
+    return tp
+
+
+def average_precision(recall, precision):
+    """ap com interpolacao de 101 pontos (coco) sobre o envelope de precisao"""
+    if len(recall) == 0:
+        return 0.0
+
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+
+    # o sentinela final so serve para o envelope: amostrar nele faria o ponto recall=1.0
+    # valer 0 ate para um detector perfeito; acima do recall maximo a precisao e 0
+    mrec, mpre = mrec[:-1], mpre[:-1]
+    x = np.linspace(0, 1, 101)
+    sampled = np.interp(x, mrec, mpre)
+    sampled[x > mrec[-1]] = 0.0
+    return float(np.mean(sampled))
+
+
+def _class_metrics(cls, tp, conf, pred_cls, n_gt, conf_grid):
+    mask = pred_cls == cls
+    order = np.argsort(-conf[mask], kind='stable')
+    tp_c = tp[mask][order]
+    conf_c = conf[mask][order]
+
+    n_iou = tp.shape[1]
+    if n_gt == 0 or len(conf_c) == 0:
+        return {
+            'ap': np.zeros(n_iou),
+            'precision_curve': np.zeros(len(conf_grid)),
+            'recall_curve': np.zeros(len(conf_grid))
+        }
+
+    tpc = np.cumsum(tp_c, axis=0)
+    fpc = np.cumsum(~tp_c, axis=0)
+    recall = tpc / n_gt
+    precision = tpc / (tpc + fpc)
+
+    ap = np.array([average_precision(recall[:, t], precision[:, t]) for t in range(n_iou)])
+
+    # curvas em funcao do conf (iou 0.5), conf decrescente -> interp precisa de x crescente
+    precision_curve = np.interp(-conf_grid, -conf_c, precision[:, 0], left=1)
+    recall_curve = np.interp(-conf_grid, -conf_c, recall[:, 0], left=0)
+
+    return {'ap': ap, 'precision_curve': precision_curve, 'recall_curve': recall_curve}
+
+
+def ap_per_class(tp, conf, pred_cls, target_cls, num_classes, workers=4):
+    """
+    ap por classe para todos os limiares de iou, calculado em paralelo entre classes
+    p/r sao reportados no conf que maximiza o f1 medio
+    """
+    conf_grid = np.linspace(0, 1, 1000)
+    n_gt = np.bincount(target_cls, minlength=num_classes)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        per_class = list(executor.map(
+            lambda c: _class_metrics(c, tp, conf, pred_cls, n_gt[c], conf_grid),
+            range(num_classes)
+        ))
+
+    ap = np.stack([m['ap'] for m in per_class])
+    p_curve = np.stack([m['precision_curve'] for m in per_class])
+    r_curve = np.stack([m['recall_curve'] for m in per_class])
+    f1_curve = 2 * p_curve * r_curve / np.maximum(p_curve + r_curve, 1e-16)
+
+    present = n_gt > 0
+    best = int(f1_curve[present].mean(0).argmax()) if present.any() else 0
+
+    return {
+        'ap': ap,
+        'precision': p_curve[:, best],
+        'recall': r_curve[:, best],
+        'best_conf': float(conf_grid[best]),
+        'n_gt': n_gt,
+        'present': present
+    }
+
+
+def confusion_matrix(gt, preds, num_images, num_classes, conf=0.25, iou_threshold=0.45):
+    """
+    matriz (nc + 1, nc + 1): linhas = predito, colunas = verdadeiro
+    o ultimo indice e o fundo (fp sem gt / gt nao detectado)
+    """
+    matrix = np.zeros((num_classes + 1, num_classes + 1), dtype=np.int64)
+    background = num_classes
+
+    keep = preds['conf'] >= conf
+    p_image, p_cls, p_boxes = preds['image'][keep], preds['cls'][keep], preds['boxes'][keep]
+
+    gt_start, gt_end = _image_slices(gt['image'], num_images)
+    pred_start, pred_end = _image_slices(p_image, num_images)
+
+    for image in range(num_images):
+        gs, ge = gt_start[image], gt_end[image]
+        ps, pe = pred_start[image], pred_end[image]
+        g_cls = gt['cls'][gs:ge]
+        d_cls = p_cls[ps:pe]
+
+        if ge == gs:
+            np.add.at(matrix, (d_cls, background), 1)
+            continue
+        if pe == ps:
+            np.add.at(matrix, (background, g_cls), 1)
+            continue
+
+        iou = box_iou(gt['boxes'][gs:ge], p_boxes[ps:pe])
+        gt_idx, pred_idx = np.nonzero(iou > iou_threshold)
+
+        if len(gt_idx):
+            order = np.argsort(-iou[gt_idx, pred_idx], kind='stable')
+            gt_idx, pred_idx = gt_idx[order], pred_idx[order]
+            _, first = np.unique(pred_idx, return_index=True)
+            gt_idx, pred_idx = gt_idx[first], pred_idx[first]
+            _, first = np.unique(gt_idx, return_index=True)
+            gt_idx, pred_idx = gt_idx[first], pred_idx[first]
+
+        np.add.at(matrix, (d_cls[pred_idx], g_cls[gt_idx]), 1)
+
+        unmatched_gt = np.ones(len(g_cls), dtype=bool)
+        unmatched_gt[gt_idx] = False
+        np.add.at(matrix, (background, g_cls[unmatched_gt]), 1)
+
+        unmatched_pred = np.ones(len(d_cls), dtype=bool)
+        unmatched_pred[pred_idx] = False
+        np.add.at(matrix, (d_cls[unmatched_pred], background), 1)
+
+    return matrix
+
+
+def _subset(flat, image_mask):
+    keep = image_mask[flat['image']]
+    return {key: value[keep] for key, value in flat.items()}
+
+
+def summarize(gt, preds, tp, num_classes, class_names, workers=4):
+    stats = ap_per_class(tp, preds['conf'], preds['cls'], gt['cls'], num_classes, workers)
+    present = stats['present']
+    ap = stats['ap']
+
+    per_class = {}
+    for c in np.nonzero(present)[0]:
+        per_class[class_names[c]] = {
+            'instances': int(stats['n_gt'][c]),
+            'precision': round(float(stats['precision'][c]), 4),
+            'recall': round(float(stats['recall'][c]), 4),
+            'map50': round(float(ap[c, 0]), 4),
+            'map50_95': round(float(ap[c].mean()), 4)
+        }
+
+    return {
+        'instances': int(len(gt['cls'])),
+        'predictions': int(len(preds['cls'])),
+        'best_conf': round(stats['best_conf'], 4),
+        'precision': round(float(stats['precision'][present].mean()), 4) if present.any() else 0.0,
+        'recall': round(float(stats['recall'][present].mean()), 4) if present.any() else 0.0,
+        'map50': round(float(ap[present, 0].mean()), 4) if present.any() else 0.0,
+        'map50_95': round(float(ap[present].mean()), 4) if present.any() else 0.0,
+        'per_class': per_class
+    }
+
+
+def evaluate(image_paths, gt, preds, class_names, workers=4, progress_callback=None):
+    """
+    avaliacao completa: map geral, por classe, matriz de confusao e recorte dia/noite
+    gt e preds devem ser arrays planos ordenados por imagem (load_ground_truth / load_predictions_*)
+    """
+    start_time = time.perf_counter()
+    num_images = len(image_paths)
+    num_classes = max(
+        len(class_names),
+        int(gt['cls'].max()) + 1 if len(gt['cls']) else 0,
+        int(preds['cls'].max()) + 1 if len(preds['cls']) else 0
+    )
+    class_names = list(class_names) + [str(c) for c in range(len(class_names), num_classes)]
+
+    if progress_callback:
+        progress_callback(10, "calculando matrizes de iou...")
+
+    tp = match_predictions(gt, preds, num_images)
+
+    if progress_callback:
+        progress_callback(50, "calculando ap por classe...")
+
+    report = {'images': num_images, 'all': summarize(gt, preds, tp, num_classes, class_names, workers)}
+
+    periods = np.array([period_from_name(p) for p in image_paths], dtype=object)
+    report['periods'] = {}
+
+    for period in PERIODS:
+        mask = periods == period
+        if not mask.any():
+            continue
+
+        pred_mask = mask[preds['image']]
+        report['periods'][period] = summarize(
+            _subset(gt, mask), _subset(preds, mask), tp[pred_mask], num_classes, class_names, workers
+        )
+        report['periods'][period]['images'] = int(mask.sum())
+
+    if progress_callback:
+        progress_callback(80, "montando matriz de confusao...")
+
+    report['confusion_matrix'] = {
+        'labels': class_names + ['fundo'],
+        'matrix': confusion_matrix(gt, preds, num_images, num_classes).tolist()
+    }
+    report['elapsed'] = round(time.perf_counter() - start_time, 3)
+
+    return report
+
+
+class EvaluationGUI:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("avaliacao de deteccoes - map / precisao / recall")
+        self.root.geometry("850x650")
+
+        self.images_path = tk.StringVar()
+        self.labels_path = tk.StringVar()
+        self.predictions_path = tk.StringVar(value="runs/sweep/raw_predictions.npz")
+        self.iou_var = tk.DoubleVar(value=0.7)
+        self.is_processing = False
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        paths_frame = ttk.LabelFrame(main_frame, text="entradas", padding="10")
+        paths_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=5)
+
+        ttk.Label(paths_frame, text="pasta de imagens:").grid(row=0, column=0, sticky=tk.W)
+        ttk.Entry(paths_frame, textvariable=self.images_path, width=55).grid(row=0, column=1, sticky=(tk.W, tk.E))
+        ttk.Button(paths_frame, text="procurar", command=lambda: self.browse_dir(self.images_path)).grid(row=0, column=2, padx=5)
+
+        ttk.Label(paths_frame, text="pasta de labels (gt):").grid(row=1, column=0, sticky=tk.W)
+        ttk.Entry(paths_frame, textvariable=self.labels_path, width=55).grid(row=1, column=1, sticky=(tk.W, tk.E))
+        ttk.Button(paths_frame, text="procurar", command=lambda: self.browse_dir(self.labels_path)).grid(row=1, column=2, padx=5)
+
+        ttk.Label(paths_frame, text="predicoes (.npz ou pasta .txt):").grid(row=2, column=0, sticky=tk.W)
+        ttk.Entry(paths_frame, textvariable=self.predictions_path, width=55).grid(row=2, column=1, sticky=(tk.W, tk.E))
+        ttk.Button(paths_frame, text="procurar", command=self.browse_predictions).grid(row=2, column=2, padx=5)
+
+        ttk.Label(paths_frame, text="iou do nms (so para .npz):").grid(row=3, column=0, sticky=tk.W)
+        ttk.Spinbox(paths_frame, from_=0.1, to=0.95, increment=0.05, textvariable=self.iou_var, width=8).grid(row=3, column=1, sticky=tk.W)
+
+        info_frame = ttk.LabelFrame(main_frame, text="o que o script faz:", padding="10")
+        info_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=5)
+
+        ttk.Label(info_frame, text="1. carrega labels yolo e predicoes em arrays numpy").pack(anchor=tk.W)
+        ttk.Label(info_frame, text="2. calcula map50, map50-95, precisao e recall por classe").pack(anchor=tk.W)
+        ttk.Label(info_frame, text="3. separa o resultado por periodo (_dia_ / _noite_ no nome do arquivo)").pack(anchor=tk.W)
+        ttk.Label(info_frame, text="4. salva o relatorio completo (com matriz de confusao) em evaluation.json").pack(anchor=tk.W)
+
+        self.process_button = ttk.Button(main_frame, text="avaliar", command=self.start_processing)
+        self.process_button.grid(row=2, column=0, pady=10)
+
+        self.progress_bar = ttk.Progressbar(main_frame, mode='determinate', length=400)
+        self.progress_bar.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=5)
+
+        self.status_label = ttk.Label(main_frame, text="aguardando...", foreground="blue")
+        self.status_label.grid(row=4, column=0, sticky=tk.W, pady=5)
+
+        log_frame = ttk.LabelFrame(main_frame, text="log", padding="5")
+        log_frame.grid(row=5, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+
+        self.log_text = tk.Text(log_frame, height=14, width=95)
+        self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.log_text.config(yscrollcommand=scrollbar.set)
+
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(5, weight=1)
+
+    def browse_dir(self, variable):
+        folder = filedialog.askdirectory(title="selecionar pasta")
+        if folder:
+            variable.set(folder)
+
+    def browse_predictions(self):
+        file_path = filedialog.askopenfilename(
+            title="selecionar predicoes",
+            filetypes=[("candidatos", "*.npz"), ("todos os arquivos", "*.*")]
+        )
+        if file_path:
+            self.predictions_path.set(file_path)
+
+    def log_message(self, message):
+        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.see(tk.END)
+        self.root.update_idletasks()
+
+    def update_progress(self, value, status):
+        if value is not None:
+            self.progress_bar['value'] = value
+        if status:
+            self.status_label.config(text=status)
+        self.root.update_idletasks()
+
+    def start_processing(self):
+        if self.is_processing:
+            messagebox.showwarning("aviso", "processamento ja em andamento")
+            return
+
+        if not self.labels_path.get() or not self.predictions_path.get():
+            messagebox.showerror("erro", "selecione os labels e as predicoes")
+            return
+
+        self.is_processing = True
+        self.process_button.config(state='disabled')
+        self.progress_bar['value'] = 0
+        self.log_text.delete(1.0, tk.END)
+
+        thread = threading.Thread(target=self.process, daemon=True)
+        thread.start()
+
+    def log_summary(self, title, summary):
+        self.log_message(f"\n{title}")
+        self.log_message(
+            f"  p: {summary['precision']:.3f} | r: {summary['recall']:.3f} | "
+            f"map50: {summary['map50']:.3f} | map50-95: {summary['map50_95']:.3f}"
+        )
+        for name, metrics in summary['per_class'].items():
+            self.log_message(
+                f"  {name:<20} n={metrics['instances']:<6} map50: {metrics['map50']:.3f} "
+                f"map50-95: {metrics['map50_95']:.3f}"
+            )
+
+    def process(self):
+        try:
+            predictions_path = Path(self.predictions_path.get())
+            self.update_progress(0, "carregando predicoes e labels...")
+
+            if predictions_path.suffix == '.npz':
+                raw = load_raw_predictions(predictions_path)
+                image_paths = raw['paths']
+                class_names = raw['class_names']
+                shapes = raw['shapes']
+                if shapes is None:
+                    shapes = [read_image_shape(p) for p in image_paths]
+                preds = load_predictions_npz(raw, iou=self.iou_var.get())
+            else:
+                if not self.images_path.get():
+                    messagebox.showerror("erro", "selecione a pasta de imagens")
+                    return
+                image_paths = sorted(str(p) for p in Path(self.images_path.get()).glob("*.jpg"))
+                class_names = []
+                shapes = [read_image_shape(p) for p in image_paths]
+                preds = load_predictions_txt(image_paths, predictions_path, shapes)
+
+            if not image_paths:
+                messagebox.showerror("erro", "nenhuma imagem para avaliar")
+                return
+
+            gt = load_ground_truth(image_paths, self.labels_path.get(), shapes)
+
+            report = evaluate(image_paths, gt, preds, class_names, progress_callback=self.update_progress)
+
+            self.log_message(f"imagens: {report['images']} | objetos: {report['all']['instances']} | "
+                             f"tempo: {report['elapsed']:.2f}s")
+            self.log_summary("geral", report['all'])
+            for period, summary in report['periods'].items():
+                self.log_summary(f"{period} ({summary['images']} imagens)", summary)
+
+            output = predictions_path.parent / "evaluation.json"
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+            self.log_message(f"\nrelatorio salvo em: {output}")
+            self.update_progress(100, "concluido com sucesso")
+
+        except Exception as e:
+            self.log_message(f"\nerro durante processamento: {str(e)}")
+            messagebox.showerror("erro", f"erro durante processamento:\n{str(e)}")
+
+        finally:
+            self.is_processing = False
+            self.process_button.config(state='normal')
+
+
+def main():
+    root = tk.Tk()
+    app = EvaluationGUI(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import os
+import sys
+import threading
+import time
+
+
+# intervalo minimo entre avisos de progresso: com milhoes de arquivos o tk nao aguenta um aviso por arquivo
+REPORT_INTERVAL = 0.1
+
+
+class FileEntry:
+    """
+    um arquivo achado na varredura: so strings (sem Path) e stem internado,
+    que e compartilhado entre o .jpg e o .txt do mesmo par
+    """
+    __slots__ = ('dir', 'name', 'stem', 'ext')
+
+    def __init__(self, dir, name):
+        self.dir = dir
+        self.name = name
+        stem, ext = os.path.splitext(name)
+        self.stem = sys.intern(stem)
+        self.ext = ext.lower()
+
+    @property
+    def path(self):
+        return os.path.join(self.dir, self.name)
+
+
+def _walk(folder, recursive=False, skip=()):
+    """gera (pasta, nome) de cada arquivo conforme o os.scandir le, sem montar lista"""
+    skip = {os.path.normcase(os.path.abspath(p)) for p in skip}
+    stack = [os.fspath(folder)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if not is_dir:
+                        yield current, entry.name
+                    elif recursive and os.path.normcase(os.path.abspath(entry.path)) not in skip:
+                        stack.append(entry.path)
+        except OSError:
+            continue
+
+
+def iter_files(folder, extensions, recursive=False, skip=()):
+    """
+    arquivos com as extensoes pedidas (minusculas, com ponto), um FileEntry por vez
+    skip: pastas que nao devem ser varridas (ex: a saida do merge dentro de uma origem)
+    """
+    extensions = tuple(extensions)
+    for current, name in _walk(folder, recursive, skip):
+        if name.lower().endswith(extensions):
+            yield FileEntry(current, name)
+
+
+def iter_names(folder, extensions, recursive=False, skip=()):
+    """so os nomes, sem FileEntry: usado pela contagem do ProgressEstimate"""
+    extensions = tuple(extensions)
+    return (name for _, name in _walk(folder, recursive, skip) if name.lower().endswith(extensions))
+
+
+def has_files(folder, extensions):
+    """para na primeira ocorrencia, sem listar a pasta toda"""
+    return next(iter_files(folder, extensions), None) is not None
+
+
+class ProgressEstimate:
+    """
+    total estimado enquanto o processamento ja anda: uma thread so conta os nomes
+    (bem mais rapido que mover/copiar) e o total vai crescendo ate a contagem terminar
+    """
+    __slots__ = ('done', 'total', 'counting', '_last')
+
+    def __init__(self, counter=None, total=None):
+        self.done = 0
+        self.total = total or 0
+        self.counting = total is None and counter is not None
+        self._last = 0.0
+        if self.counting:
+            threading.Thread(target=self._count, args=(counter,), daemon=True).start()
+
+    def _count(self, counter):
+        total = 0
+        for _ in counter:
+            if not self.counting:
+                return
+            total += 1
+            if total % 1000 == 0:
+                self.total = total
+        self.total = total
+        self.counting = False
+
+    def step(self, n=1):
+        self.done += n
+
+    def stop(self):
+        self.counting = False
+
+    def percent(self):
+        total = max(self.total, self.done)
+        if not total:
+            return None
+        value = self.done / total * 100
+        # enquanto conta o total ainda pode crescer: nao chega a 100
+        return min(value, 99.0) if self.counting else value
+
+    def label(self):
+        total = max(self.total, self.done)
+        return f"{self.done}/~{total}" if self.counting else f"{self.done}/{total}"
+
+    def due(self):
+        """True se ja passou o intervalo desde o ultimo aviso"""
+        now = time.monotonic()
+        if now - self._last < REPORT_INTERVAL:
+            return False
+        self._last = now
+        return True
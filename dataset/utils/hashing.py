@@ -0,0 +1,43 @@
+import hashlib
+import os
+
+import numpy as np
+
+
+# digests de conteudo usados pelos nomes (naming), pelo indice de metadados e pelo cache de inferencia;
+# modulo proprio para quem so precisa do hash nao carregar opencv/sqlite junto
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """calcula o digest (blake2b 128 bits) do conteudo de um arquivo"""
+    hash_obj = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hash_obj.update(chunk)
+    return hash_obj.hexdigest()
+
+
+def sampled_digest(path, chunk_size=1 << 20):
+    """
+    digest de arquivos grandes (videos) sem ler tudo: tamanho + inicio, meio e fim
+    arquivos ate 3 chunks sao lidos inteiros
+    """
+    size = os.path.getsize(path)
+    if size <= 3 * chunk_size:
+        return file_digest(path)
+
+    hash_obj = hashlib.blake2b(digest_size=16)
+    hash_obj.update(str(size).encode())
+    with open(path, 'rb') as f:
+        for offset in (0, size // 2 - chunk_size // 2, size - chunk_size):
+            f.seek(offset)
+            hash_obj.update(f.read(chunk_size))
+    return hash_obj.hexdigest()
+
+
+def array_digest(array):
+    """calcula o digest dos pixels de um frame ja decodificado (ex: frame de video)"""
+    hash_obj = hashlib.blake2b(digest_size=16)
+    hash_obj.update(str(array.shape).encode())
+    hash_obj.update(np.ascontiguousarray(array).data)
+    return hash_obj.hexdigest()
@@ -0,0 +1,461 @@
+import argparse
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from hashing import file_digest
+
+
+INDEX_FILE = ".image_index.npz"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+QUARANTINE_DIR = "_quarentena"
+
+STATUS_UNCHECKED = -1
+STATUS_OK = 0
+STATUS_BAD_HEADER = 1
+STATUS_TRUNCATED = 2
+STATUS_DECODE_ERROR = 3
+STATUS_UNREADABLE = 4
+
+STATUS_NAMES = {
+    STATUS_UNCHECKED: "nao verificada",
+    STATUS_OK: "ok",
+    STATUS_BAD_HEADER: "cabecalho invalido",
+    STATUS_TRUNCATED: "arquivo truncado",
+    STATUS_DECODE_ERROR: "erro ao decodificar",
+    STATUS_UNREADABLE: "erro de leitura"
+}
+
+PERIODS = ['dia', 'noite']
+
+# frames do video_to_frames: <id do video>.<numero do frame>.jpg dentro de <saida>/<Classe>/
+FRAME_NAME_PATTERN = re.compile(r'^(?P<video>[0-9a-f]+)\.(?P<frame>\d+)$')
+# fotos do renomeador: classe_periodo_id.jpg
+RENAMED_NAME_PATTERN = re.compile(r'^(?P<class>.+)_(?P<period>dia|noite)_(?P<id>[0-9a-f]+)$')
+# pastas que nao dizem nada sobre a classe
+NEUTRAL_FOLDERS = {'images', 'labels', 'train', 'val', 'valid', 'test'}
+
+# uma linha por imagem; textos repetidos (video, classe) viram codigos inteiros com o vocabulario
+# salvo a parte, e os caminhos (relativos a raiz) ficam num bloco de texto separado
+META_DTYPE = np.dtype([
+    ('size', 'i8'),
+    ('mtime_ns', 'i8'),
+    ('width', 'i4'),
+    ('height', 'i4'),
+    ('channels', 'i1'),
+    ('status', 'i1'),
+    ('decoded', '?'),
+    ('video', 'i4'),
+    ('frame', 'i4'),
+    ('class', 'i2'),
+    ('period', 'i1'),
+    ('label_mtime_ns', 'i8'),
+    ('label_count', 'i4'),
+    ('label_mask', 'u8'),
+    ('digest', 'S32')
+])
+
+# valor das colunas numa linha nova, antes de qualquer informacao
+# label_count -1 = sem .txt (0 = .txt vazio, imagem negativa)
+DEFAULTS = {
+    'status': STATUS_UNCHECKED,
+    'video': -1,
+    'frame': -1,
+    'class': -1,
+    'period': -1,
+    'label_mtime_ns': -1,
+    'label_count': -1
+}
+
+CATEGORY_FIELDS = ('video', 'class')
+
+
+def normalize_class(name):
+    """mesma forma usada pelo renomeador nos nomes dos arquivos (minusculas, espaco vira _)"""
+    return str(name).lower().replace(" ", "_")
+
+
+def find_images(folder):
+    """imagens da pasta e subpastas, sem a quarentena e sem pastas ocultas (.checkpoints, caches)"""
+    folder = Path(folder)
+    images = []
+
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.') and d != QUARANTINE_DIR)
+        for name in sorted(filenames):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                images.append(Path(dirpath) / name)
+
+    return images
+
+
+def label_for(image_path):
+    """label yolo ao lado da imagem ou na pasta labels/ irma de images/"""
+    same_folder = image_path.with_suffix('.txt')
+    if same_folder.exists():
+        return same_folder
+
+    if image_path.parent.name == 'images':
+        sibling = image_path.parent.parent / 'labels' / f"{image_path.stem}.txt"
+        if sibling.exists():
+            return sibling
+
+    return None
+
+
+def parse_name(image_path):
+    """(video, frame, classe, periodo) a partir do nome e da pasta; o que nao der para saber fica None"""
+    stem = image_path.stem
+    video, frame, class_name, period = None, None, None, None
+
+    match = FRAME_NAME_PATTERN.match(stem)
+    if match:
+        video, frame = match.group('video'), int(match.group('frame'))
+
+    match = RENAMED_NAME_PATTERN.match(stem)
+    if match:
+        class_name, period = match.group('class'), match.group('period')
+    elif image_path.parent.name.lower() not in NEUTRAL_FOLDERS:
+        class_name = normalize_class(image_path.parent.name)
+
+    return video, frame, class_name, period
+
+
+def read_label(label_path):
+    """(numero de caixas, mascara de bits com os ids de classe presentes)"""
+    count = 0
+    mask = 0
+    with open(label_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            count += 1
+            cls = int(float(parts[0]))
+            if 0 <= cls < 64:
+                mask |= 1 << cls
+    return count, mask
+
+
+def header_shape(path):
+    """largura/altura/canais lendo so o cabecalho (o PIL nao decodifica os pixels aqui)"""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            return {'width': img.size[0], 'height': img.size[1], 'channels': len(img.getbands())}
+    except Exception:
+        return {'width': 0, 'height': 0, 'channels': 0}
+
+
+class ImageIndex:
+    """
+    indice colunar das imagens de uma pasta, salvo em <raiz>/.image_index.npz
+    cada coluna e um array numpy, entao filtros do tipo "tatu a noite sem label" sao operacoes vetoriais
+    uma linha so vale enquanto tamanho e mtime do arquivo continuam os mesmos
+    """
+
+    def __init__(self, root):
+        self.root = Path(root).resolve()
+        self.index_path = self.root / INDEX_FILE
+        self.paths = []
+        self.data = self._new_rows(0)
+        self.vocab = {field: [] for field in CATEGORY_FIELDS}
+        self._codes = {field: {} for field in CATEGORY_FIELDS}
+        self._rows = {}
+
+        if self.index_path.exists():
+            self._load()
+
+    @staticmethod
+    def _new_rows(count):
+        rows = np.zeros(count, dtype=META_DTYPE)
+        for name, value in DEFAULTS.items():
+            rows[name] = value
+        return rows
+
+    @staticmethod
+    def _pack(strings):
+        return np.frombuffer('\n'.join(strings).encode('utf-8'), dtype=np.uint8)
+
+    @staticmethod
+    def _unpack(blob):
+        text = blob.tobytes().decode('utf-8')
+        return text.split('\n') if text else []
+
+    def _load(self):
+        with np.load(self.index_path) as archive:
+            self.paths = self._unpack(archive['paths'])
+            data = archive['data']
+            for field in CATEGORY_FIELDS:
+                key = f"vocab_{field}"
+                self.vocab[field] = self._unpack(archive[key]) if key in archive.files else []
+
+        # colunas que nao existiam na versao que gravou o arquivo entram com o valor padrao
+        self.data = self._new_rows(len(data))
+        for name in data.dtype.names:
+            if name in META_DTYPE.names:
+                self.data[name] = data[name]
+
+        self._codes = {field: {v: i for i, v in enumerate(self.vocab[field])} for field in CATEGORY_FIELDS}
+        self._rows = {path: i for i, path in enumerate(self.paths)}
+
+    def save(self):
+        arrays = {'paths': self._pack(self.paths), 'data': self.data}
+        for field in CATEGORY_FIELDS:
+            arrays[f"vocab_{field}"] = self._pack(self.vocab[field])
+
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, self.index_path)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def key(self, path):
+        path = Path(path)
+        if not path.is_absolute():
+            path = self.root / path
+        return path.resolve().relative_to(self.root).as_posix()
+
+    def code(self, field, value, create=False):
+        """codigo inteiro de um texto de coluna categorica; -1 para None, None se o texto nao existir"""
+        if value is None:
+            return -1
+        codes = self._codes[field]
+        if value not in codes and create:
+            codes[value] = len(self.vocab[field])
+            self.vocab[field].append(value)
+        return codes.get(value)
+
+    def get(self, path, stat=None):
+        """linha do indice se ela ainda corresponde ao arquivo no disco, senao None"""
+        row = self._rows.get(self.key(path))
+        if row is None:
+            return None
+
+        stat = stat or os.stat(path if Path(path).is_absolute() else self.root / path)
+        record = self.data[row]
+        if record['size'] != stat.st_size or record['mtime_ns'] != stat.st_mtime_ns:
+            return None
+        return record
+
+    def update(self, records):
+        """records: lista de (caminho, dict com colunas); insere ou substitui; video/classe podem vir como texto"""
+        new_rows = []
+        for path, values in records:
+            for field in CATEGORY_FIELDS:
+                if field in values and not isinstance(values[field], (int, np.integer)):
+                    values = dict(values, **{field: self.code(field, values[field], create=True)})
+
+            key = self.key(path)
+            row = self._rows.get(key)
+            if row is None:
+                row = len(self.paths) + len(new_rows)
+                self._rows[key] = row
+                new_rows.append((key, values))
+            else:
+                for name, value in values.items():
+                    self.data[name][row] = value
+
+        if new_rows:
+            extra = self._new_rows(len(new_rows))
+            for i, (key, values) in enumerate(new_rows):
+                self.paths.append(key)
+                for name, value in values.items():
+                    extra[name][i] = value
+            self.data = np.concatenate([self.data, extra])
+
+    def remove(self, paths):
+        drop = [self._rows[k] for k in (self.key(p) for p in paths) if k in self._rows]
+        if not drop:
+            return
+        keep = np.ones(len(self.paths), dtype=bool)
+        keep[drop] = False
+        self.paths = [p for p, k in zip(self.paths, keep) if k]
+        self.data = self.data[keep]
+        self._rows = {path: i for i, path in enumerate(self.paths)}
+
+    def refresh(self, workers=None, progress_callback=None):
+        """
+        sincroniza o indice com a pasta: imagens novas ou alteradas (ou com o label alterado) sao lidas de novo,
+        apagadas saem do indice e o resto nao e nem aberto
+        """
+        images = find_images(self.root)
+        present = {self.key(p) for p in images}
+        removed = [p for p in self.paths if p not in present]
+        self.remove(removed)
+
+        def describe(path):
+            stat = path.stat()
+            label = label_for(path)
+            label_mtime = label.stat().st_mtime_ns if label else -1
+
+            record = self.get(path, stat)
+            if record is not None and record['digest'] and record['label_mtime_ns'] == label_mtime:
+                return None
+
+            values = {'label_mtime_ns': label_mtime, 'label_count': -1, 'label_mask': 0}
+            if label:
+                values['label_count'], values['label_mask'] = read_label(label)
+
+            if record is None or not record['digest']:
+                video, frame, class_name, period = parse_name(path)
+                values.update({
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'video': video,
+                    'frame': -1 if frame is None else frame,
+                    'class': class_name,
+                    'period': -1 if period is None else PERIODS.index(period),
+                    'digest': file_digest(path)
+                })
+
+            # imagem nova ou alterada: dimensoes e verificacao antigas nao valem mais
+            if record is None:
+                values.update(header_shape(path), status=STATUS_UNCHECKED, decoded=False)
+
+            return path, values
+
+        changed = []
+        workers = workers or min(os.cpu_count() or 2, 8)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for i, result in enumerate(executor.map(describe, images), 1):
+                if result is not None:
+                    changed.append(result)
+                if progress_callback and i % 1000 == 0:
+                    progress_callback(i / len(images) * 100, f"indexando: {i}/{len(images)}")
+
+        self.update(changed)
+        return {'total': len(images), 'updated': len(changed), 'removed': len(removed)}
+
+    def mask(self, class_name=None, period=None, video=None, labeled=None, empty=None,
+             label_class=None, status=None, bad=None):
+        """
+        filtro vetorial sobre as colunas; todos os criterios passados precisam valer
+        labeled: tem .txt; empty: .txt sem caixas; label_class: id presente no .txt; bad: falhou na verificacao
+        """
+        data = self.data
+        selected = np.ones(len(data), dtype=bool)
+
+        if class_name is not None:
+            code = self.code('class', normalize_class(class_name))
+            selected &= (data['class'] == code) if code is not None else False
+        if video is not None:
+            code = self.code('video', video)
+            selected &= (data['video'] == code) if code is not None else False
+        if period is not None:
+            selected &= data['period'] == PERIODS.index(period)
+        if labeled is not None:
+            selected &= (data['label_count'] >= 0) == labeled
+        if empty is not None:
+            selected &= (data['label_count'] == 0) == empty
+        if label_class is not None:
+            selected &= ((data['label_mask'] >> np.uint64(label_class)) & np.uint64(1)).astype(bool)
+        if status is not None:
+            selected &= data['status'] == status
+        if bad is not None:
+            selected &= (data['status'] > STATUS_OK) == bad
+
+        return selected
+
+    def select(self, mask=None, **filters):
+        """caminhos absolutos das linhas selecionadas (pela mascara ou pelos mesmos filtros de mask)"""
+        if mask is None:
+            mask = self.mask(**filters)
+        return [self.root / self.paths[i] for i in np.flatnonzero(mask)]
+
+    def column(self, field, mask=None):
+        """coluna de uma vez; video/classe voltam como texto (None onde nao se sabe)"""
+        values = self.data[field] if mask is None else self.data[field][mask]
+        if field in CATEGORY_FIELDS:
+            return np.array(self.vocab[field] + [None], dtype=object)[values]
+        return values
+
+    def summary(self):
+        """{(classe, periodo): (imagens, com caixas, negativas)}"""
+        classes = self.column('class')
+        periods = np.array(PERIODS + [None], dtype=object)[self.data['period']]
+        counts = self.data['label_count']
+
+        result = {}
+        for key in sorted(set(zip(classes, periods)), key=lambda k: (str(k[0]), str(k[1]))):
+            selected = (classes == key[0]) & (periods == key[1])
+            result[key] = (int(selected.sum()), int((counts[selected] > 0).sum()), int((counts[selected] == 0).sum()))
+        return result
+
+
+_open_indexes = {}
+
+
+def find_index(path):
+    """procura o .image_index.npz na pasta da imagem ou em alguma pasta acima (carrega uma vez so)"""
+    for folder in Path(path).resolve().parents:
+        if folder in _open_indexes:
+            return _open_indexes[folder]
+        if (folder / INDEX_FILE).exists():
+            _open_indexes[folder] = ImageIndex(folder)
+            return _open_indexes[folder]
+    return None
+
+
+def image_shape(path):
+    """(altura, largura) pelo indice se existir e estiver em dia; senao le so o cabecalho"""
+    index = find_index(path)
+    if index is not None:
+        try:
+            record = index.get(path)
+        except (OSError, ValueError):
+            record = None
+        if record is not None and record['width'] > 0:
+            return int(record['height']), int(record['width'])
+
+    from PIL import Image
+
+    with Image.open(path) as img:
+        width, height = img.size
+    return height, width
+
+
+def main():
+    parser = argparse.ArgumentParser(description="atualiza e consulta o indice de metadados das imagens")
+    parser.add_argument("folder", help="pasta do dataset")
+    parser.add_argument("--classe")
+    parser.add_argument("--periodo", choices=PERIODS)
+    parser.add_argument("--video")
+    parser.add_argument("--sem-label", action="store_true", help="so imagens sem .txt")
+    parser.add_argument("--negativas", action="store_true", help="so imagens com .txt vazio")
+    parser.add_argument("--id-classe", type=int, help="so imagens com caixas dessa classe")
+    parser.add_argument("--listar", action="store_true", help="imprime os caminhos selecionados")
+    args = parser.parse_args()
+
+    index = ImageIndex(args.folder)
+    stats = index.refresh(progress_callback=lambda value, status: print(status))
+    index.save()
+    print(f"{stats['total']} imagens, {stats['updated']} atualizadas, {stats['removed']} removidas do indice")
+
+    filters = {
+        'class_name': args.classe,
+        'period': args.periodo,
+        'video': args.video,
+        'labeled': False if args.sem_label else None,
+        'empty': True if args.negativas else None,
+        'label_class': args.id_classe
+    }
+    if any(value is not None for value in filters.values()):
+        paths = index.select(**filters)
+        if args.listar:
+            for path in paths:
+                print(path)
+        print(f"{len(paths)} imagens selecionadas")
+        return
+
+    for (class_name, period), (total, labeled, negatives) in index.summary().items():
+        print(f"{class_name or '-':<20} {period or '-':<6} {total:>8} imagens  {labeled:>8} com caixas  {negatives:>8} negativas")
+
+
+if __name__ == "__main__":
+    main()
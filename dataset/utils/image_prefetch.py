@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+
+DEFAULT_MAX_SIZE = (800, 600)
+DEFAULT_RADIUS = 4
+DEFAULT_CAPACITY = 48
+
+
+def load_preview(path, max_size=DEFAULT_MAX_SIZE):
+    """
+    abre a imagem ja reduzida para caber em max_size
+    em jpeg o draft() faz o decodificador pular direto para 1/2, 1/4 ou 1/8 da resolucao,
+    entao o lanczos final roda numa imagem pequena em vez do frame inteiro
+    """
+    with Image.open(path) as img:
+        img.draft('RGB', max_size)
+        img = img.convert('RGB') if img.mode not in ('RGB', 'L') else img
+        img.thumbnail(max_size, Image.Resampling.LANCZOS)
+        img.load()
+        return img
+
+
+class ImagePrefetcher:
+    """
+    cache lru de previews ja decodificadas + threads que adiantam as vizinhas da imagem atual
+    guarda imagens PIL (o PhotoImage precisa ser criado na thread do tkinter)
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, radius=DEFAULT_RADIUS, capacity=DEFAULT_CAPACITY, workers=2):
+        self.max_size = max_size
+        self.radius = radius
+        self.capacity = max(capacity, 2 * radius + 1)
+
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._wanted = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+
+    def _store(self, path, img):
+        with self._lock:
+            self._cache[path] = img
+            self._cache.move_to_end(path)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+
+    def _decode(self, path):
+        # o usuario pode ter passado direto por essa imagem enquanto ela esperava na fila
+        with self._lock:
+            if path not in self._wanted:
+                self._pending.pop(path, None)
+                return None
+
+        try:
+            img = load_preview(path, self.max_size)
+        except Exception:
+            img = None
+
+        if img is not None:
+            self._store(path, img)
+
+        with self._lock:
+            self._pending.pop(path, None)
+
+        return img
+
+    def get(self, path):
+        """preview da imagem; se nao estiver pronta decodifica agora (ou espera a thread que ja esta nela)"""
+        path = Path(path)
+
+        with self._lock:
+            img = self._cache.get(path)
+            if img is not None:
+                self._cache.move_to_end(path)
+                return img
+            future = self._pending.get(path)
+
+        if future is not None:
+            img = future.result()
+            if img is not None:
+                return img
+
+        img = load_preview(path, self.max_size)
+        self._store(path, img)
+        return img
+
+    def prefetch(self, paths, index):
+        """agenda as vizinhas de paths[index], proximas primeiro e depois as anteriores"""
+        order = [paths[i] for i in range(index + 1, min(index + self.radius + 1, len(paths)))]
+        order += [paths[i] for i in range(index - 1, max(index - self.radius, 0) - 1, -1)]
+
+        with self._lock:
+            self._wanted = set(order)
+            to_submit = [p for p in order if p not in self._cache and p not in self._pending]
+            for path in to_submit:
+                self._pending[path] = self._executor.submit(self._decode, path)
+
+    def rename(self, old_path, new_path):
+        """o conteudo nao muda ao renomear, so a chave"""
+        with self._lock:
+            img = self._cache.pop(Path(old_path), None)
+            if img is not None:
+                self._cache[Path(new_path)] = img
+
+    def invalidate(self, path):
+        with self._lock:
+            self._cache.pop(Path(path), None)
+
+    def close(self):
+        with self._lock:
+            self._wanted = set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
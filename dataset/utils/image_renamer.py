@@ -1,18 +1,29 @@
 import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import yaml
-import hashlib
 from pathlib import Path
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 from PIL import Image, ImageTk
 
+from image_prefetch import ImagePrefetcher
+from classify_assist import (
+    make_detector, match_class_names, estimate_period, ProposalWorker, apply_renames
+)
+from thumbnail_cache import ThumbnailCache, DEFAULT_THUMB_SIZE
+from naming import NameIndex
+from hashing import file_digest
 
-def generate_hash():
-    import random
-    import time
-    content = f"{time.time()}{random.random()}".encode()
-    hash_obj = hashlib.md5(content)
-    return hash_obj.hexdigest()[:4]
+
+PAGE_ROWS = 3
+PAGE_COLS = 4
+PAGE_SIZE = PAGE_ROWS * PAGE_COLS
+THUMB_SIZE = (200, 150)
+
+GRID_CELL = (DEFAULT_THUMB_SIZE[0] + 16, DEFAULT_THUMB_SIZE[1] + 30)
+SELECTED_COLOR = "#1e90ff"
 
 
 def load_classes_from_yaml(yaml_path):
@@ -25,6 +36,15 @@ def load_classes_from_yaml(yaml_path):
         return []
 
 
+def build_image_name(selected_class, period, image_path, name_index):
+    """
+    nome no padrao do banco de fotos: classe_periodo_id.jpg
+    o id vem do conteudo da imagem e e checado contra os nomes ja usados na pasta
+    """
+    class_name = selected_class.lower().replace(" ", "_")
+    return name_index.assign(f"{class_name}_{period}", file_digest(image_path)) + ".jpg"
+
+
 class ImageRenamerGUI:
     def __init__(self, root):
         self.root = root
@@ -36,9 +56,13 @@ class ImageRenamerGUI:
         self.current_index = 0
         self.classes = []
         self.yaml_path = None
+        self.name_index = NameIndex()
+        # previews decodificadas em segundo plano (vizinhas da imagem atual)
+        self.prefetcher = ImagePrefetcher(max_size=(800, 600))
         
         self.setup_ui()
         self.bind_shortcuts()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
     
     def setup_ui(self):
         top_frame = ttk.Frame(self.root, padding="10")
@@ -46,6 +70,8 @@ class ImageRenamerGUI:
         
         ttk.Button(top_frame, text="selecionar pasta de imagens", command=self.select_folder).pack(side=tk.LEFT, padx=5)
         ttk.Button(top_frame, text="carregar data.yaml", command=self.load_yaml).pack(side=tk.LEFT, padx=5)
+        ttk.Button(top_frame, text="revisao em lote", command=self.open_batch_review).pack(side=tk.LEFT, padx=5)
+        ttk.Button(top_frame, text="grade de miniaturas", command=self.open_grid).pack(side=tk.LEFT, padx=5)
         
         self.yaml_label = ttk.Label(top_frame, text="yaml: nao carregado", foreground="red")
         self.yaml_label.pack(side=tk.LEFT, padx=10)
@@ -65,6 +91,9 @@ class ImageRenamerGUI:
         self.counter_label = ttk.Label(info_frame, text="imagem 0 de 0")
         self.counter_label.pack(anchor=tk.W)
         
+        self.status_label = ttk.Label(info_frame, text="", foreground="green")
+        self.status_label.pack(anchor=tk.W)
+        
         control_frame = ttk.LabelFrame(self.root, text="controles", padding="10")
         control_frame.pack(fill=tk.X, padx=10, pady=10)
         
@@ -138,6 +167,7 @@ class ImageRenamerGUI:
         
         self.folder_path = Path(folder)
         self.image_files = sorted([f for f in self.folder_path.glob("*.jpg")])
+        self.name_index = NameIndex.from_folder(self.folder_path)
         
         if not self.image_files:
             messagebox.showerror("erro", "nenhuma imagem .jpg encontrada na pasta")
@@ -159,9 +189,7 @@ class ImageRenamerGUI:
         current_file = self.image_files[self.current_index]
         
         try:
-            img = Image.open(current_file)
-            
-            img.thumbnail((800, 600), Image.Resampling.LANCZOS)
+            img = self.prefetcher.get(current_file)
             
             photo = ImageTk.PhotoImage(img)
             
@@ -171,6 +199,8 @@ class ImageRenamerGUI:
             self.filename_label.config(text=f"arquivo: {current_file.name}")
             self.counter_label.config(text=f"imagem {self.current_index + 1} de {len(self.image_files)}")
             
+            self.prefetcher.prefetch(self.image_files, self.current_index)
+            
         except Exception as e:
             messagebox.showerror("erro", f"erro ao carregar imagem:\n{str(e)}")
     
@@ -219,22 +249,24 @@ class ImageRenamerGUI:
             return
         
         current_file = self.image_files[self.current_index]
-        class_name = selected_class.lower().replace(" ", "_")
-        hash_code = generate_hash()
-        new_name = f"{class_name}_{selected_period}_{hash_code}.jpg"
+        new_name = build_image_name(selected_class, selected_period, current_file, self.name_index)
         new_path = current_file.parent / new_name
         
-        try:
-            current_file.rename(new_path)
-            
-            self.image_files[self.current_index] = new_path
-            
-            messagebox.showinfo("sucesso", f"renomeado para:\n{new_name}")
-            
-            self.next_image()
-            
-        except Exception as e:
-            messagebox.showerror("erro", f"erro ao renomear:\n{str(e)}")
+        # mesmo caminho da revisao em lote: nao sobrescreve (imagens identicas geram o mesmo nome) e leva o .txt junto
+        success, result = apply_renames([(current_file, new_path)])
+        
+        if result['errors']:
+            messagebox.showerror("erro", f"erro ao renomear:\n{result['errors'][0][1]}")
+            return
+        
+        if result['renamed']:
+            self.replace_paths(result['renamed'])
+            # sem messagebox aqui: um popup por imagem trava a revisao de milhares de frames
+            self.status_label.config(text=f"renomeado: {current_file.name} -> {new_name}")
+        else:
+            self.status_label.config(text=f"ja estava com o nome: {new_name}")
+        
+        self.next_image()
     
     def delete_image(self):
         if not self.image_files:
@@ -249,6 +281,8 @@ class ImageRenamerGUI:
             current_file.unlink()
             
             self.image_files.pop(self.current_index)
+            self.prefetcher.invalidate(current_file)
+            self.name_index.discard(current_file.stem)
             
             if not self.image_files:
                 self.image_label.config(image="", text="nenhuma imagem restante")
@@ -264,6 +298,615 @@ class ImageRenamerGUI:
             
         except Exception as e:
             messagebox.showerror("erro", f"erro ao excluir:\n{str(e)}")
+    
+    def open_batch_review(self):
+        if not self.image_files:
+            messagebox.showerror("erro", "nenhuma imagem carregada")
+            return
+        
+        if not self.classes:
+            messagebox.showerror("erro", "carregue o data.yaml primeiro")
+            return
+        
+        BatchReviewWindow(self)
+    
+    def open_grid(self):
+        if not self.image_files:
+            messagebox.showerror("erro", "nenhuma imagem carregada")
+            return
+        
+        ThumbnailGridWindow(self)
+    
+    def replace_paths(self, renamed):
+        """atualiza a lista depois de renomeacoes feitas fora daqui (revisao em lote)"""
+        new_paths = dict(renamed)
+        self.image_files = [new_paths.get(path, path) for path in self.image_files]
+        for old_path, new_path in renamed:
+            self.prefetcher.rename(old_path, new_path)
+            self.name_index.discard(old_path.stem)
+    
+    def remove_paths(self, removed):
+        """tira da lista imagens excluidas fora daqui (grade de miniaturas)"""
+        removed = set(removed)
+        self.image_files = [path for path in self.image_files if path not in removed]
+        for path in removed:
+            self.prefetcher.invalidate(path)
+            self.name_index.discard(path.stem)
+        
+        if not self.image_files:
+            self.image_label.config(image="", text="nenhuma imagem restante")
+            self.filename_label.config(text="arquivo: -")
+            self.counter_label.config(text="imagem 0 de 0")
+        else:
+            self.load_current_image()
+    
+    def on_close(self):
+        self.prefetcher.close()
+        self.root.destroy()
+
+
+class BatchReviewWindow:
+    """
+    revisao por pagina de miniaturas: o detector roda em segundo plano a frente da pagina atual
+    e pre-preenche classe e periodo; 'aceitar pagina' renomeia todas as marcadas de uma vez
+    """
+    
+    def __init__(self, parent):
+        self.parent = parent
+        self.window = tk.Toplevel(parent.root)
+        self.window.title("revisao em lote")
+        self.window.geometry("1000x820")
+        
+        self.page = parent.current_index // PAGE_SIZE
+        self.worker = None
+        self.prefetcher = ImagePrefetcher(max_size=THUMB_SIZE, radius=PAGE_SIZE, capacity=PAGE_SIZE * 3)
+        self.model_path = tk.StringVar()
+        self.cells = []
+        
+        self.setup_ui()
+        self.show_page()
+        
+        self.window.bind('<Control-Return>', lambda e: self.accept_page())
+        self.window.bind('<Next>', lambda e: self.next_page())
+        self.window.bind('<Prior>', lambda e: self.previous_page())
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.window.after(500, self.refresh_proposals)
+    
+    def setup_ui(self):
+        top_frame = ttk.Frame(self.window, padding="10")
+        top_frame.pack(fill=tk.X)
+        
+        ttk.Label(top_frame, text="modelo:").pack(side=tk.LEFT)
+        ttk.Entry(top_frame, textvariable=self.model_path, width=50).pack(side=tk.LEFT, padx=5)
+        ttk.Button(top_frame, text="procurar", command=self.browse_model).pack(side=tk.LEFT, padx=5)
+        self.start_button = ttk.Button(top_frame, text="iniciar sugestoes", command=self.start_suggestions)
+        self.start_button.pack(side=tk.LEFT, padx=5)
+        
+        self.status_label = ttk.Label(self.window, text="sugestoes: desligadas (so periodo estimado)", padding="10 0")
+        self.status_label.pack(anchor=tk.W)
+        
+        grid_frame = ttk.Frame(self.window, padding="10")
+        grid_frame.pack(fill=tk.BOTH, expand=True)
+        
+        class_values = list(self.parent.classes)
+        
+        for i in range(PAGE_SIZE):
+            frame = ttk.Frame(grid_frame, padding="4", relief=tk.GROOVE)
+            frame.grid(row=i // PAGE_COLS, column=i % PAGE_COLS, padx=4, pady=4, sticky=tk.N)
+            
+            image_label = ttk.Label(frame, anchor=tk.CENTER)
+            image_label.pack()
+            name_label = ttk.Label(frame, text="", width=28)
+            name_label.pack()
+            
+            cell = {
+                'frame': frame,
+                'image': image_label,
+                'name': name_label,
+                'class_var': tk.StringVar(),
+                'period_var': tk.StringVar(),
+                'include_var': tk.BooleanVar(value=False),
+                'path': None,
+                'touched': False,
+                'filled': False
+            }
+            
+            options = ttk.Frame(frame)
+            options.pack(fill=tk.X)
+            class_combo = ttk.Combobox(options, textvariable=cell['class_var'], values=class_values, state="readonly", width=14)
+            class_combo.pack(side=tk.LEFT)
+            period_combo = ttk.Combobox(options, textvariable=cell['period_var'], values=['dia', 'noite'], state="readonly", width=6)
+            period_combo.pack(side=tk.LEFT, padx=2)
+            ttk.Checkbutton(options, variable=cell['include_var']).pack(side=tk.LEFT)
+            
+            # o que o revisor mexeu nao e mais sobrescrito pelas sugestoes que chegam depois
+            class_combo.bind("<<ComboboxSelected>>", lambda e, c=cell: self.mark_touched(c, include=True))
+            period_combo.bind("<<ComboboxSelected>>", lambda e, c=cell: self.mark_touched(c))
+            
+            self.cells.append(cell)
+        
+        nav_frame = ttk.Frame(self.window, padding="10")
+        nav_frame.pack(fill=tk.X)
+        
+        ttk.Button(nav_frame, text="< pagina anterior (page up)", command=self.previous_page).pack(side=tk.LEFT, padx=5)
+        ttk.Button(nav_frame, text="proxima pagina > (page down)", command=self.next_page).pack(side=tk.LEFT, padx=5)
+        ttk.Button(nav_frame, text="aceitar pagina (ctrl+enter)", command=self.accept_page).pack(side=tk.LEFT, padx=5)
+        
+        self.page_label = ttk.Label(nav_frame, text="")
+        self.page_label.pack(side=tk.RIGHT, padx=5)
+    
+    def browse_model(self):
+        file_path = filedialog.askopenfilename(
+            title="selecionar modelo yolo",
+            filetypes=[("modelo yolo", "*.pt"), ("todos os arquivos", "*.*")]
+        )
+        if file_path:
+            self.model_path.set(file_path)
+    
+    def start_suggestions(self):
+        model_path = self.model_path.get()
+        
+        if not model_path or not Path(model_path).exists():
+            messagebox.showerror("erro", "selecione um modelo valido", parent=self.window)
+            return
+        
+        self.start_button.config(state='disabled')
+        self.status_label.config(text="carregando modelo...")
+        
+        thread = threading.Thread(target=self.load_worker, args=(model_path,), daemon=True)
+        thread.start()
+    
+    def load_worker(self, model_path):
+        try:
+            detect, names = make_detector(model_path)
+            names = match_class_names(names, self.parent.classes)
+            self.worker = ProposalWorker(detect, names, self.parent.image_files)
+            self.worker.set_cursor(self.page * PAGE_SIZE)
+        except Exception as e:
+            self.start_button.config(state='normal')
+            messagebox.showerror("erro", f"erro ao carregar modelo:\n{str(e)}", parent=self.window)
+    
+    def page_count(self):
+        return max((len(self.parent.image_files) + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+    
+    def mark_touched(self, cell, include=False):
+        cell['touched'] = True
+        if include:
+            cell['include_var'].set(True)
+    
+    def show_page(self):
+        files = self.parent.image_files
+        self.page = max(0, min(self.page, self.page_count() - 1))
+        start = self.page * PAGE_SIZE
+        
+        for i, cell in enumerate(self.cells):
+            index = start + i
+            
+            if index >= len(files):
+                cell['path'] = None
+                cell['frame'].grid_remove()
+                continue
+            
+            path = files[index]
+            cell.update(path=path, touched=False, filled=False)
+            cell['frame'].grid()
+            
+            try:
+                photo = ImageTk.PhotoImage(self.prefetcher.get(path))
+                cell['image'].config(image=photo, text="")
+                cell['image'].image = photo
+            except Exception as e:
+                cell['image'].config(image="", text="erro ao abrir")
+                cell['image'].image = None
+            
+            cell['name'].config(text=path.name)
+            cell['class_var'].set("")
+            cell['include_var'].set(False)
+            
+            try:
+                cell['period_var'].set(estimate_period(path)[0])
+            except Exception:
+                cell['period_var'].set("dia")
+            
+            self.fill_cell(cell)
+        
+        last = min(start + PAGE_SIZE, len(files)) - 1
+        self.prefetcher.prefetch(files, max(last, 0))
+        if self.worker is not None:
+            self.worker.set_cursor(start)
+        
+        self.page_label.config(text=f"pagina {self.page + 1} de {self.page_count()}")
+    
+    def fill_cell(self, cell):
+        if self.worker is None or cell['path'] is None or cell['touched'] or cell['filled']:
+            return
+        
+        proposal = self.worker.get(cell['path'])
+        if proposal is None:
+            return
+        
+        cell['filled'] = True
+        if proposal['class']:
+            cell['class_var'].set(proposal['class'])
+            cell['include_var'].set(True)
+            cell['name'].config(text=f"{cell['path'].name} ({proposal['conf']:.2f})")
+        if proposal['period']:
+            cell['period_var'].set(proposal['period'])
+    
+    def refresh_proposals(self):
+        if not self.window.winfo_exists():
+            return
+        
+        if self.worker is not None:
+            for cell in self.cells:
+                self.fill_cell(cell)
+            
+            done, total = self.worker.progress()
+            if self.worker.error is not None:
+                self.status_label.config(text=f"erro no detector: {self.worker.error}", foreground="red")
+            else:
+                self.status_label.config(text=f"sugestoes: {done} de {total} imagens", foreground="")
+        
+        self.window.after(500, self.refresh_proposals)
+    
+    def next_page(self):
+        if self.page < self.page_count() - 1:
+            self.page += 1
+            self.show_page()
+    
+    def previous_page(self):
+        if self.page > 0:
+            self.page -= 1
+            self.show_page()
+    
+    def accept_page(self):
+        plan = []
+        
+        for cell in self.cells:
+            if cell['path'] is None or not cell['include_var'].get():
+                continue
+            if not cell['class_var'].get() or not cell['period_var'].get():
+                continue
+            
+            new_name = build_image_name(cell['class_var'].get(), cell['period_var'].get(), cell['path'], self.parent.name_index)
+            plan.append((cell['path'], cell['path'].parent / new_name))
+        
+        if not plan:
+            messagebox.showwarning("aviso", "nenhuma imagem marcada com classe nesta pagina", parent=self.window)
+            return
+        
+        success, result = apply_renames(plan)
+        
+        self.parent.replace_paths(result['renamed'])
+        for old_path, new_path in result['renamed']:
+            self.prefetcher.rename(old_path, new_path)
+        
+        self.status_label.config(
+            text=f"pagina {self.page + 1}: {len(result['renamed'])} renomeadas, {len(result['errors'])} erros"
+        )
+        
+        if result['errors']:
+            details = "\n".join(f"{path.name}: {error}" for path, error in result['errors'][:10])
+            messagebox.showerror("erro", f"algumas imagens nao foram renomeadas:\n{details}", parent=self.window)
+        
+        self.parent.current_index = min((self.page + 1) * PAGE_SIZE, len(self.parent.image_files) - 1)
+        self.parent.load_current_image()
+        
+        if self.page < self.page_count() - 1:
+            self.page += 1
+        self.show_page()
+    
+    def on_close(self):
+        if self.worker is not None:
+            self.worker.stop()
+        self.prefetcher.close()
+        self.window.destroy()
+
+
+class ThumbnailGridWindow:
+    """
+    grade de miniaturas com rolagem virtualizada: so as celulas visiveis (mais uma tela de folga)
+    existem no canvas e na memoria, entao o custo nao depende do tamanho da pasta
+    as miniaturas vem do cache em disco, que e gerado em paralelo em segundo plano
+    """
+    
+    def __init__(self, parent):
+        self.parent = parent
+        self.window = tk.Toplevel(parent.root)
+        self.window.title("grade de miniaturas")
+        self.window.geometry("1100x800")
+        
+        self.cache = ThumbnailCache()
+        self.selected = set()
+        self.anchor = None
+        self.columns = 1
+        
+        # index -> ids no canvas / PhotoImage; so para as celulas renderizadas
+        self.items = {}
+        self.photos = {}
+        self.loading = set()
+        self.failed = set()
+        self.ready = deque()
+        
+        self.stop_event = threading.Event()
+        self.loader = ThreadPoolExecutor(max_workers=2)
+        
+        self.class_var = tk.StringVar()
+        self.period_var = tk.StringVar(value="dia")
+        
+        self.setup_ui()
+        
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.window.after(100, self.poll_ready)
+        
+        thread = threading.Thread(target=self.build_cache, daemon=True)
+        thread.start()
+    
+    @property
+    def files(self):
+        return self.parent.image_files
+    
+    def setup_ui(self):
+        top_frame = ttk.Frame(self.window, padding="10")
+        top_frame.pack(fill=tk.X)
+        
+        ttk.Label(top_frame, text="classe:").pack(side=tk.LEFT, padx=5)
+        ttk.Combobox(top_frame, textvariable=self.class_var, values=self.parent.classes, state="readonly", width=20).pack(side=tk.LEFT)
+        ttk.Label(top_frame, text="periodo:").pack(side=tk.LEFT, padx=5)
+        ttk.Combobox(top_frame, textvariable=self.period_var, values=['dia', 'noite'], state="readonly", width=8).pack(side=tk.LEFT)
+        
+        ttk.Button(top_frame, text="renomear selecionadas", command=self.rename_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(top_frame, text="excluir selecionadas", command=self.delete_selected).pack(side=tk.LEFT, padx=5)
+        
+        self.status_label = ttk.Label(top_frame, text="")
+        self.status_label.pack(side=tk.RIGHT, padx=5)
+        
+        canvas_frame = ttk.Frame(self.window)
+        canvas_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.canvas = tk.Canvas(canvas_frame, background="#202020", highlightthickness=0)
+        scrollbar = ttk.Scrollbar(canvas_frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        help_text = "clique: seleciona | ctrl+clique: alterna | shift+clique: intervalo | ctrl+a: tudo | duplo clique: abre"
+        ttk.Label(self.window, text=help_text, padding="10 5").pack(anchor=tk.W)
+        
+        self.canvas.bind("<Configure>", lambda e: self.relayout())
+        self.canvas.bind("<Button-1>", lambda e: self.on_click(e, toggle=False, extend=False))
+        self.canvas.bind("<Control-Button-1>", lambda e: self.on_click(e, toggle=True, extend=False))
+        self.canvas.bind("<Shift-Button-1>", lambda e: self.on_click(e, toggle=False, extend=True))
+        self.canvas.bind("<Double-Button-1>", self.on_double_click)
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll(-1))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll(1))
+        self.window.bind("<Control-a>", lambda e: self.select_all())
+        self.window.bind("<Delete>", lambda e: self.delete_selected())
+    
+    def build_cache(self):
+        # comeca pela regiao que o usuario esta vendo
+        files = list(self.files)
+        start = self.parent.current_index
+        ordered = files[start:] + files[:start]
+        
+        def progress(done, total):
+            self.status_label.config(text=f"miniaturas: {done} de {total}")
+        
+        self.cache.build(ordered, progress_callback=progress, stop_event=self.stop_event)
+        # com a pasta atual renovada, o que passou do limite e de pastas antigas
+        if not self.stop_event.is_set():
+            self.cache.prune()
+    
+    def relayout(self):
+        width = max(self.canvas.winfo_width(), GRID_CELL[0])
+        self.columns = max(1, width // GRID_CELL[0])
+        rows = (len(self.files) + self.columns - 1) // self.columns
+        self.canvas.configure(scrollregion=(0, 0, self.columns * GRID_CELL[0], rows * GRID_CELL[1]))
+        
+        self.clear_items()
+        self.render_visible()
+    
+    def clear_items(self):
+        self.canvas.delete("cell")
+        self.items.clear()
+        self.photos.clear()
+    
+    def visible_range(self):
+        top = self.canvas.canvasy(0)
+        height = self.canvas.winfo_height()
+        # uma tela de folga acima e abaixo para a rolagem nao mostrar buracos
+        first_row = max(int((top - height) // GRID_CELL[1]), 0)
+        last_row = int((top + 2 * height) // GRID_CELL[1]) + 1
+        return first_row * self.columns, min(last_row * self.columns, len(self.files))
+    
+    def render_visible(self):
+        first, last = self.visible_range()
+        
+        for index in [i for i in self.items if i < first or i >= last]:
+            for item in self.items.pop(index):
+                self.canvas.delete(item)
+            self.photos.pop(index, None)
+        
+        for index in range(first, last):
+            if index not in self.items:
+                self.draw_cell(index)
+    
+    def cell_origin(self, index):
+        row, col = divmod(index, self.columns)
+        return col * GRID_CELL[0] + 8, row * GRID_CELL[1] + 4
+    
+    def draw_cell(self, index):
+        x, y = self.cell_origin(index)
+        width, height = DEFAULT_THUMB_SIZE
+        path = self.files[index]
+        
+        outline = SELECTED_COLOR if index in self.selected else "#404040"
+        frame = self.canvas.create_rectangle(x - 3, y - 3, x + width + 3, y + height + 3,
+                                             outline=outline, width=3, tags="cell")
+        label = self.canvas.create_text(x + width // 2, y + height + 12, text=path.name[:26],
+                                        fill="white", font=("Arial", 8), tags="cell")
+        items = [frame, label]
+        
+        thumb = None
+        try:
+            thumb = self.cache.get(path)
+        except OSError:
+            pass
+        
+        if thumb is not None:
+            try:
+                with Image.open(thumb) as img:
+                    photo = ImageTk.PhotoImage(img)
+                self.photos[index] = photo
+                items.append(self.canvas.create_image(x + width // 2, y + height // 2, image=photo, tags="cell"))
+            except OSError:
+                pass
+        elif index not in self.loading and path not in self.failed:
+            # miniatura ainda nao gerada: pede com prioridade e desenha quando chegar
+            self.loading.add(index)
+            future = self.loader.submit(self.cache.get_or_create, path)
+            future.add_done_callback(lambda f, i=index, p=path: self.ready.append((i, p, f.exception() is None)))
+        
+        self.items[index] = items
+    
+    def poll_ready(self):
+        if not self.window.winfo_exists():
+            return
+        
+        while self.ready:
+            index, path, ok = self.ready.popleft()
+            self.loading.discard(index)
+            if not ok:
+                # imagem corrompida: fica so o quadro com o nome, sem tentar de novo
+                self.failed.add(path)
+                continue
+            if index in self.items and index not in self.photos:
+                for item in self.items.pop(index):
+                    self.canvas.delete(item)
+                if index < len(self.files):
+                    self.draw_cell(index)
+        
+        self.window.after(100, self.poll_ready)
+    
+    def on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+        self.render_visible()
+    
+    def scroll(self, units):
+        self.canvas.yview_scroll(units, "units")
+        self.render_visible()
+    
+    def index_at(self, event):
+        x = self.canvas.canvasx(event.x)
+        y = self.canvas.canvasy(event.y)
+        col = int(x // GRID_CELL[0])
+        index = int(y // GRID_CELL[1]) * self.columns + col
+        if col >= self.columns or index >= len(self.files):
+            return None
+        return index
+    
+    def on_click(self, event, toggle, extend):
+        index = self.index_at(event)
+        if index is None:
+            return
+        
+        if extend and self.anchor is not None:
+            low, high = sorted((self.anchor, index))
+            self.selected.update(range(low, high + 1))
+        elif toggle:
+            self.selected.symmetric_difference_update({index})
+            self.anchor = index
+        else:
+            self.selected = {index}
+            self.anchor = index
+        
+        self.refresh_selection()
+    
+    def on_double_click(self, event):
+        index = self.index_at(event)
+        if index is None:
+            return
+        self.parent.current_index = index
+        self.parent.load_current_image()
+    
+    def select_all(self):
+        self.selected = set(range(len(self.files)))
+        self.refresh_selection()
+    
+    def refresh_selection(self):
+        for index, items in self.items.items():
+            outline = SELECTED_COLOR if index in self.selected else "#404040"
+            self.canvas.itemconfigure(items[0], outline=outline)
+        self.status_label.config(text=f"{len(self.selected)} selecionada(s)")
+    
+    def rename_selected(self):
+        if not self.selected:
+            messagebox.showwarning("aviso", "nenhuma imagem selecionada", parent=self.window)
+            return
+        
+        if not self.class_var.get() or not self.period_var.get():
+            messagebox.showerror("erro", "selecione classe e periodo", parent=self.window)
+            return
+        
+        plan = []
+        for i in sorted(self.selected):
+            path = self.files[i]
+            new_name = build_image_name(self.class_var.get(), self.period_var.get(), path, self.parent.name_index)
+            plan.append((path, path.parent / new_name))
+        
+        success, result = apply_renames(plan)
+        
+        for old_path, new_path in result['renamed']:
+            try:
+                self.cache.rename(old_path, new_path)
+            except OSError:
+                pass
+        self.parent.replace_paths(result['renamed'])
+        
+        self.selected.clear()
+        self.relayout()
+        self.status_label.config(text=f"{len(result['renamed'])} renomeadas, {len(result['errors'])} erros")
+        
+        if result['errors']:
+            details = "\n".join(f"{path.name}: {error}" for path, error in result['errors'][:10])
+            messagebox.showerror("erro", f"algumas imagens nao foram renomeadas:\n{details}", parent=self.window)
+    
+    def delete_selected(self):
+        if not self.selected:
+            return
+        
+        if not messagebox.askyesno("confirmar", f"excluir {len(self.selected)} imagem(ns)?", parent=self.window):
+            return
+        
+        removed = []
+        errors = []
+        for index in sorted(self.selected):
+            path = self.files[index]
+            try:
+                self.cache.discard(path)
+                path.unlink()
+                # o label do yolo sai junto, como no apply_renames, para nao ficar orfao
+                path.with_suffix('.txt').unlink(missing_ok=True)
+                removed.append(path)
+            except Exception as e:
+                errors.append(f"{path.name}: {str(e)}")
+        
+        self.parent.remove_paths(removed)
+        
+        self.selected.clear()
+        self.anchor = None
+        self.relayout()
+        self.status_label.config(text=f"{len(removed)} excluidas, {len(errors)} erros")
+        
+        if errors:
+            messagebox.showerror("erro", "erro ao excluir:\n" + "\n".join(errors[:10]), parent=self.window)
+    
+    def on_close(self):
+        self.stop_event.set()
+        self.loader.shutdown(wait=False, cancel_futures=True)
+        self.window.destroy()
 
 
 def main():
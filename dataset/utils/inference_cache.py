@@ -0,0 +1,283 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from camera_roi import roi_for
+from hashing import file_digest
+
+
+# cada deteccao e guardada como uma linha float32: x1, y1, x2, y2, conf, cls
+DET_COLUMNS = 6
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# opcoes do predict que nao mudam as deteccoes e por isso ficam fora da chave do cache
+OUTPUT_ONLY_KWARGS = {'save', 'save_txt', 'save_conf', 'save_crop', 'project', 'name', 'exist_ok', 'show', 'verbose'}
+
+_weights_hash_memo = {}
+
+
+def weights_digest(weights_path):
+    """
+    digest do arquivo de pesos (.pt)
+    memoriza por (caminho, tamanho, mtime) para nao reler o modelo a cada chamada
+    """
+    stat = os.stat(weights_path)
+    memo_key = (str(Path(weights_path).resolve()), stat.st_size, stat.st_mtime_ns)
+
+    if memo_key not in _weights_hash_memo:
+        _weights_hash_memo[memo_key] = file_digest(weights_path)
+
+    return _weights_hash_memo[memo_key]
+
+
+def make_key(content_digest, weights_hash, imgsz, conf, iou, extra=None):
+    """extra: demais opcoes do predict que mudam o resultado (classes, max_det, agnostic_nms...)"""
+    key = f"{content_digest}:{weights_hash}:{imgsz}:{conf:.4f}:{iou:.4f}"
+    if extra:
+        key += ":" + json.dumps(extra, sort_keys=True, default=str)
+    return key
+
+
+def results_to_array(result):
+    """converte um result do ultralytics em array compacto (N, 6) float32"""
+    if result.boxes is None or len(result.boxes) == 0:
+        return np.zeros((0, DET_COLUMNS), dtype=np.float32)
+    return result.boxes.data.cpu().numpy()[:, :DET_COLUMNS].astype(np.float32)
+
+
+class InferenceCache:
+    """
+    cache persistente (sqlite) de deteccoes, com despejo lru limitado por tamanho
+    chave = (hash da imagem, hash dos pesos, imgsz, conf, iou)
+    commit_every: quantas escritas juntar num commit (video: um commit por frame custa um fsync por frame);
+    o que estiver pendente vai para o disco em flush() ou close()
+    """
+
+    def __init__(self, db_path, max_bytes=DEFAULT_MAX_BYTES, commit_every=1):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.commit_every = max(int(commit_every), 1)
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON entries(last_access)")
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        self.total_bytes = row[0]
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM entries WHERE key = ?", (key,)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._written()
+            self.hits += 1
+
+        return np.frombuffer(row[0], dtype=np.float32).reshape(-1, DET_COLUMNS)
+
+    def put(self, key, detections):
+        data = np.ascontiguousarray(detections, dtype=np.float32).tobytes()
+        size = len(data) + len(key)
+
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            if old is not None:
+                self.total_bytes -= old[0]
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, data, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, data, size, time.time())
+            )
+            self.total_bytes += size
+
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+            self._written()
+
+    def _written(self):
+        # chamado com o lock
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self._conn.commit()
+            self._pending = 0
+
+    def flush(self):
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def _evict(self):
+        # remove as entradas menos usadas ate ficar em 90% do limite
+        target = int(self.max_bytes * 0.9)
+        cursor = self._conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC")
+        to_delete = []
+
+        for key, size in cursor:
+            if self.total_bytes <= target:
+                break
+            to_delete.append((key,))
+            self.total_bytes -= size
+
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", to_delete)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            'entries': count,
+            'bytes': self.total_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+def cached_predict(model, weights_path, image_paths, cache, imgsz=640, conf=0.25, iou=0.7,
+                   batch_size=16, progress_callback=None, rois=None, roi_root=None, **predict_kwargs):
+    """
+    roda model.predict apenas nas imagens que nao estao no cache
+    rois: lista de CameraROI (camera_roi.load_rois); imagens de cameras com roi sao
+    recortadas antes da inferencia e as caixas voltam para coordenadas da imagem inteira
+    roi_root: pasta de entrada; as pastas abaixo dela tambem identificam a camera (camera_roi.roi_for)
+    cache=None roda tudo sem consultar nem gravar (so o recorte da roi)
+    retorna dict {caminho: array (N, 6)} na mesma ordem de image_paths; imagens que nao
+    puderam ser lidas ficam de fora (com o erro no log)
+    """
+    weights_hash = weights_digest(weights_path) if cache is not None else None
+    # save/project/name so mudam o que vai para o disco, nao as deteccoes
+    extra = {k: v for k, v in predict_kwargs.items() if k not in OUTPUT_ONLY_KWARGS}
+    image_paths = [Path(p) for p in image_paths]
+
+    detections = {}
+    pending = []
+
+    for path in image_paths:
+        roi = roi_for(path, rois, roi_root) if rois else None
+
+        if cache is None:
+            pending.append((path, None, roi))
+            continue
+
+        content = file_digest(path) if roi is None else f"{file_digest(path)}-{roi.key}"
+        key = make_key(content, weights_hash, imgsz, conf, iou, extra)
+        cached = cache.get(key)
+
+        if cached is not None:
+            detections[path] = cached
+        else:
+            pending.append((path, key, roi))
+
+    if progress_callback:
+        progress_callback(len(detections), len(image_paths))
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+
+        if any(roi is not None for _, _, roi in batch):
+            readable = []
+            sources = []
+            offsets = []
+            for item in batch:
+                path, _, roi = item
+                image = cv2.imread(str(path))
+                if image is None:
+                    print(f"erro ao ler {path}: imagem pulada")
+                    continue
+                region, offset = roi.crop(image) if roi is not None else (image, (0, 0))
+                readable.append(item)
+                sources.append(region)
+                offsets.append(offset)
+            batch = readable
+        else:
+            sources = [str(p) for p, _, _ in batch]
+            offsets = [None] * len(batch)
+
+        results = _predict_sources(model, batch, sources, imgsz=imgsz, conf=conf, iou=iou, **predict_kwargs)
+
+        for (path, key, roi), offset, result in zip(batch, offsets, results):
+            if result is None:
+                continue
+            dets = results_to_array(result)
+            if roi is not None:
+                dets = roi.map_back(dets, offset)
+            if cache is not None:
+                cache.put(key, dets)
+            detections[path] = dets
+
+        if progress_callback:
+            progress_callback(len(detections), len(image_paths))
+
+    return {path: detections[path] for path in image_paths if path in detections}
+
+
+def _predict_sources(model, batch, sources, **kwargs):
+    """
+    model.predict do lote inteiro; se falhar (arquivo corrompido), refaz uma a uma
+    e a imagem ruim fica com None, sem derrubar o resto
+    """
+    if not sources:
+        return []
+    try:
+        return model.predict(source=sources, verbose=False, **kwargs)
+    except Exception as e:
+        if len(sources) == 1:
+            print(f"erro ao processar {batch[0][0]}: {e}")
+            return [None]
+    results = []
+    for item, source in zip(batch, sources):
+        results.extend(_predict_sources(model, [item], [source], **kwargs))
+    return results
+
+
+# paleta fixa por classe (bgr) para diferenciar especies sem custo extra
+PALETTE = [
+    (56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255), (49, 210, 207), (10, 249, 72),
+    (23, 204, 146), (134, 219, 61), (52, 147, 26), (187, 212, 0), (168, 153, 44), (255, 194, 0)
+]
+
+
+def draw_detections(frame, detections, names=None, color=None):
+    """desenha caixas de um array (N, 6) direto com opencv, sem precisar do result do ultralytics"""
+    for x1, y1, x2, y2, score, cls in detections:
+        cls = int(cls)
+        box_color = color or PALETTE[cls % len(PALETTE)]
+        p1 = (int(x1), int(y1))
+        p2 = (int(x2), int(y2))
+        cv2.rectangle(frame, p1, p2, box_color, 2)
+
+        label = names[cls] if names else str(cls)
+        cv2.putText(frame, f"{label} {score:.2f}", (p1[0], max(p1[1] - 5, 12)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, box_color, 1, cv2.LINE_AA)
+
+    return frame
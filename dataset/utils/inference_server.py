@@ -0,0 +1,390 @@
+import argparse
+import concurrent.futures
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+from micro_batching import BatchScheduler, DEFAULT_MAX_BATCH, DEFAULT_MAX_WAIT_MS
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_MODELS = 3
+# limite de espera de um frame avulso no agendador antes de responder 504
+DEFAULT_FRAME_TIMEOUT = 60.0
+# frames de um /predict (pasta ou video) enviados ao agendador antes de esperar o primeiro resultado
+PREDICT_IN_FLIGHT = 2 * DEFAULT_MAX_BATCH
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv')
+
+
+class ModelPool:
+    """
+    mantem os modelos yolo carregados (e aquecidos) em memoria, com despejo lru
+    cada modelo tem seu proprio lock porque o predictor do ultralytics nao e thread-safe
+    """
+
+    def __init__(self, max_models=DEFAULT_MAX_MODELS, warmup_imgsz=640,
+                 max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.max_models = max_models
+        self.warmup_imgsz = warmup_imgsz
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._models = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, model_path):
+        """
+        entrada do modelo com uma referencia a mais; devolver com release()
+        o carregamento acontece fora do lock geral: so quem pede o mesmo modelo espera por ele
+        """
+        key = str(Path(model_path).resolve())
+
+        while True:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    entry['refs'] += 1
+                    return entry
+
+                loading = self._loading.get(key)
+                owner = loading is None
+                if owner:
+                    loading = self._loading[key] = {'event': threading.Event(), 'error': None}
+
+            if not owner:
+                loading['event'].wait()
+                if loading['error'] is not None:
+                    raise loading['error']
+                continue
+
+            try:
+                entry = self._load(key)
+            except Exception as e:
+                with self._lock:
+                    loading['error'] = e
+                    del self._loading[key]
+                loading['event'].set()
+                raise
+
+            to_close = []
+            with self._lock:
+                entry['refs'] = 1
+                entry['evicted'] = False
+                self._models[key] = entry
+                del self._loading[key]
+
+                while len(self._models) > self.max_models:
+                    evicted, evicted_entry = self._models.popitem(last=False)
+                    evicted_entry['evicted'] = True
+                    print(f"modelo removido da memoria: {evicted}")
+                    # em uso por outra requisicao: fecha quando a ultima devolver
+                    if evicted_entry['refs'] == 0:
+                        to_close.append(evicted_entry)
+
+            loading['event'].set()
+            for evicted_entry in to_close:
+                evicted_entry['scheduler'].close()
+            return entry
+
+    def release(self, entry):
+        with self._lock:
+            entry['refs'] -= 1
+            close = entry['evicted'] and entry['refs'] == 0
+        if close:
+            entry['scheduler'].close()
+
+    @contextmanager
+    def use(self, model_path):
+        entry = self.acquire(model_path)
+        try:
+            yield entry
+        finally:
+            self.release(entry)
+
+    def _load(self, model_path):
+        from ultralytics import YOLO
+
+        start = time.perf_counter()
+        model = YOLO(model_path)
+
+        # a primeira inferencia paga a inicializacao do backend; fazemos isso aqui
+        model(np.zeros((self.warmup_imgsz, self.warmup_imgsz, 3), dtype=np.uint8),
+              imgsz=self.warmup_imgsz, verbose=False)
+
+        print(f"modelo carregado em {time.perf_counter() - start:.1f}s: {model_path}")
+        lock = threading.Lock()
+        # frames avulsos passam pelo agendador, que junta requisicoes simultaneas num forward so
+        scheduler = BatchScheduler(model, lock, max_batch=self.max_batch, max_wait_ms=self.max_wait_ms)
+        return {'model': model, 'lock': lock, 'scheduler': scheduler, 'path': model_path}
+
+    def loaded(self):
+        with self._lock:
+            return list(self._models.keys())
+
+    def metrics(self):
+        with self._lock:
+            return {path: entry['scheduler'].metrics() for path, entry in self._models.items()}
+
+
+def result_to_dict(result, index, path=None):
+    boxes = result.boxes.data.cpu().numpy()[:, :6] if result.boxes is not None else np.zeros((0, 6))
+    return {
+        'index': index,
+        'path': path or result.path,
+        'shape': list(result.orig_shape[:2]),
+        'detections': boxes.round(3).tolist()
+    }
+
+
+def iter_source_frames(source):
+    """
+    (caminho, frame bgr) de uma imagem, pasta ou video, um por vez
+    a decodificacao roda na thread da requisicao, sem segurar o lock do modelo
+    """
+    import cv2
+
+    source = Path(source)
+    files = sorted(p for p in source.iterdir() if p.is_file()) if source.is_dir() else [source]
+
+    for path in files:
+        suffix = path.suffix.lower()
+        if suffix in VIDEO_EXTENSIONS:
+            video = cv2.VideoCapture(str(path))
+            try:
+                while True:
+                    ok, frame = video.read()
+                    if not ok:
+                        break
+                    yield str(path), frame
+            finally:
+                video.release()
+        elif suffix in IMAGE_EXTENSIONS:
+            frame = cv2.imread(str(path))
+            if frame is None:
+                print(f"erro ao ler {path}: imagem pulada")
+                continue
+            yield str(path), frame
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    pool = None
+    frame_timeout = DEFAULT_FRAME_TIMEOUT
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, {'status': 'ok'})
+        elif self.path == "/models":
+            self.send_json(200, {'models': self.pool.loaded()})
+        elif self.path == "/metrics":
+            self.send_json(200, {'models': self.pool.metrics()})
+        else:
+            self.send_json(404, {'error': f"rota desconhecida: {self.path}"})
+
+    def do_POST(self):
+        try:
+            if self.path == "/predict":
+                self.handle_predict()
+            elif self.path == "/predict_frame":
+                self.handle_predict_frame()
+            elif self.path == "/names":
+                job = json.loads(self.read_body())
+                with self.pool.use(job['model']) as entry:
+                    names = entry['model'].names
+                self.send_json(200, {'names': [names[i] for i in sorted(names)]})
+            else:
+                self.send_json(404, {'error': f"rota desconhecida: {self.path}"})
+        except Exception as e:
+            self.send_json(500, {'error': str(e)})
+
+    def write_line(self, payload):
+        self.wfile.write(json.dumps(payload).encode() + b"\n")
+
+    def handle_predict(self):
+        """
+        job por caminho: imagem, pasta ou video (processado quadro a quadro no servidor)
+        os quadros passam pelo agendador, entao /predict_frame de outros clientes entra nos mesmos lotes
+        em vez de esperar o video inteiro; a resposta vai saindo uma linha json por quadro
+        """
+        job = json.loads(self.read_body())
+        source = Path(job.pop('source'))
+        model_path = job.pop('model')
+
+        if not source.exists():
+            self.send_json(400, {'error': f"arquivo nao encontrado: {source}"})
+            return
+        if source.is_file() and source.suffix.lower() not in IMAGE_EXTENSIONS + VIDEO_EXTENSIONS:
+            self.send_json(400, {'error': f"formato nao suportado: {source.suffix}"})
+            return
+
+        start = time.perf_counter()
+        with self.pool.use(model_path) as entry:
+            # http/1.0 sem content-length: o fim do corpo e o fechamento da conexao
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+
+            in_flight = deque()
+            try:
+                for i, (path, frame) in enumerate(iter_source_frames(source)):
+                    in_flight.append((i, path, entry['scheduler'].submit(frame, **job)))
+                    if len(in_flight) >= PREDICT_IN_FLIGHT:
+                        self.write_result(*in_flight.popleft())
+                while in_flight:
+                    self.write_result(*in_flight.popleft())
+                self.write_line({'done': True, 'elapsed': time.perf_counter() - start})
+            except (BrokenPipeError, ConnectionResetError):
+                # cliente desistiu: os frames ja enviados terminam no agendador e sao descartados
+                return
+            except concurrent.futures.TimeoutError:
+                self.write_line({'error': f"frame sem resposta em {self.frame_timeout:.0f}s"})
+            except Exception as e:
+                self.write_line({'error': str(e)})
+
+    def write_result(self, index, path, future):
+        self.write_line(result_to_dict(future.result(self.frame_timeout), index, path))
+
+    def handle_predict_frame(self):
+        """job com um frame ja decodificado, enviado cru (bgr uint8) no corpo da requisicao"""
+        height = int(self.headers["X-Height"])
+        width = int(self.headers["X-Width"])
+        options = json.loads(self.headers.get("X-Options", "{}"))
+        frame = np.frombuffer(self.read_body(), dtype=np.uint8).reshape(height, width, 3)
+
+        try:
+            with self.pool.use(self.headers["X-Model"]) as entry:
+                result = entry['scheduler'].predict(frame, timeout=self.frame_timeout, **options)
+        except concurrent.futures.TimeoutError:
+            self.send_json(504, {'error': f"frame sem resposta em {self.frame_timeout:.0f}s"})
+            return
+
+        self.send_json(200, result_to_dict(result, 0))
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, max_models=DEFAULT_MAX_MODELS, preload=(),
+          max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+    pool = ModelPool(max_models=max_models, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    for model_path in preload:
+        pool.release(pool.acquire(model_path))
+
+    InferenceRequestHandler.pool = pool
+    server = ThreadingHTTPServer((host, port), InferenceRequestHandler)
+    server.daemon_threads = True
+
+    print(f"servidor de inferencia em http://{host}:{port} (ctrl+c para parar)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class InferenceClient:
+    """
+    cliente leve do servidor: nao importa torch nem ultralytics,
+    entao main.py e video_detector.py abrem em menos de um segundo
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=600):
+        self.base_url = f"http://{host}:{port}"
+        self.timeout = timeout
+
+    def available(self):
+        try:
+            with urllib.request.urlopen(self.base_url + "/health", timeout=0.5) as response:
+                return response.status == 200
+        except (urllib.error.URLError, OSError):
+            return False
+
+    def _open(self, route, body, headers):
+        request = urllib.request.Request(self.base_url + route, data=body, headers=headers, method="POST")
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(json.loads(e.read()).get('error', str(e)))
+
+    def _post(self, route, body, headers):
+        with self._open(route, body, headers) as response:
+            return json.loads(response.read())
+
+    def iter_predict(self, model_path, source, **options):
+        """gera {index, path, shape, detections (N, 6)} conforme o servidor responde, quadro a quadro"""
+        job = dict(options, model=str(Path(model_path).resolve()), source=str(Path(source).resolve()))
+
+        with self._open("/predict", json.dumps(job).encode(), {"Content-Type": "application/json"}) as response:
+            for line in response:
+                result = json.loads(line)
+                if 'error' in result:
+                    raise RuntimeError(result['error'])
+                if result.get('done'):
+                    return
+                result['detections'] = np.array(result['detections'], dtype=np.float32).reshape(-1, 6)
+                yield result
+
+        raise RuntimeError("resposta do servidor interrompida")
+
+    def predict(self, model_path, source, **options):
+        """retorna lista de {path, shape, detections (N, 6)} para imagem, pasta ou video"""
+        return list(self.iter_predict(model_path, source, **options))
+
+    def model_names(self, model_path):
+        body = json.dumps({'model': str(Path(model_path).resolve())}).encode()
+        return self._post("/names", body, {"Content-Type": "application/json"})['names']
+
+    def predict_frame(self, model_path, frame, **options):
+        """envia um frame bgr ja decodificado e retorna as deteccoes (N, 6)"""
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "X-Model": str(Path(model_path).resolve()),
+            "X-Height": str(frame.shape[0]),
+            "X-Width": str(frame.shape[1]),
+            "X-Options": json.dumps(options)
+        }
+        response = self._post("/predict_frame", frame.tobytes(), headers)
+        return np.array(response['detections'], dtype=np.float32).reshape(-1, 6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="servidor local que mantem modelos yolo aquecidos")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-models", type=int, default=DEFAULT_MAX_MODELS)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+                        help="maximo de frames avulsos juntados num forward")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="quanto o primeiro frame do lote espera por companhia")
+    parser.add_argument("--preload", nargs="*", default=[], help="modelos (.pt) para carregar ja na partida")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.max_models, args.preload, args.max_batch, args.max_wait_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,489 @@
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+import tkinter as tk
+from tkinter import filedialog, ttk, messagebox
+
+from video_to_frames import extract_frames_from_video, load_video_index, CLASSES
+from remove_labelstudio_hash import remove_hash_from_txt_files
+from create_empty_labels import find_images_without_labels, create_empty_txt_files
+from organize_dataset import organize_dataset
+
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv')
+STATE_FILE = ".ingest_state.json"
+# saidas do organize_dataset ficam dentro da pasta de entrada e nao devem voltar para a fila
+SKIP_DIRS = {'images', 'labels'}
+
+DEFAULT_INTERVAL = 5.0
+DEFAULT_DEBOUNCE = 15.0
+# imagem sem .txt so ganha label vazio depois desse tempo parada (o export do label studio pode chegar depois)
+DEFAULT_LABEL_WAIT = 120.0
+DEFAULT_MAX_BATCH = 500
+
+
+def scan_tree(root):
+    """{caminho: (tamanho, mtime_ns)} de todos os arquivos, sem pastas ocultas e sem images/labels"""
+    snapshot = {}
+    stack = [str(root)]
+
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+
+        with entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat()
+                        snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    continue
+
+    return snapshot
+
+
+class DropFolderWatcher:
+    """
+    detecta arquivos novos na pasta de entrada e entrega em lotes
+    com o watchdog instalado (inotify no linux, ReadDirectoryChangesW no windows) acorda na hora;
+    sem ele faz varredura a cada `interval` segundos. um lote so sai depois de `debounce` segundos
+    sem nenhuma mudanca (copia do cartao sd terminou) ou quando ja tem `max_batch` arquivos estaveis
+    arquivos adiados (defer) ficam fora dos lotes ate o prazo deles
+    """
+
+    def __init__(self, root, interval=DEFAULT_INTERVAL, debounce=DEFAULT_DEBOUNCE, max_batch=DEFAULT_MAX_BATCH):
+        self.root = Path(root)
+        self.interval = interval
+        self.debounce = debounce
+        self.max_batch = max_batch
+        self.state_path = self.root / STATE_FILE
+
+        self.known = {}
+        if self.state_path.exists():
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.known = {path: tuple(sig) for path, sig in json.load(f).items()}
+
+        self.pending = {}
+        self._wake = threading.Event()
+        self._observer = self._start_observer()
+
+    @property
+    def backend(self):
+        return "eventos (watchdog)" if self._observer is not None else "varredura periodica"
+
+    def _start_observer(self):
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return None
+
+        wake = self._wake
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                wake.set()
+
+        observer = Observer()
+        observer.schedule(Handler(), str(self.root), recursive=True)
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    def wait(self, stop_event):
+        """dorme ate o proximo ciclo; com eventos acorda antes"""
+        deadline = time.monotonic() + self.interval
+        while not stop_event.is_set() and time.monotonic() < deadline:
+            if self._wake.wait(0.5):
+                # eventos chegam em rajada: deixa acumular um pouco antes de varrer
+                stop_event.wait(1.0)
+                return
+
+    def poll(self):
+        """varre e devolve o proximo lote de arquivos novos e estaveis (ou lista vazia)"""
+        woke = self._wake.is_set()
+        self._wake.clear()
+
+        # com eventos e nada pendente, nao ha por que varrer a arvore
+        if self._observer is not None and not woke and not self.pending:
+            return []
+
+        snapshot = scan_tree(self.root)
+        now = time.monotonic()
+
+        for path, sig in snapshot.items():
+            if self.known.get(path) == sig:
+                continue
+            entry = self.pending.get(path)
+            if entry is None or entry['sig'] != sig:
+                self.pending[path] = {'sig': sig, 'changed': now}
+
+        for path in [p for p in self.pending if p not in snapshot]:
+            del self.pending[path]
+
+        ready = {p: entry for p, entry in self.pending.items() if entry.get('retry', 0) <= now}
+        if not ready:
+            return []
+
+        quiet = now - max(entry['changed'] for entry in self.pending.values()) >= self.debounce
+        stable = sorted(p for p, entry in ready.items() if now - entry['changed'] >= self.debounce)
+
+        if quiet or len(stable) >= self.max_batch:
+            return [Path(p) for p in stable[:self.max_batch]]
+        return []
+
+    def age(self, path):
+        """segundos sem mudanca desde que o arquivo foi visto; None se a varredura ainda nao o viu"""
+        path = str(path)
+        entry = self.pending.get(path)
+        if entry is not None:
+            return time.monotonic() - entry['changed']
+        return float('inf') if path in self.known else None
+
+    def defer(self, paths, seconds):
+        """tira os arquivos dos lotes ate completarem `seconds` sem mudanca"""
+        for path in paths:
+            entry = self.pending.get(str(path))
+            if entry is not None:
+                entry['retry'] = entry['changed'] + seconds
+
+    def mark_done(self, paths):
+        for path in paths:
+            path = str(path)
+            entry = self.pending.pop(path, None)
+            if entry is not None:
+                self.known[path] = entry['sig']
+            elif os.path.exists(path):
+                stat = os.stat(path)
+                self.known[path] = (stat.st_size, stat.st_mtime_ns)
+
+        # o que ja saiu da pasta (movido pelo organize) nao precisa ficar no estado
+        self.known = {path: sig for path, sig in self.known.items() if os.path.exists(path)}
+
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            json.dump(self.known, f)
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+
+
+def ingest_batch(files, drop_root, frames_dir, fps=2, default_class=CLASSES[0], progress_callback=None,
+                 age=None, debounce=DEFAULT_DEBOUNCE, label_wait=DEFAULT_LABEL_WAIT):
+    """
+    processa so os arquivos novos de um lote:
+    - videos -> frames em frames_dir/<classe> (classe = pasta do video, ou default_class na raiz)
+    - .txt exportados do label studio -> tira o hash do nome
+    - pares jpg/txt parados na raiz da pasta vao para images/ e labels/
+    - imagem do lote sem .txt so ganha label vazio depois de `label_wait` segundos parada;
+      antes disso volta como pendente (o label dela pode ainda estar copiando)
+    age(caminho) -> segundos sem mudanca ou None se nunca visto (DropFolderWatcher.age);
+    sem age os arquivos do lote sao considerados parados ha tempo suficiente
+    devolve (sucesso, resultado, arquivos produzidos que nao devem voltar para a fila, imagens aguardando label)
+    """
+    drop_root = Path(drop_root)
+    files = [Path(f) for f in files]
+    age = age or (lambda path: float('inf'))
+
+    videos = [f for f in files if f.suffix.lower() in VIDEO_EXTENSIONS]
+    label_folders = {}
+    image_folders = {}
+    for f in files:
+        if f.suffix.lower() == '.txt':
+            label_folders.setdefault(f.parent, []).append(f)
+        elif f.suffix.lower() == '.jpg':
+            image_folders.setdefault(f.parent, []).append(f)
+
+    result = {
+        'videos': 0,
+        'labels_renamed': 0,
+        'empty_labels': 0,
+        'pairs_moved': 0,
+        'errors': []
+    }
+    produced = []
+    waiting = []
+    # uma varredura da pasta de frames por classe, nao uma por video
+    video_indexes = {}
+
+    for idx, video in enumerate(videos):
+        animal_class = video.parent.name if video.parent != drop_root else default_class
+
+        if progress_callback:
+            progress_callback(None, f"extraindo frames ({idx + 1}/{len(videos)}): {video.name} -> {animal_class}")
+
+        if animal_class not in video_indexes:
+            video_indexes[animal_class] = load_video_index(Path(frames_dir) / animal_class)
+        success, message = extract_frames_from_video(str(video), animal_class, fps, frames_dir,
+                                                     name_index=video_indexes[animal_class])
+        if success:
+            result['videos'] += 1
+        else:
+            result['errors'].append(message)
+
+        if progress_callback:
+            progress_callback(None, message)
+
+    def settled(path, seconds):
+        # arquivo nunca visto pela varredura (ex: label que acabou de ser renomeado) conta como parado
+        elapsed = age(path)
+        return elapsed is None or elapsed >= seconds
+
+    for folder in list(dict.fromkeys(list(label_folders) + list(image_folders))):
+        renamed = 0
+        if folder in label_folders:
+            success, renamed_result = remove_hash_from_txt_files(folder, txt_files=label_folders[folder])
+            if not success:
+                result['errors'].append(f"{folder}: {renamed_result}")
+            else:
+                renamed = renamed_result['renamed']
+                result['labels_renamed'] += renamed
+
+        # imagens do lote sem label: label vazio so depois do periodo de espera, senao ficam pendentes
+        batch_images = [p for p in image_folders.get(folder, []) if p.exists()]
+        missing, error = find_images_without_labels(folder, jpg_files=batch_images) if batch_images else ([], None)
+        expired = [p for p in missing if age(p) is not None and age(p) >= label_wait]
+        held = [p for p in missing if p not in expired]
+        waiting.extend(held)
+        if expired:
+            result['empty_labels'] += create_empty_txt_files(expired)
+
+        # pares completos na raiz: imagem vista e parada, label parado (ou recem renomeado)
+        pairs = [
+            p for p in folder.glob("*.jpg")
+            if p.with_suffix('.txt').exists() and age(p) is not None and age(p) >= debounce
+            and settled(p.with_suffix('.txt'), debounce)
+        ]
+        moved = 0
+        if pairs:
+            success, organized = organize_dataset(folder, jpg_files=pairs)
+            if success:
+                moved = organized['moved']
+                result['pairs_moved'] += moved
+
+        # labels finais (<imagem>.txt) que ficaram na raiz foram gerados aqui, nao sao novidade
+        stems = {p.stem for p in folder.glob("*.jpg")}
+        produced.extend(p for p in folder.glob("*.txt") if p.stem in stems)
+
+        if progress_callback:
+            progress_callback(None, f"{folder.name}: {renamed} labels renomeados, "
+                                    f"{len(expired)} vazios criados, {moved} pares organizados, "
+                                    f"{len(held)} imagens aguardando label")
+
+    return True, result, produced, waiting
+
+
+def watch(drop_folder, frames_dir, fps=2, default_class=CLASSES[0], interval=DEFAULT_INTERVAL,
+          debounce=DEFAULT_DEBOUNCE, stop_event=None, log=print, label_wait=DEFAULT_LABEL_WAIT):
+    """loop do modo observador; para quando stop_event for setado (ou ctrl+c no terminal)"""
+    drop_folder = Path(drop_folder).resolve()
+    frames_dir = Path(frames_dir).resolve()
+
+    if frames_dir == drop_folder or drop_folder in frames_dir.parents:
+        raise ValueError("a pasta de frames precisa ficar fora da pasta de entrada")
+
+    stop_event = stop_event or threading.Event()
+    watcher = DropFolderWatcher(drop_folder, interval=interval, debounce=debounce)
+    label_wait = max(label_wait, debounce)
+    log(f"observando {drop_folder} ({watcher.backend})")
+
+    try:
+        while not stop_event.is_set():
+            watcher.wait(stop_event)
+            batch = watcher.poll()
+            if not batch:
+                continue
+
+            log(f"\nlote com {len(batch)} arquivo(s) novo(s)")
+            start = time.perf_counter()
+            success, result, produced, waiting = ingest_batch(
+                batch, drop_folder, frames_dir, fps, default_class,
+                progress_callback=lambda value, status: log(status),
+                age=watcher.age, debounce=debounce, label_wait=label_wait
+            )
+            # imagens sem label continuam pendentes e voltam num lote quando vencer a espera
+            watcher.defer(waiting, label_wait)
+            waiting = set(waiting)
+            watcher.mark_done([p for p in batch if p not in waiting] + produced)
+
+            log(f"lote concluido em {time.perf_counter() - start:.1f}s: {result['videos']} videos, "
+                f"{result['labels_renamed']} labels renomeados, {result['empty_labels']} labels vazios, "
+                f"{result['pairs_moved']} pares organizados")
+            for error in result['errors']:
+                log(f"erro: {error}")
+    finally:
+        watcher.stop()
+
+
+class IngestWatcherGUI:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("modo observador - ingestao continua")
+        self.root.geometry("700x550")
+
+        self.drop_folder = tk.StringVar()
+        self.frames_folder = tk.StringVar()
+        self.fps = tk.IntVar(value=2)
+        self.default_class = tk.StringVar(value=CLASSES[0])
+        self.stop_event = None
+        self.is_processing = False
+
+        self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        ttk.Label(main_frame, text="pasta de entrada (onde chegam videos e exports do label studio):").grid(
+            row=0, column=0, sticky=tk.W, pady=5
+        )
+
+        drop_frame = ttk.Frame(main_frame)
+        drop_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=5)
+        ttk.Entry(drop_frame, textvariable=self.drop_folder, width=50).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(drop_frame, text="procurar", command=lambda: self.browse_folder(self.drop_folder)).pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(main_frame, text="pasta de saida dos frames (fora da pasta de entrada):").grid(
+            row=2, column=0, sticky=tk.W, pady=5
+        )
+
+        frames_frame = ttk.Frame(main_frame)
+        frames_frame.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=5)
+        ttk.Entry(frames_frame, textvariable=self.frames_folder, width=50).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(frames_frame, text="procurar", command=lambda: self.browse_folder(self.frames_folder)).pack(side=tk.LEFT, padx=5)
+
+        options_frame = ttk.Frame(main_frame)
+        options_frame.grid(row=4, column=0, sticky=tk.W, pady=5)
+        ttk.Label(options_frame, text="fps:").pack(side=tk.LEFT)
+        ttk.Spinbox(options_frame, from_=1, to=10, textvariable=self.fps, width=5).pack(side=tk.LEFT, padx=5)
+        ttk.Label(options_frame, text="classe para videos na raiz:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Combobox(options_frame, textvariable=self.default_class, values=CLASSES, state="readonly", width=20).pack(side=tk.LEFT, padx=5)
+
+        info_frame = ttk.LabelFrame(main_frame, text="o que o modo observador faz:", padding="10")
+        info_frame.grid(row=5, column=0, sticky=(tk.W, tk.E), pady=10)
+
+        ttk.Label(info_frame, text="1. videos novos em <entrada>/<Classe>/ viram frames em <saida>/<Classe>/").pack(anchor=tk.W)
+        ttk.Label(info_frame, text="2. .txt novos do label studio perdem o hash; imagens sem label ganham .txt vazio").pack(anchor=tk.W)
+        ttk.Label(info_frame, text="3. os pares da pasta vao para images/ e labels/; so arquivos novos sao processados").pack(anchor=tk.W)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=6, column=0, pady=10)
+        self.start_button = ttk.Button(button_frame, text="iniciar", command=self.start_processing)
+        self.start_button.pack(side=tk.LEFT, padx=5)
+        self.stop_button = ttk.Button(button_frame, text="parar", command=self.stop_processing, state='disabled')
+        self.stop_button.pack(side=tk.LEFT, padx=5)
+
+        log_frame = ttk.LabelFrame(main_frame, text="log", padding="5")
+        log_frame.grid(row=7, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+
+        self.log_text = tk.Text(log_frame, height=12, width=70)
+        self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.log_text.config(yscrollcommand=scrollbar.set)
+
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(7, weight=1)
+
+    def browse_folder(self, variable):
+        folder = filedialog.askdirectory(title="selecionar pasta")
+        if folder:
+            variable.set(folder)
+
+    def log_message(self, message):
+        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.see(tk.END)
+        self.root.update_idletasks()
+
+    def start_processing(self):
+        if self.is_processing:
+            messagebox.showwarning("aviso", "processamento ja em andamento")
+            return
+
+        if not self.drop_folder.get() or not Path(self.drop_folder.get()).exists():
+            messagebox.showerror("erro", "selecione uma pasta de entrada valida")
+            return
+
+        if not self.frames_folder.get():
+            messagebox.showerror("erro", "selecione a pasta de saida dos frames")
+            return
+
+        self.is_processing = True
+        self.stop_event = threading.Event()
+        self.start_button.config(state='disabled')
+        self.stop_button.config(state='normal')
+
+        thread = threading.Thread(target=self.run_watcher, daemon=True)
+        thread.start()
+
+    def run_watcher(self):
+        try:
+            watch(
+                self.drop_folder.get(), self.frames_folder.get(), self.fps.get(), self.default_class.get(),
+                stop_event=self.stop_event, log=self.log_message
+            )
+            self.log_message("observador parado")
+
+        except Exception as e:
+            self.log_message(f"\nerro durante processamento: {str(e)}")
+            messagebox.showerror("erro", f"erro durante processamento:\n{str(e)}")
+
+        finally:
+            self.is_processing = False
+            self.start_button.config(state='normal')
+            self.stop_button.config(state='disabled')
+
+    def stop_processing(self):
+        if self.stop_event is not None:
+            self.stop_event.set()
+            self.log_message("parando depois do lote atual...")
+
+    def on_close(self):
+        self.stop_processing()
+        self.root.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="modo observador: processa so o que chega na pasta de entrada")
+    parser.add_argument("--drop", help="pasta de entrada; sem isso abre a interface grafica")
+    parser.add_argument("--frames", help="pasta de saida dos frames")
+    parser.add_argument("--fps", type=int, default=2)
+    parser.add_argument("--classe", default=CLASSES[0], help="classe dos videos que chegam na raiz da entrada")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL)
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE)
+    parser.add_argument("--label-wait", type=float, default=DEFAULT_LABEL_WAIT,
+                        help="segundos que uma imagem sem .txt espera o label antes de ganhar um vazio")
+    args = parser.parse_args()
+
+    if args.drop:
+        if not args.frames:
+            parser.error("--frames e obrigatorio junto com --drop")
+        try:
+            watch(args.drop, args.frames, args.fps, args.classe, args.interval, args.debounce,
+                  label_wait=args.label_wait)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    root = tk.Tk()
+    app = IngestWatcherGUI(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+import argparse
+import os
+import threading
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+
+# arquivos .txt que nao sao labels yolo (exports do label studio, notas)
+NON_LABEL_FILES = {'classes.txt', 'notes.txt', 'readme.txt'}
+SKIP_DIRS = {'_quarentena'}
+# labels lidos e remapeados juntos por tarefa do pool; o numpy trabalha no bloco inteiro de uma vez
+CHUNK_SIZE = 512
+# modo staged: os labels novos ficam ao lado como <nome>.txt.remap ate todos darem certo
+STAGE_SUFFIX = ".remap"
+
+
+def normalize_name(name):
+    """compara nomes de classe sem acento, caixa, hifen ou underscore ('Lagarto-Teiú' == 'lagarto teiu')"""
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode()
+    return ' '.join(name.lower().replace('-', ' ').replace('_', ' ').split())
+
+
+def is_label_file(name):
+    return name.endswith('.txt') and name.lower() not in NON_LABEL_FILES
+
+
+def iter_label_files(folder):
+    """gera os .txt de label yolo da pasta e subpastas sem montar a lista inteira em memoria"""
+    stack = [Path(folder)]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith('.') and entry.name not in SKIP_DIRS:
+                        stack.append(Path(entry.path))
+                elif is_label_file(entry.name):
+                    yield Path(entry.path)
+
+
+def find_label_files(folder):
+    """todos os .txt de label yolo da pasta e subpastas"""
+    return sorted(iter_label_files(folder))
+
+
+def read_label_ids(path):
+    """ids de classe de cada caixa do label, na ordem das linhas"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return np.array([int(float(line.split(None, 1)[0])) for line in f if line.strip()], dtype=np.int64)
+
+
+def load_names(path):
+    """nomes das classes na ordem dos ids, de um data.yaml ou de um classes.txt (export do label studio)"""
+    path = Path(path)
+    if path.suffix.lower() == '.txt':
+        return [line.strip() for line in path.read_text(encoding='utf-8').splitlines() if line.strip()]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        names = (yaml.safe_load(f) or {}).get('names', [])
+    return [names[i] for i in sorted(names)] if isinstance(names, dict) else list(names)
+
+
+def names_for_folder(folder):
+    """arquivo com os nomes de classe de uma pasta exportada (data.yaml ou classes.txt), ou None"""
+    for name in ('data.yaml', 'classes.txt'):
+        candidates = [Path(folder) / name, Path(folder) / 'labels' / name]
+        for candidate in candidates:
+            if candidate.exists():
+                return candidate
+    return None
+
+
+def mapping_by_name(old_names, new_names, aliases=None):
+    """
+    tabela old_id -> new_id casando os nomes; -1 = classe removida
+    aliases {nome antigo: nome novo} junta classes (ex: 'Gato do Mato' -> 'Gato')
+    """
+    aliases = {normalize_name(k): normalize_name(v) for k, v in (aliases or {}).items()}
+    position = {normalize_name(name): i for i, name in enumerate(new_names)}
+
+    lut = np.full(len(old_names), -1, dtype=np.int64)
+    for old_id, name in enumerate(old_names):
+        key = normalize_name(name)
+        lut[old_id] = position.get(aliases.get(key, key), -1)
+    return lut
+
+
+def mapping_between(source, target, aliases=None):
+    """tabela entre dois arquivos de nomes (data.yaml/classes.txt); devolve (lut, classes removidas)"""
+    old_names = load_names(source)
+    lut = mapping_by_name(old_names, load_names(target), aliases)
+    return lut, [old_names[i] for i in np.flatnonzero(lut < 0)]
+
+
+def is_identity(lut):
+    return bool(np.array_equal(lut, np.arange(len(lut))))
+
+
+def _parse_ids(tokens):
+    ids = np.asarray(tokens)
+    try:
+        return ids.astype(np.int64)
+    except ValueError:
+        # alguns exports gravam o id como '3.0'
+        return ids.astype(np.float64).astype(np.int64)
+
+
+def remap_texts(texts, lut):
+    """
+    remapeia varios labels de uma vez: todos os ids do bloco viram um array so
+    ids fora da tabela (negativos ou >= len(lut)) nao tem classe no destino e sao removidos como os -1;
+    o resto da linha (coordenadas) nao e reformatado
+    retorna (texto novo ou None se nada mudou, caixas removidas) para cada texto
+    """
+    lut = np.asarray(lut, dtype=np.int64)
+    counts = []
+    first = []
+    rest = []
+    for text in texts:
+        lines = [line.split(None, 1) for line in text.splitlines() if line.strip()]
+        counts.append(len(lines))
+        first.extend(parts[0] for parts in lines)
+        rest.extend(parts[1].strip() if len(parts) > 1 else '' for parts in lines)
+
+    if not first:
+        return [(None, 0)] * len(texts)
+
+    ids = _parse_ids(first)
+    inside = (ids >= 0) & (ids < len(lut))
+    new_ids = np.full_like(ids, -1)
+    new_ids[inside] = lut[ids[inside]]
+    keep = new_ids >= 0
+    touched = (new_ids != ids) | ~keep
+
+    owner = np.repeat(np.arange(len(texts)), counts)
+    changed = np.bincount(owner, weights=touched, minlength=len(texts)) > 0
+    dropped = np.bincount(owner, weights=~keep, minlength=len(texts)).astype(np.int64)
+
+    results = []
+    starts = np.concatenate([[0], np.cumsum(counts)])
+    new_ids = new_ids.tolist()
+    for i in range(len(texts)):
+        if not changed[i]:
+            results.append((None, 0))
+            continue
+        lines = [
+            f"{new_ids[j]} {rest[j]}".rstrip()
+            for j in range(starts[i], starts[i + 1]) if keep[j]
+        ]
+        results.append(("\n".join(lines) + ("\n" if lines else ""), int(dropped[i])))
+    return results
+
+
+def _write_atomic(path, text):
+    tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def remap_chunk(paths, lut, destinations=None, stage=False):
+    """
+    le um bloco de labels, remapeia tudo junto e grava so os que mudaram (temporario + troca)
+    destinations opcional: grava em outro caminho (ex: merge), mudando ou nao
+    stage: grava os que mudaram em <label>.remap sem tocar no original (ver commit_staged)
+    retorna (labels alterados, caixas removidas, erros)
+    """
+    texts = []
+    readable = []
+    errors = []
+    for i, path in enumerate(paths):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                texts.append(f.read())
+            readable.append(i)
+        except Exception as e:
+            errors.append((str(path), str(e)))
+
+    try:
+        results = remap_texts(texts, lut)
+    except ValueError as e:
+        # algum label do bloco tem id invalido: refaz um a um para achar qual
+        if len(texts) == 1:
+            return [], 0, errors + [(str(paths[readable[0]]), str(e))]
+        changed, dropped = [], 0
+        for i in readable:
+            c, d, err = remap_chunk([paths[i]], lut, [destinations[i]] if destinations else None, stage)
+            changed.extend(c)
+            dropped += d
+            errors.extend(err)
+        return changed, dropped, errors
+
+    changed = []
+    dropped = 0
+    for i, text, (new_text, removed) in zip(readable, texts, results):
+        target = Path(destinations[i]) if destinations else Path(paths[i])
+        if stage:
+            target = target.with_name(target.name + STAGE_SUFFIX)
+        try:
+            if new_text is not None:
+                _write_atomic(target, new_text)
+                changed.append(str(paths[i]))
+                dropped += removed
+            elif destinations:
+                _write_atomic(target, text)
+        except Exception as e:
+            errors.append((str(paths[i]), str(e)))
+
+    return changed, dropped, errors
+
+
+def commit_staged(changed, keep):
+    """troca cada label pela versao .remap (keep=True) ou so apaga as versoes .remap (keep=False)"""
+    errors = []
+    for path in changed:
+        staged = f"{path}{STAGE_SUFFIX}"
+        try:
+            if keep:
+                os.replace(staged, path)
+            else:
+                os.remove(staged)
+        except OSError as e:
+            errors.append((path, str(e)))
+    return errors
+
+
+def remap_labels(label_files, lut, workers=None, chunk_size=CHUNK_SIZE, progress_callback=None, atomic=False):
+    """
+    aplica a tabela em todos os labels; label_files pode ser um gerador (iter_label_files),
+    so alguns blocos ficam em memoria por vez
+    atomic: tudo ou nada. os labels novos ficam em <label>.remap e so substituem os originais
+    se nenhum der erro; com erro nada muda (stats['committed'] = False) e rodar de novo e seguro
+    """
+    lut = np.asarray(lut, dtype=np.int64)
+    workers = workers or min(os.cpu_count() or 2, 16)
+    total = len(label_files) if hasattr(label_files, '__len__') else None
+
+    stats = {'files': 0, 'changed': 0, 'dropped_boxes': 0, 'errors': [], 'committed': True}
+    if is_identity(lut):
+        # mesma ordem dos dois lados: nada a reescrever
+        stats['files'] = total or 0
+        return True, stats
+
+    # no modo atomic guarda o caminho dos alterados (so strings) para trocar tudo no final
+    staged = []
+
+    def collect(future):
+        changed, dropped, errors = future.result()
+        stats['changed'] += len(changed)
+        if atomic:
+            staged.extend(changed)
+        stats['dropped_boxes'] += dropped
+        stats['errors'].extend(errors)
+
+    pending = deque()
+    chunk = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for path in label_files:
+            chunk.append(path)
+            if len(chunk) < chunk_size:
+                continue
+
+            pending.append(executor.submit(remap_chunk, chunk, lut, None, atomic))
+            stats['files'] += len(chunk)
+            chunk = []
+
+            # limita o que esta enfileirado: memoria constante mesmo com milhoes de arquivos
+            while len(pending) > workers * 2:
+                collect(pending.popleft())
+
+            if progress_callback:
+                value = stats['files'] / total * 100 if total else None
+                progress_callback(value, f"labels reescritos: {stats['files']}" + (f"/{total}" if total else ""))
+
+        if chunk:
+            pending.append(executor.submit(remap_chunk, chunk, lut, None, atomic))
+            stats['files'] += len(chunk)
+
+        while pending:
+            collect(pending.popleft())
+
+    if atomic:
+        stats['committed'] = not stats['errors']
+        stats['errors'].extend(commit_staged(staged, keep=stats['committed']))
+        if not stats['committed']:
+            stats['changed'] = 0
+            stats['dropped_boxes'] = 0
+
+    if progress_callback:
+        progress_callback(100, f"labels reescritos: {stats['files']}")
+    return True, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="reescreve os ids de classe dos labels de uma ordem de classes para outra")
+    parser.add_argument("labels", help="pasta com os labels (subpastas incluidas)")
+    parser.add_argument("--from", dest="source", required=True, help="data.yaml ou classes.txt da ordem atual")
+    parser.add_argument("--to", dest="target", required=True, help="data.yaml ou classes.txt da ordem desejada")
+    parser.add_argument("--alias", action="append", default=[], help="'antigo=novo' junta classes (pode repetir)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    aliases = dict(a.split('=', 1) for a in args.alias)
+    lut, removed = mapping_between(args.source, args.target, aliases)
+    if removed:
+        print(f"classes removidas (caixas apagadas): {', '.join(removed)}")
+
+    calls = [0]
+
+    def report(value, status):
+        # um aviso a cada ~50 mil arquivos
+        calls[0] += 1
+        if calls[0] % 100 == 0:
+            print(status)
+
+    start = time.perf_counter()
+    success, stats = remap_labels(iter_label_files(args.labels), lut, workers=args.workers, progress_callback=report)
+    elapsed = time.perf_counter() - start
+    print(f"{stats['files']} labels, {stats['changed']} alterados, {stats['dropped_boxes']} caixas removidas em {elapsed:.1f}s")
+    for path, error in stats['errors']:
+        print(f"erro em {path}: {error}")
+
+
+if __name__ == "__main__":
+    main()
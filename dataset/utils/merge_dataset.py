@@ -4,13 +4,24 @@ import shutil
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 import threading
+import itertools
+import sys
 
+from file_stream import ProgressEstimate, iter_files, iter_names
+from label_remap import NON_LABEL_FILES, is_identity, mapping_between, names_for_folder, remap_labels
 
-def merge_folders(folders, output_folder, progress_callback=None):
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def merge_folders(folders, output_folder, progress_callback=None, class_maps=None):
     """
     consolida arquivos de multiplas pastas selecionadas
     separa automaticamente images (.jpg, .jpeg, .png) e labels (.txt)
+    class_maps opcional {pasta: tabela old_id -> new_id}: os labels copiados daquela pasta
+    tem os ids reescritos no final (classes com -1 sao removidas)
     """
+    class_maps = {str(Path(k)): v for k, v in (class_maps or {}).items() if not is_identity(v)}
     output_path = Path(output_folder)
     
     output_images = output_path / "images"
@@ -23,64 +34,80 @@ def merge_folders(folders, output_folder, progress_callback=None):
     total_labels = 0
     skipped_images = 0
     skipped_labels = 0
+    # so o nome (internado) dos labels copiados: o destino e sempre output_labels
+    copied_labels = {folder: [] for folder in class_maps}
     
-    all_files = []
+    sources = [str(Path(folder)) for folder in folders if Path(folder).exists()]
+    # a saida pode estar dentro de uma origem: nao rele o que acabou de ser copiado
+    skip = [output_path]
+    estimate = ProgressEstimate(itertools.chain.from_iterable(
+        iter_names(folder, IMAGE_EXTENSIONS + ('.txt',), recursive=True, skip=skip) for folder in sources
+    ))
     
-    # Varre todas as pastas recursivamente
-    for folder in folders:
-        folder_path = Path(folder)
-        if folder_path.exists():
-            # Pega todas as imagens recursivamente
-            all_files.extend([(f, 'image') for f in folder_path.rglob("*.jpg")])
-            all_files.extend([(f, 'image') for f in folder_path.rglob("*.jpeg")])
-            all_files.extend([(f, 'image') for f in folder_path.rglob("*.png")])
-            # Pega todos os labels recursivamente
-            all_files.extend([(f, 'label') for f in folder_path.rglob("*.txt")])
+    # varre e copia ao mesmo tempo, pasta por pasta, sem montar a lista de arquivos
+    for folder in sources:
+        mapped = folder in copied_labels
+        for entry in iter_files(folder, IMAGE_EXTENSIONS + ('.txt',), recursive=True, skip=skip):
+            estimate.step()
+            is_image = entry.ext != '.txt'
+            
+            if not is_image and mapped and entry.name.lower() in NON_LABEL_FILES:
+                # classes.txt da pasta descreve a ordem antiga, nao serve no destino remapeado
+                continue
+            
+            dest_path = (output_images if is_image else output_labels) / entry.name
+            
+            try:
+                if dest_path.exists():
+                    if is_image:
+                        skipped_images += 1
+                    else:
+                        skipped_labels += 1
+                    
+                    if progress_callback and estimate.due():
+                        progress_callback(estimate.percent(), f"pulado (ja existe, {estimate.label()}): {entry.name}")
+                else:
+                    shutil.copy2(entry.path, dest_path)
+                    
+                    if is_image:
+                        total_images += 1
+                    else:
+                        total_labels += 1
+                        if mapped:
+                            copied_labels[folder].append(sys.intern(entry.name))
+                    
+                    if progress_callback and estimate.due():
+                        progress_callback(estimate.percent(), f"copiado ({estimate.label()}): {entry.name}")
+            
+            except Exception as e:
+                if progress_callback:
+                    progress_callback(None, f"erro ao copiar {entry.name}: {str(e)}")
     
-    if not all_files:
-        return False, "nenhum arquivo encontrado nas pastas selecionadas"
+    estimate.stop()
     
-    total_files = len(all_files)
+    if not estimate.done:
+        return False, "nenhum arquivo encontrado nas pastas selecionadas"
     
-    for idx, (file_path, file_type) in enumerate(all_files):
-        if file_type == 'image':
-            dest_folder = output_images
-        else:
-            dest_folder = output_labels
-        
-        dest_path = dest_folder / file_path.name
-        
-        try:
-            if dest_path.exists():
-                if file_type == 'image':
-                    skipped_images += 1
-                else:
-                    skipped_labels += 1
-                
-                if progress_callback:
-                    progress = (idx + 1) / total_files * 100
-                    progress_callback(progress, f"pulado (ja existe): {file_path.name}")
-            else:
-                shutil.copy2(file_path, dest_path)
-                
-                if file_type == 'image':
-                    total_images += 1
-                else:
-                    total_labels += 1
-                
-                if progress_callback:
-                    progress = (idx + 1) / total_files * 100
-                    progress_callback(progress, f"copiado: {file_path.name}")
-        
-        except Exception as e:
-            if progress_callback:
-                progress_callback(None, f"erro ao copiar {file_path.name}: {str(e)}")
+    # etapa opcional: ids de classe de cada pasta para a ordem do destino
+    remapped = 0
+    dropped_boxes = 0
+    for folder, names in copied_labels.items():
+        if progress_callback:
+            progress_callback(None, f"remapeando classes de {Path(folder).name} ({len(names)} labels)...")
+        success, stats = remap_labels((output_labels / name for name in names), class_maps[folder])
+        remapped += stats['changed']
+        dropped_boxes += stats['dropped_boxes']
+        if progress_callback:
+            for path, error in stats['errors']:
+                progress_callback(None, f"erro ao remapear {Path(path).name}: {error}")
     
     return True, {
         'images_copied': total_images,
         'labels_copied': total_labels,
         'images_skipped': skipped_images,
         'labels_skipped': skipped_labels,
+        'labels_remapped': remapped,
+        'boxes_dropped': dropped_boxes,
         'folders_count': len(folders),
         'output_images': str(output_images),
         'output_labels': str(output_labels)
@@ -94,6 +121,7 @@ class MergeDatasetGUI:
         self.root.geometry("800x600")
         
         self.output_folder = tk.StringVar()
+        self.target_yaml = tk.StringVar()
         self.is_processing = False
         
         self.folders = []
@@ -136,9 +164,20 @@ class MergeDatasetGUI:
         ttk.Entry(output_frame, textvariable=self.output_folder, width=70).pack(side=tk.LEFT, fill=tk.X, expand=True)
         ttk.Button(output_frame, text="procurar", command=self.browse_output_folder).pack(side=tk.LEFT, padx=5)
         
+        # Remapeamento opcional de classes
+        ttk.Label(main_frame, text="data.yaml de destino (opcional: ids de cada pasta sao remapeados pelo data.yaml/classes.txt dela):").grid(
+            row=3, column=0, sticky=tk.W, pady=5
+        )
+        
+        yaml_frame = ttk.Frame(main_frame)
+        yaml_frame.grid(row=4, column=0, sticky=(tk.W, tk.E), pady=5)
+        
+        ttk.Entry(yaml_frame, textvariable=self.target_yaml, width=70).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(yaml_frame, text="procurar", command=self.browse_target_yaml).pack(side=tk.LEFT, padx=5)
+        
         # Info
         info_frame = ttk.LabelFrame(main_frame, text="o que o script faz:", padding="10")
-        info_frame.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=10)
+        info_frame.grid(row=5, column=0, sticky=(tk.W, tk.E), pady=10)
         
         ttk.Label(info_frame, text="1. você seleciona as pastas que quer mergear (pode adicionar quantas quiser)").pack(anchor=tk.W, pady=2)
         ttk.Label(info_frame, text="2. varre RECURSIVAMENTE todas as pastas procurando arquivos").pack(anchor=tk.W, pady=2)
@@ -151,18 +190,18 @@ class MergeDatasetGUI:
             text="🚀 mergear tudo", 
             command=self.start_processing
         )
-        self.process_button.grid(row=4, column=0, pady=15)
+        self.process_button.grid(row=6, column=0, pady=15)
         
-        ttk.Label(main_frame, text="progresso:").grid(row=5, column=0, sticky=tk.W, pady=5)
+        ttk.Label(main_frame, text="progresso:").grid(row=7, column=0, sticky=tk.W, pady=5)
         
         self.progress_bar = ttk.Progressbar(main_frame, mode='determinate', length=400)
-        self.progress_bar.grid(row=6, column=0, sticky=(tk.W, tk.E), pady=5)
+        self.progress_bar.grid(row=8, column=0, sticky=(tk.W, tk.E), pady=5)
         
         self.status_label = ttk.Label(main_frame, text="aguardando...", foreground="blue")
-        self.status_label.grid(row=7, column=0, sticky=tk.W, pady=5)
+        self.status_label.grid(row=9, column=0, sticky=tk.W, pady=5)
         
         log_frame = ttk.LabelFrame(main_frame, text="log", padding="5")
-        log_frame.grid(row=8, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+        log_frame.grid(row=10, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
         
         self.log_text = tk.Text(log_frame, height=8, width=85)
         self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -170,7 +209,7 @@ class MergeDatasetGUI:
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(0, weight=1)
         main_frame.columnconfigure(0, weight=1)
-        main_frame.rowconfigure(8, weight=1)
+        main_frame.rowconfigure(10, weight=1)
     
     def add_folder(self):
         folder = filedialog.askdirectory(title="selecionar pasta")
@@ -203,6 +242,28 @@ class MergeDatasetGUI:
             self.output_folder.set(folder)
             self.log_message(f"pasta destino: {folder}")
     
+    def browse_target_yaml(self):
+        path = filedialog.askopenfilename(title="selecionar data.yaml de destino", filetypes=[("yaml", "*.yaml"), ("todos", "*.*")])
+        if path:
+            self.target_yaml.set(path)
+            self.log_message(f"data.yaml de destino: {path}")
+    
+    def build_class_maps(self):
+        """tabela de ids por pasta, a partir do data.yaml/classes.txt de cada uma"""
+        class_maps = {}
+        for folder in self.folders:
+            source = names_for_folder(folder)
+            if source is None:
+                self.log_message(f"⚠ {folder}: sem data.yaml/classes.txt, labels copiados sem remapear")
+                continue
+            
+            lut, removed = mapping_between(source, self.target_yaml.get())
+            class_maps[folder] = lut
+            self.log_message(f"   • {Path(folder).name}: classes de {source.name}")
+            if removed:
+                self.log_message(f"     classes fora do destino (caixas removidas): {', '.join(removed)}")
+        return class_maps
+    
     def log_message(self, message):
         self.log_text.insert(tk.END, message + "\n")
         self.log_text.see(tk.END)
@@ -244,12 +305,19 @@ class MergeDatasetGUI:
             self.log_message(f"📁 pastas selecionadas: {len(self.folders)}")
             for folder in self.folders:
                 self.log_message(f"   • {folder}")
+            
+            class_maps = None
+            if self.target_yaml.get():
+                self.log_message("🔁 remapeando classes para o data.yaml de destino:")
+                class_maps = self.build_class_maps()
+            
             self.update_progress(0, "varrendo pastas...")
             
             success, result = merge_folders(
                 self.folders,
                 output_folder,
-                progress_callback=self.update_progress
+                progress_callback=self.update_progress,
+                class_maps=class_maps
             )
             
             if not success:
@@ -263,6 +331,8 @@ class MergeDatasetGUI:
             self.log_message(f"  • imagens copiadas: {result['images_copied']}")
             self.log_message(f"  • labels copiados: {result['labels_copied']}")
             self.log_message(f"  • arquivos pulados: {result['images_skipped'] + result['labels_skipped']}")
+            if class_maps:
+                self.log_message(f"  • labels remapeados: {result['labels_remapped']} (caixas removidas: {result['boxes_dropped']})")
             self.log_message(f"\n📂 destino:")
             self.log_message(f"  • {result['output_images']}")
             self.log_message(f"  • {result['output_labels']}")
@@ -0,0 +1,167 @@
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+DEFAULT_MAX_BATCH = 8
+DEFAULT_MAX_WAIT_MS = 5.0
+METRICS_WINDOW = 2000
+
+
+class _Request:
+    __slots__ = ('frame', 'options', 'group', 'future', 'enqueued')
+
+    def __init__(self, frame, options):
+        self.frame = frame
+        self.options = options
+        # so da pra juntar no mesmo forward requisicoes com as mesmas opcoes (imgsz, conf, iou...)
+        self.group = json.dumps(options, sort_keys=True)
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class BatchScheduler:
+    """
+    junta requisicoes de um frame so em lotes dinamicos para o mesmo modelo yolo
+    o lote fecha quando atinge max_batch ou quando a primeira requisicao espera max_wait_ms
+    """
+
+    def __init__(self, model, lock=None, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.model = model
+        self.lock = lock or threading.Lock()
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._carry = deque()
+        self._latencies = deque(maxlen=METRICS_WINDOW)
+        self._batch_sizes = deque(maxlen=METRICS_WINDOW)
+        self._metrics_lock = threading.Lock()
+        # submit e close usam o mesmo lock: nada entra na fila depois do sentinela
+        self._submit_lock = threading.Lock()
+        self._stopped = False
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, frame, **options):
+        """enfileira um frame e devolve um Future com o result do ultralytics"""
+        request = _Request(frame, options)
+        with self._submit_lock:
+            if self._stopped:
+                request.future.set_exception(RuntimeError("agendador fechado (modelo removido da memoria)"))
+            else:
+                self._queue.put(request)
+        return request.future
+
+    def predict(self, frame, timeout=None, **options):
+        return self.submit(frame, **options).result(timeout)
+
+    def _collect(self):
+        first = self._carry.popleft() if self._carry else self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+
+        # requisicoes que sobraram do lote anterior e tem as mesmas opcoes entram primeiro
+        pending = deque()
+        while self._carry:
+            request = self._carry.popleft()
+            if request is not None and request.group == first.group and len(batch) < self.max_batch:
+                batch.append(request)
+            else:
+                pending.append(request)
+        self._carry = pending
+
+        deadline = first.enqueued + self.max_wait
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+
+            # o que ja esta na fila entra no lote mesmo depois do prazo; so nao esperamos mais
+            try:
+                if remaining > 0:
+                    request = self._queue.get(timeout=remaining)
+                else:
+                    request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if request is None:
+                self._carry.append(None)
+                break
+
+            if request.group == first.group:
+                batch.append(request)
+            else:
+                # opcoes diferentes vao para o proximo lote, sem perder a ordem
+                self._carry.append(request)
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+
+            try:
+                with self.lock:
+                    results = self.model([r.frame for r in batch], verbose=False, **batch[0].options)
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            done = time.perf_counter()
+            with self._metrics_lock:
+                self._batch_sizes.append(len(batch))
+                self._latencies.extend(done - r.enqueued for r in batch)
+
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+
+        # o que sobrou na fila nao vai mais rodar: falha em vez de deixar o chamador esperando para sempre
+        leftovers = list(self._carry)
+        self._carry.clear()
+        while True:
+            try:
+                leftovers.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for request in leftovers:
+            if request is not None and not request.future.done():
+                request.future.set_exception(RuntimeError("agendador fechado (modelo removido da memoria)"))
+
+    def metrics(self):
+        """latencia p50/p99 (ms), tamanho medio do lote e ocupacao (lote / max_batch)"""
+        with self._metrics_lock:
+            latencies = np.array(self._latencies, dtype=np.float64) * 1000
+            sizes = np.array(self._batch_sizes, dtype=np.float64)
+
+        if len(latencies) == 0:
+            return {'requests': 0, 'batches': 0}
+
+        return {
+            'requests': int(len(latencies)),
+            'batches': int(len(sizes)),
+            'latency_p50_ms': round(float(np.percentile(latencies, 50)), 2),
+            'latency_p99_ms': round(float(np.percentile(latencies, 99)), 2),
+            'mean_batch': round(float(sizes.mean()), 2),
+            'batch_fill': round(float(sizes.mean() / self.max_batch), 3),
+            'queue_depth': self._queue.qsize()
+        }
+
+    def close(self):
+        with self._submit_lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._queue.put(None)
+        self._worker.join(timeout=5)
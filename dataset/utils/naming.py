@@ -0,0 +1,359 @@
+import json
+import math
+import re
+from pathlib import Path
+import tkinter as tk
+from tkinter import filedialog, ttk, messagebox
+import threading
+
+from hashing import file_digest
+
+
+MIN_ID_LENGTH = 8
+MAX_ID_LENGTH = 32
+# nomes antigos do renomeador: classe_periodo_<4 hex aleatorios>
+LEGACY_NAME_PATTERN = re.compile(r'^(?P<prefix>.+_(?:dia|noite))_(?P<id>[0-9a-f]{4})$')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def initial_length(count):
+    """
+    menor tamanho (em hex) que deixa a chance de qualquer colisao abaixo de ~1%
+    aniversario: p ~ n^2 / (2 * 16^L)
+    """
+    if count < 2:
+        return MIN_ID_LENGTH
+    length = math.ceil(math.log(50 * count * count, 16))
+    return max(MIN_ID_LENGTH, min(length, MAX_ID_LENGTH))
+
+
+class NameIndex:
+    """
+    indice em memoria dos nomes ja usados numa pasta
+    o id de cada arquivo e um prefixo do digest do conteudo; se o prefixo ja estiver em uso
+    por outro conteudo, o id cresce ate ficar unico (mesmo conteudo -> mesmo nome, sempre)
+    manifest_path opcional guarda {nome: digest} para reconhecer reprocessamentos do mesmo arquivo
+    """
+
+    def __init__(self, names=(), manifest_path=None):
+        self.names = {name: None for name in names}
+        self.manifest_path = Path(manifest_path) if manifest_path else None
+        # digest -> nomes ja dados a esse conteudo (um por prefixo), para reconhecer em O(1)
+        self.by_digest = {}
+
+        if self.manifest_path and self.manifest_path.exists():
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                for name, digest in json.load(f).items():
+                    self.add(name, digest)
+
+    @classmethod
+    def from_folder(cls, folder, extensions=IMAGE_EXTENSIONS, manifest_path=None):
+        folder = Path(folder)
+        names = [p.stem for p in folder.iterdir() if p.suffix.lower() in extensions] if folder.exists() else []
+        return cls(names, manifest_path)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, digest=None):
+        self.discard(name)
+        self.names[name] = digest
+        if digest is not None:
+            self.by_digest.setdefault(digest, []).append(name)
+
+    def discard(self, name):
+        digest = self.names.pop(name, None)
+        if digest is not None:
+            self.by_digest[digest].remove(name)
+            if not self.by_digest[digest]:
+                del self.by_digest[digest]
+
+    def assign(self, prefix, digest, separator="_"):
+        """nome unico '<prefixo><separador><id>' para o conteudo com este digest"""
+        def candidate(length):
+            return f"{prefix}{separator}{digest[:length]}" if prefix else digest[:length]
+
+        # conteudo ja registrado (ex: manifest de uma execucao anterior) mantem o mesmo nome,
+        # qualquer que seja o tamanho do id com que foi criado
+        head = f"{prefix}{separator}" if prefix else ""
+        for name in self.by_digest.get(digest, ()):
+            if name.startswith(head) and digest.startswith(name[len(head):]):
+                return name
+
+        start = initial_length(len(self.names) + 1)
+
+        for length in range(start, len(digest) + 1, 2):
+            name = candidate(length)
+            if name not in self.names:
+                self.add(name, digest)
+                return name
+
+        raise ValueError(f"nao foi possivel gerar nome unico para {prefix} ({digest})")
+
+    def save(self):
+        if self.manifest_path is None:
+            return
+        known = {name: digest for name, digest in self.names.items() if digest is not None}
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(known, f, indent=1)
+
+
+def plan_dataset_rename(folder_path, progress_callback=None):
+    """
+    monta o plano (sem mexer em nada) para trocar os hashes aleatorios de 4 hex
+    dos nomes classe_periodo_xxxx por ids derivados do conteudo
+    """
+    folder = Path(folder_path)
+
+    if not folder.exists():
+        return False, f"pasta nao encontrada: {folder_path}"
+
+    images = sorted(p for p in folder.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+
+    if not images:
+        return False, "nenhuma imagem encontrada na pasta"
+
+    legacy = [p for p in images if LEGACY_NAME_PATTERN.match(p.stem)]
+
+    if not legacy:
+        return False, "nenhuma imagem no formato antigo encontrada (classe_periodo_xxxx.jpg)"
+
+    # os nomes que nao vao mudar continuam ocupados no indice
+    legacy_set = set(legacy)
+    index = NameIndex(p.stem for p in images if p not in legacy_set)
+    plan = []
+    planned = set()
+    duplicates = []
+
+    for idx, image in enumerate(legacy):
+        prefix = LEGACY_NAME_PATTERN.match(image.stem).group('prefix')
+        new_name = index.assign(prefix, file_digest(image)) + image.suffix.lower()
+
+        # mesmo conteudo da mesma classe/periodo: e copia, fica com o nome antigo para revisao
+        if new_name in planned:
+            duplicates.append(image.name)
+        else:
+            planned.add(new_name)
+            plan.append((image, image.with_name(new_name)))
+
+        if progress_callback:
+            progress = (idx + 1) / len(legacy) * 50
+            progress_callback(progress, f"calculando id: {image.name}")
+
+    return True, {
+        'plan': plan,
+        'duplicates': duplicates,
+        'ignored': len(images) - len(legacy)
+    }
+
+
+def apply_plan(plan, progress_callback=None):
+    """
+    aplica o plano em duas fases (nome temporario e depois o definitivo) para um arquivo
+    nunca sobrescrever outro do mesmo lote; o .txt do yolo acompanha a imagem
+    """
+    renamed = 0
+    errors = []
+    staged = []
+
+    for old_path, new_path in plan:
+        temp_path = old_path.with_name(f".renomeando_{old_path.name}")
+        try:
+            old_path.rename(temp_path)
+            staged.append((old_path, temp_path, new_path))
+        except Exception as e:
+            errors.append(f"{old_path.name}: {str(e)}")
+
+    for idx, (old_path, temp_path, new_path) in enumerate(staged):
+        try:
+            if new_path.exists():
+                temp_path.rename(old_path)
+                raise FileExistsError(f"{new_path.name} ja existe")
+
+            temp_path.rename(new_path)
+
+            old_label = old_path.with_suffix('.txt')
+            if old_label.exists():
+                old_label.rename(new_path.with_suffix('.txt'))
+
+            renamed += 1
+
+            if progress_callback:
+                progress = 50 + (idx + 1) / len(staged) * 50
+                progress_callback(progress, f"renomeado: {old_path.name} -> {new_path.name}")
+
+        except Exception as e:
+            errors.append(f"{old_path.name}: {str(e)}")
+            if progress_callback:
+                progress_callback(None, f"erro ao renomear {old_path.name}: {str(e)}")
+
+    return renamed, errors
+
+
+def rename_dataset(folder_path, dry_run=False, progress_callback=None):
+    success, result = plan_dataset_rename(folder_path, progress_callback)
+
+    if not success:
+        return False, result
+
+    renamed, errors = (0, []) if dry_run else apply_plan(result['plan'], progress_callback)
+
+    return True, {
+        'planned': len(result['plan']),
+        'renamed': renamed,
+        'ignored': result['ignored'],
+        'duplicates': result['duplicates'],
+        'errors': errors,
+        'examples': [(old.name, new.name) for old, new in result['plan'][:5]]
+    }
+
+
+class DatasetRenamerGUI:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("renomear dataset - ids por conteudo")
+        self.root.geometry("650x450")
+
+        self.folder_path = tk.StringVar()
+        self.dry_run = tk.BooleanVar(value=True)
+        self.is_processing = False
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        ttk.Label(main_frame, text="selecionar pasta com imagens classe_periodo_xxxx.jpg:").grid(
+            row=0, column=0, sticky=tk.W, pady=5
+        )
+
+        folder_frame = ttk.Frame(main_frame)
+        folder_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=5)
+
+        ttk.Entry(folder_frame, textvariable=self.folder_path, width=50).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(folder_frame, text="procurar", command=self.browse_folder).pack(side=tk.LEFT, padx=5)
+
+        info_frame = ttk.LabelFrame(main_frame, text="o que o script faz:", padding="10")
+        info_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=10)
+
+        ttk.Label(info_frame, text="1. troca o hash aleatorio de 4 caracteres por um id do conteudo da imagem").pack(anchor=tk.W)
+        ttk.Label(info_frame, text="2. o id cresce sozinho se ja existir outro arquivo com o mesmo prefixo").pack(anchor=tk.W)
+        ttk.Label(info_frame, text="3. o .txt com o mesmo nome e renomeado junto").pack(anchor=tk.W)
+
+        ttk.Checkbutton(main_frame, text="simular (so mostra o plano, nao renomeia)", variable=self.dry_run).grid(
+            row=3, column=0, sticky=tk.W
+        )
+
+        self.process_button = ttk.Button(main_frame, text="renomear", command=self.start_processing)
+        self.process_button.grid(row=4, column=0, pady=10)
+
+        self.progress_bar = ttk.Progressbar(main_frame, mode='determinate', length=400)
+        self.progress_bar.grid(row=5, column=0, sticky=(tk.W, tk.E), pady=5)
+
+        self.status_label = ttk.Label(main_frame, text="aguardando...", foreground="blue")
+        self.status_label.grid(row=6, column=0, sticky=tk.W, pady=5)
+
+        log_frame = ttk.LabelFrame(main_frame, text="log", padding="5")
+        log_frame.grid(row=7, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+
+        self.log_text = tk.Text(log_frame, height=10, width=70)
+        self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.log_text.config(yscrollcommand=scrollbar.set)
+
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(7, weight=1)
+
+    def browse_folder(self):
+        folder = filedialog.askdirectory(title="selecionar pasta com imagens")
+        if folder:
+            self.folder_path.set(folder)
+            self.log_message(f"pasta selecionada: {folder}")
+
+    def log_message(self, message):
+        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.see(tk.END)
+        self.root.update_idletasks()
+
+    def update_progress(self, value, status):
+        if value is not None:
+            self.progress_bar['value'] = value
+        if status:
+            self.status_label.config(text=status)
+        self.root.update_idletasks()
+
+    def start_processing(self):
+        if self.is_processing:
+            messagebox.showwarning("aviso", "processamento ja em andamento")
+            return
+
+        folder = self.folder_path.get()
+
+        if not folder:
+            messagebox.showerror("erro", "selecione uma pasta primeiro")
+            return
+
+        if not self.dry_run.get():
+            if not messagebox.askyesno("confirmar", "as imagens e labels serao RENOMEADOS.\ncontinuar?"):
+                return
+
+        self.is_processing = True
+        self.process_button.config(state='disabled')
+        self.progress_bar['value'] = 0
+        self.log_text.delete(1.0, tk.END)
+
+        thread = threading.Thread(target=self.process_folder, args=(folder, self.dry_run.get()))
+        thread.start()
+
+    def process_folder(self, folder_path, dry_run):
+        try:
+            self.log_message("calculando ids a partir do conteudo...")
+            self.update_progress(0, "processando...")
+
+            success, result = rename_dataset(folder_path, dry_run, progress_callback=self.update_progress)
+
+            if not success:
+                self.log_message(f"erro: {result}")
+                messagebox.showerror("erro", result)
+                return
+
+            self.log_message("\nexemplos:")
+            for old_name, new_name in result['examples']:
+                self.log_message(f"  {old_name} -> {new_name}")
+
+            self.log_message(f"\nimagens no plano: {result['planned']}")
+            self.log_message(f"renomeadas: {result['renamed']}")
+            self.log_message(f"ignoradas (fora do formato antigo): {result['ignored']}")
+            for name in result['duplicates']:
+                self.log_message(f"duplicada (mesmo conteudo de outra imagem, nao renomeada): {name}")
+            for error in result['errors']:
+                self.log_message(f"erro: {error}")
+
+            self.update_progress(100, "simulacao concluida" if dry_run else "concluido com sucesso")
+
+        except Exception as e:
+            self.log_message(f"\nerro durante processamento: {str(e)}")
+            messagebox.showerror("erro", f"erro durante processamento:\n{str(e)}")
+
+        finally:
+            self.is_processing = False
+            self.process_button.config(state='normal')
+
+
+def main():
+    root = tk.Tk()
+    app = DatasetRenamerGUI(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,70 +4,68 @@ import shutil
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 import threading
+import sys
 
+from file_stream import ProgressEstimate, has_files, iter_files, iter_names
 
-def organize_images_by_class(folder_path, progress_callback=None):
 
+def organize_images_by_class(folder_path, progress_callback=None):
+    """
+    move cada imagem para a pasta da classe conforme le o diretorio (sem listar tudo antes)
+    o total do progresso e estimado por uma contagem em paralelo
+    """
     folder = Path(folder_path)
     
     if not folder.exists():
         return False, f"pasta nao encontrada: {folder_path}"
     
-    jpg_files = list(folder.glob("*.jpg"))
-    
-    if not jpg_files:
+    if not has_files(folder, ('.jpg',)):
         return False, "nenhuma imagem .jpg encontrada na pasta"
     
-    classes_dict = {}
+    parent_folder = folder.parent
+    classes_count = {}
+    moved_count = 0
+    estimate = ProgressEstimate(iter_names(folder, ('.jpg',)))
     
-    for jpg_file in jpg_files:
-        parts = jpg_file.stem.split('_')
+    # as imagens saem da pasta lida (vao para a pasta pai), entao a varredura nao as reve
+    for entry in iter_files(folder, ('.jpg',)):
+        estimate.step()
+        parts = entry.stem.split('_')
         
         if len(parts) < 2:
             continue
         
-        class_name = parts[0].lower()
+        class_name = sys.intern(parts[0].lower())
+        class_folder = parent_folder / class_name
         
-        if class_name not in classes_dict:
-            classes_dict[class_name] = []
+        if class_name not in classes_count:
+            class_folder.mkdir(exist_ok=True)
+            classes_count[class_name] = 0
         
-        classes_dict[class_name].append(jpg_file)
-    
-    if not classes_dict:
-        return False, "nenhuma imagem com formato valido encontrada (formato esperado: classe_periodo_hash.jpg)"
-    
-    moved_count = 0
-    created_folders = []
+        try:
+            shutil.move(entry.path, str(class_folder / entry.name))
+            classes_count[class_name] += 1
+            moved_count += 1
+            
+            if progress_callback and estimate.due():
+                progress_callback(estimate.percent(), f"movendo ({estimate.label()}): {entry.name} -> {class_name}/")
+                
+        except Exception as e:
+            if progress_callback:
+                progress_callback(None, f"erro ao mover {entry.name}: {str(e)}")
     
-    total_files = sum(len(files) for files in classes_dict.values())
-    processed = 0
+    estimate.stop()
     
-    parent_folder = folder.parent
+    if not classes_count:
+        return False, "nenhuma imagem com formato valido encontrada (formato esperado: classe_periodo_hash.jpg)"
     
-    for class_name, files in classes_dict.items():
-        class_folder = parent_folder / class_name
-        class_folder.mkdir(exist_ok=True)
-        created_folders.append(class_name)
-        
-        for file in files:
-            try:
-                dest_path = class_folder / file.name
-                shutil.move(str(file), str(dest_path))
-                moved_count += 1
-                processed += 1
-                
-                if progress_callback:
-                    progress = (processed / total_files) * 100
-                    progress_callback(progress, f"movendo: {file.name} -> {class_name}/")
-                    
-            except Exception as e:
-                if progress_callback:
-                    progress_callback(None, f"erro ao mover {file.name}: {str(e)}")
+    if progress_callback:
+        progress_callback(100, f"imagens movidas: {moved_count}")
     
     return True, {
         'moved': moved_count,
-        'folders': created_folders,
-        'classes_count': len(classes_dict)
+        'folders': list(classes_count),
+        'classes_count': len(classes_count)
     }
 
 
@@ -6,7 +6,11 @@ from tkinter import filedialog, ttk, messagebox
 import threading
 
 
-def organize_dataset(folder_path, progress_callback=None):
+def organize_dataset(folder_path, progress_callback=None, jpg_files=None):
+    """
+    move pares jpg/txt da raiz da pasta para images/ e labels/
+    jpg_files opcional: move so esses pares (modo incremental do ingest_watcher)
+    """
     folder = Path(folder_path)
     
     if not folder.exists():
@@ -18,7 +22,7 @@ def organize_dataset(folder_path, progress_callback=None):
     images_dir.mkdir(exist_ok=True)
     labels_dir.mkdir(exist_ok=True)
     
-    jpg_files = list(folder.glob("*.jpg"))
+    jpg_files = list(folder.glob("*.jpg")) if jpg_files is None else [Path(f) for f in jpg_files]
     
     if not jpg_files:
         return False, "nenhuma imagem .jpg encontrada na pasta raiz"
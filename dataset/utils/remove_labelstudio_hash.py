@@ -5,79 +5,106 @@ from tkinter import filedialog, ttk, messagebox
 import threading
 import re
 from urllib.parse import unquote
+import itertools
+import sys
 
+from file_stream import FileEntry, ProgressEstimate, has_files, iter_files, iter_names
 
-def remove_hash_from_txt_files(folder_path, progress_callback=None):
 
+def remove_hash_from_txt_files(folder_path, progress_callback=None, txt_files=None):
+    """
+    txt_files opcional: processa so esses arquivos (modo incremental do ingest_watcher)
+    sem txt_files a pasta e lida em fluxo: renomeia conforme o os.scandir entrega, sem listar antes
+    """
     folder = Path(folder_path)
     
     if not folder.exists():
         return False, f"pasta nao encontrada: {folder_path}"
     
-    txt_files = list(folder.glob("*.txt"))
-    jpg_files = {f.stem: f for f in folder.glob("*.jpg")}
+    if txt_files is None:
+        entries = iter_files(folder, ('.txt',))
+        estimate = ProgressEstimate(iter_names(folder, ('.txt',)))
+    else:
+        txt_files = [Path(f) for f in txt_files]
+        entries = (FileEntry(str(f.parent), f.name) for f in txt_files)
+        estimate = ProgressEstimate(total=len(txt_files))
     
-    if not txt_files:
+    first = next(entries, None)
+    
+    if first is None:
+        estimate.stop()
         return False, "nenhum arquivo .txt encontrado na pasta"
     
-    if not jpg_files:
+    if not has_files(folder, ('.jpg',)):
+        estimate.stop()
         return False, "nenhuma imagem .jpg encontrada na pasta"
     
     renamed_count = 0
     not_found_count = 0
     already_correct = 0
+    # nomes criados nesta execucao: o scandir pode reve-los na mesma pasta e nao contam de novo
+    created = set()
     
     hash_pattern = re.compile(r'^[a-f0-9]{8}-')
     
-    for idx, txt_file in enumerate(txt_files):
-        txt_name = txt_file.stem
+    def report(message):
+        if progress_callback and estimate.due():
+            progress_callback(estimate.percent(), f"({estimate.label()}) {message}")
+    
+    for entry in itertools.chain([first], entries):
+        txt_name = entry.stem
         
         match = hash_pattern.match(txt_name)
         
         if not match:
+            if txt_name in created:
+                continue
+            estimate.step()
             already_correct += 1
-            if progress_callback:
-                progress = (idx + 1) / len(txt_files) * 100
-                progress_callback(progress, f"ignorado (sem hash): {txt_file.name}")
+            report(f"ignorado (sem hash): {entry.name}")
             continue
         
+        estimate.step()
         name_without_hash = txt_name[9:]
         
         name_decoded = unquote(name_without_hash)
         
-        if name_decoded in jpg_files:
+        # uma consulta por label no lugar do dicionario com todas as imagens da pasta
+        if (folder / f"{name_decoded}.jpg").is_file():
             new_txt_name = f"{name_decoded}.txt"
             new_txt_path = folder / new_txt_name
             
             try:
                 if new_txt_path.exists():
                     if progress_callback:
-                        progress_callback(None, f"aviso: {new_txt_name} ja existe, pulando {txt_file.name}")
+                        progress_callback(None, f"aviso: {new_txt_name} ja existe, pulando {entry.name}")
                     not_found_count += 1
                     continue
                 
-                txt_file.rename(new_txt_path)
+                os.rename(entry.path, new_txt_path)
+                created.add(sys.intern(name_decoded))
                 renamed_count += 1
                 
-                if progress_callback:
-                    progress = (idx + 1) / len(txt_files) * 100
-                    progress_callback(progress, f"renomeado: {txt_file.name} -> {new_txt_name}")
+                report(f"renomeado: {entry.name} -> {new_txt_name}")
                     
             except Exception as e:
                 if progress_callback:
-                    progress_callback(None, f"erro ao renomear {txt_file.name}: {str(e)}")
+                    progress_callback(None, f"erro ao renomear {entry.name}: {str(e)}")
                 not_found_count += 1
         else:
             not_found_count += 1
-            if progress_callback:
-                progress = (idx + 1) / len(txt_files) * 100
-                progress_callback(progress, f"imagem nao encontrada para: {name_decoded}")
+            report(f"imagem nao encontrada para: {name_decoded}")
+    
+    estimate.stop()
+    
+    if progress_callback:
+        progress_callback(100, f"labels processados: {estimate.done}")
     
     return True, {
         'renamed': renamed_count,
         'not_found': not_found_count,
         'already_correct': already_correct,
-        'total': len(txt_files)
+        'total': estimate.done
     }
 
 
@@ -0,0 +1,130 @@
+import numpy as np
+
+from threshold_sweep import nms_numpy
+
+
+DEFAULT_TILE = 640
+DEFAULT_OVERLAP = 0.2
+
+
+def tile_grid(height, width, tile=DEFAULT_TILE, overlap=DEFAULT_OVERLAP):
+    """
+    grade de janelas (x1, y1, x2, y2) com sobreposicao cobrindo o frame inteiro
+    a ultima janela de cada eixo encosta na borda para nao sobrar faixa sem cobertura
+    """
+    def starts(size):
+        if size <= tile:
+            return np.array([0])
+        step = max(int(tile * (1 - overlap)), 1)
+        positions = np.arange(0, size - tile, step)
+        return np.append(positions, size - tile)
+
+    ys, xs = np.meshgrid(starts(height), starts(width), indexing='ij')
+    ys, xs = ys.ravel(), xs.ravel()
+
+    return np.stack([
+        xs, ys, np.minimum(xs + tile, width), np.minimum(ys + tile, height)
+    ], axis=1).astype(np.int64)
+
+
+def select_tiles(tiles, coarse, margin=32):
+    """
+    escolhe as janelas que tocam alguma deteccao da passada barata (expandida por margin)
+    retorna mascara bool (n_tiles,)
+    """
+    if len(coarse) == 0:
+        return np.zeros(len(tiles), dtype=bool)
+
+    boxes = coarse[:, :4]
+    overlap_x = (tiles[:, None, 0] < boxes[None, :, 2] + margin) & (tiles[:, None, 2] > boxes[None, :, 0] - margin)
+    overlap_y = (tiles[:, None, 1] < boxes[None, :, 3] + margin) & (tiles[:, None, 3] > boxes[None, :, 1] - margin)
+    return (overlap_x & overlap_y).any(axis=1)
+
+
+def sliced_predict(infer_batch, frame, tile=DEFAULT_TILE, overlap=DEFAULT_OVERLAP, conf=0.25, iou=0.7,
+                   coarse_conf=0.05, refine='auto'):
+    """
+    inferencia fatiada para animais pequenos em frames grandes
+
+    infer_batch(frames, imgsz, conf) -> lista de arrays (N, 6) em coordenadas de cada frame
+    refine='auto': passada barata no frame inteiro (imgsz=tile, conf baixo) decide quais janelas refinar
+    refine='all': refina todas as janelas
+    retorna (deteccoes (N, 6), numero de janelas processadas)
+    """
+    height, width = frame.shape[:2]
+    tiles = tile_grid(height, width, tile, overlap)
+
+    coarse = infer_batch([frame], tile, coarse_conf)[0]
+
+    if refine == 'all':
+        chosen = tiles
+    else:
+        chosen = tiles[select_tiles(tiles, coarse)]
+
+    merged = [coarse[coarse[:, 4] >= conf]]
+
+    if len(chosen):
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in chosen]
+        # todas as janelas vao num unico forward
+        tile_dets = infer_batch(crops, tile, conf)
+
+        for (x1, y1, _, _), dets in zip(chosen, tile_dets):
+            if len(dets):
+                dets = dets.copy()
+                dets[:, [0, 2]] += x1
+                dets[:, [1, 3]] += y1
+                merged.append(dets)
+
+    detections = np.concatenate(merged).astype(np.float32)
+
+    # caixas repetidas nas costuras entre janelas (e entre janela e passada inteira) saem no nms
+    keep = nms_numpy(detections, iou)
+
+    return detections[keep], len(chosen)
+
+
+def model_batch_fn(model):
+    """adapta um YOLO local para a assinatura infer_batch(frames, imgsz, conf)"""
+    from inference_cache import results_to_array
+
+    def infer_batch(frames, imgsz, conf):
+        results = model(frames, imgsz=imgsz, conf=conf, verbose=False)
+        return [results_to_array(r) for r in results]
+
+    return infer_batch
+
+
+class ClientBatch:
+    """
+    infer_batch(frames, imgsz, conf) sobre o InferenceClient: as janelas sao enviadas em paralelo
+    e o agendador de micro-lotes do servidor junta tudo num forward
+    as threads de envio ficam vivas entre chamadas; close() (ou with) encerra
+    """
+
+    def __init__(self, client, model_path, workers=8):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.client = client
+        self.model_path = model_path
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def __call__(self, frames, imgsz, conf):
+        futures = [
+            self.executor.submit(self.client.predict_frame, self.model_path, f, imgsz=imgsz, conf=conf)
+            for f in frames
+        ]
+        return [f.result() for f in futures]
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def client_batch_fn(client, model_path, workers=8):
+    """adapta o InferenceClient para a assinatura infer_batch; quem cria chama close() no fim"""
+    return ClientBatch(client, model_path, workers)
@@ -0,0 +1,234 @@
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+
+# limites do histograma em segundos (escala log de 10us a ~10s), fixos para memoria constante
+BUCKETS = np.logspace(-5, 1, 25)
+RECENT_SAMPLES = 1000
+
+PROFILERS = ["nenhum", "cprofile", "amostragem"]
+
+
+class _Stage:
+    __slots__ = ('count', 'total', 'min', 'max', 'histogram', 'recent')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.histogram = np.zeros(len(BUCKETS) + 1, dtype=np.int64)
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+
+class StageTimer:
+    """
+    cronometro por etapa (decode, preprocess, inference, postprocess, plot, encode, write...)
+    usa time.perf_counter e guarda so contadores, histograma fixo e as ultimas amostras
+    """
+
+    def __init__(self, name="run"):
+        self.name = name
+        self.started = time.time()
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = _Stage()
+
+            stage.count += 1
+            stage.total += seconds
+            stage.min = min(stage.min, seconds)
+            stage.max = max(stage.max, seconds)
+            stage.histogram[np.searchsorted(BUCKETS, seconds)] += 1
+            stage.recent.append(seconds)
+
+    def report(self):
+        with self._lock:
+            stages = {}
+            for name, stage in self._stages.items():
+                recent = np.array(stage.recent) * 1000
+                stages[name] = {
+                    'count': stage.count,
+                    'total_s': round(stage.total, 4),
+                    'mean_ms': round(stage.total / stage.count * 1000, 3),
+                    'min_ms': round(stage.min * 1000, 3),
+                    'max_ms': round(stage.max * 1000, 3),
+                    'p50_ms': round(float(np.percentile(recent, 50)), 3),
+                    'p99_ms': round(float(np.percentile(recent, 99)), 3),
+                    'histogram': {
+                        'le_s': [float(b) for b in BUCKETS] + ['+Inf'],
+                        'counts': stage.histogram.tolist()
+                    }
+                }
+
+        return {
+            'name': self.name,
+            'started': self.started,
+            'wall_s': round(time.time() - self.started, 3),
+            'stages': stages
+        }
+
+    def summary(self):
+        """texto curto para log: etapa -> media e p99"""
+        lines = []
+        for name, stage in self.report()['stages'].items():
+            lines.append(
+                f"{name:<12} n={stage['count']:<7} media={stage['mean_ms']:.2f}ms "
+                f"p99={stage['p99_ms']:.2f}ms total={stage['total_s']:.2f}s"
+            )
+        return "\n".join(lines)
+
+    def to_prometheus(self):
+        """formato texto do prometheus (histograma cumulativo por etapa)"""
+        metric = "fauna_stage_seconds"
+        lines = [
+            f"# HELP {metric} tempo gasto por etapa do pipeline",
+            f"# TYPE {metric} histogram"
+        ]
+
+        with self._lock:
+            for name, stage in self._stages.items():
+                cumulative = np.cumsum(stage.histogram)
+                for bound, count in zip(BUCKETS, cumulative[:-1]):
+                    lines.append(f'{metric}_bucket{{run="{self.name}",stage="{name}",le="{bound:.6g}"}} {count}')
+                lines.append(f'{metric}_bucket{{run="{self.name}",stage="{name}",le="+Inf"}} {cumulative[-1]}')
+                lines.append(f'{metric}_sum{{run="{self.name}",stage="{name}"}} {stage.total:.6f}')
+                lines.append(f'{metric}_count{{run="{self.name}",stage="{name}"}} {stage.count}')
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, output_dir):
+        """salva <nome>.json e <nome>.prom em output_dir e devolve os caminhos"""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+
+        json_path = output_dir / f"{self.name}_{stamp}.json"
+        prom_path = output_dir / f"{self.name}_{stamp}.prom"
+
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        prom_path.write_text(self.to_prometheus(), encoding='utf-8')
+
+        return json_path, prom_path
+
+
+class NullTimer:
+    """mesma interface do StageTimer sem custo nenhum (instrumentacao desligada)"""
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def record(self, name, seconds):
+        pass
+
+
+class SamplingProfiler:
+    """
+    profiler por amostragem simples: uma thread olha a pilha da thread alvo a cada intervalo
+    e conta as funcoes presentes; overhead baixo e independe de quantas chamadas existem
+    """
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.leaf = Counter()
+        self.inclusive = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            self.samples += 1
+            seen = set()
+            leaf = True
+
+            while frame is not None:
+                code = frame.f_code
+                key = f"{Path(code.co_filename).name}:{code.co_firstlineno} {code.co_name}"
+                if leaf:
+                    self.leaf[key] += 1
+                    leaf = False
+                if key not in seen:
+                    self.inclusive[key] += 1
+                    seen.add(key)
+                frame = frame.f_back
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def report(self, top=25):
+        lines = [f"amostras: {self.samples} (intervalo {self.interval * 1000:.0f}ms)", "", "proprio %  | funcao"]
+        for key, count in self.leaf.most_common(top):
+            lines.append(f"{count / max(self.samples, 1) * 100:8.1f}%  | {key}")
+        lines += ["", "inclusivo % | funcao"]
+        for key, count in self.inclusive.most_common(top):
+            lines.append(f"{count / max(self.samples, 1) * 100:8.1f}%  | {key}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile_run(mode, output_dir, name="run"):
+    """
+    liga um profiler durante o bloco: mode = 'cprofile', 'amostragem' ou 'nenhum'
+    o resultado vai para output_dir (<nome>.prof + <nome>_cprofile.txt ou <nome>_amostragem.txt)
+    """
+    if mode not in PROFILERS[1:]:
+        yield
+        return
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(str(output_dir / f"{name}_{stamp}.prof"))
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(30)
+            (output_dir / f"{name}_{stamp}_cprofile.txt").write_text(text.getvalue(), encoding='utf-8')
+    else:
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            (output_dir / f"{name}_{stamp}_amostragem.txt").write_text(profiler.report(), encoding='utf-8')
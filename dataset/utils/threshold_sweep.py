@@ -0,0 +1,452 @@
+from pathlib import Path
+import tkinter as tk
+from tkinter import filedialog, ttk, messagebox
+import threading
+import time
+
+import numpy as np
+
+
+# conf bem baixo e iou=1.0 desligam na pratica o filtro e o nms do ultralytics,
+# assim guardamos todos os candidatos uma unica vez
+RAW_CONF = 0.001
+RAW_IOU = 1.0
+RAW_MAX_DET = 3000
+# max_det padrao do ultralytics: a varredura e o apply_thresholds cortam no mesmo ponto
+DEFAULT_MAX_DET = 300
+
+
+def collect_raw_predictions(model, image_paths, output_path, imgsz=640, batch_size=16, progress_callback=None):
+    """
+    roda o modelo uma unica vez e salva os candidatos pre-nms em um .npz compacto
+    boxes: (M, 6) float32 [x1, y1, x2, y2, conf, cls] de todas as imagens concatenadas
+    offsets: (n_imagens + 1,) int64, boxes[offsets[i]:offsets[i + 1]] pertencem a imagem i
+    shapes: (n_imagens, 2) int32 com (altura, largura) original de cada imagem
+    """
+    image_paths = [Path(p) for p in image_paths]
+
+    if not image_paths:
+        return False, "nenhuma imagem para processar"
+
+    chunks = []
+    counts = []
+    shapes = []
+
+    for start in range(0, len(image_paths), batch_size):
+        batch = image_paths[start:start + batch_size]
+        results = model.predict(
+            source=[str(p) for p in batch],
+            imgsz=imgsz, conf=RAW_CONF, iou=RAW_IOU, max_det=RAW_MAX_DET, verbose=False
+        )
+
+        for result in results:
+            data = result.boxes.data.cpu().numpy()[:, :6].astype(np.float32)
+            chunks.append(data)
+            counts.append(len(data))
+            shapes.append(result.orig_shape[:2])
+
+        if progress_callback:
+            done = min(start + batch_size, len(image_paths))
+            progress_callback(done / len(image_paths) * 100, f"inferencia: {done}/{len(image_paths)}")
+
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    names = model.names
+    class_names = [names[i] for i in sorted(names)] if isinstance(names, dict) else list(names)
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        output_path,
+        boxes=np.concatenate(chunks) if chunks else np.zeros((0, 6), dtype=np.float32),
+        offsets=offsets,
+        shapes=np.array(shapes, dtype=np.int32).reshape(-1, 2),
+        paths=np.array([str(p) for p in image_paths]),
+        class_names=np.array(class_names),
+        imgsz=np.array(imgsz)
+    )
+
+    return True, {
+        'images': len(image_paths),
+        'candidates': int(offsets[-1]),
+        'output': str(output_path)
+    }
+
+
+def load_raw_predictions(npz_path):
+    data = np.load(npz_path)
+    return {
+        'boxes': data['boxes'],
+        'offsets': data['offsets'],
+        'shapes': data['shapes'] if 'shapes' in data else None,
+        'paths': [str(p) for p in data['paths']],
+        'class_names': [str(n) for n in data['class_names']],
+        'imgsz': int(data['imgsz'])
+    }
+
+
+def box_iou(boxes_a, boxes_b):
+    """matriz de iou (N, M) entre dois conjuntos de caixas xyxy"""
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:4], boxes_b[None, :, 2:4])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    inter = wh[..., 0] * wh[..., 1]
+
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def nms_numpy(detections, iou_threshold, agnostic=False):
+    """
+    nms guloso vetorizado, retorna os indices mantidos (ordenados por conf decrescente)
+    como no ultralytics, o nms por classe e feito deslocando as caixas por classe
+    """
+    if len(detections) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    order = np.argsort(-detections[:, 4], kind='stable')
+    boxes = detections[order, :4].astype(np.float32, copy=True)
+
+    if not agnostic:
+        boxes += (detections[order, 5] * 7680.0)[:, None]
+
+    iou = box_iou(boxes, boxes)
+    suppressed = np.zeros(len(order), dtype=bool)
+
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        suppressed[i + 1:] |= iou[i, i + 1:] > iou_threshold
+
+    return order[~suppressed]
+
+
+def class_conf_vector(class_conf, conf, num_classes):
+    """monta um vetor de conf minimo por classe (ex: {0: 0.4, 11: 0.2})"""
+    thresholds = np.full(num_classes, conf, dtype=np.float32)
+    for cls, value in (class_conf or {}).items():
+        thresholds[int(cls)] = value
+    return thresholds
+
+
+def apply_thresholds(detections, conf=0.25, iou=0.7, class_conf=None, max_det=DEFAULT_MAX_DET, agnostic=False):
+    """
+    reproduz o pos-processamento do yolo sobre os candidatos crus de uma imagem
+    class_conf: dict {id_da_classe: conf} para limiares por especie
+    """
+    if len(detections) == 0:
+        return detections
+
+    # o vetor cobre as classes da imagem e todas as do class_conf, mesmo as que nao aparecem aqui
+    num_classes = max([int(detections[:, 5].max())] + [int(cls) for cls in (class_conf or {})]) + 1
+    thresholds = class_conf_vector(class_conf, conf, num_classes)
+
+    # o nms guloso nunca deixa uma caixa de conf menor suprimir uma de conf maior,
+    # entao filtrar antes ou depois do nms da o mesmo resultado
+    candidates = detections[detections[:, 4] >= thresholds[detections[:, 5].astype(np.int64)]]
+    keep = nms_numpy(candidates, iou, agnostic=agnostic)[:max_det]
+
+    return candidates[keep]
+
+
+def sweep_thresholds(raw, conf_grid, iou_grid, class_conf=None, progress_callback=None, max_det=DEFAULT_MAX_DET):
+    """
+    avalia uma grade de (conf, iou) sem rodar o modelo de novo
+    para cada iou o nms e feito uma vez so, no menor conf da grade; os demais confs
+    sao apenas mascaras sobre o resultado (cortadas em max_det, como no apply_thresholds)
+    retorna lista de dicts com totais por combinacao
+    """
+    boxes = raw['boxes']
+    offsets = raw['offsets']
+    num_images = len(offsets) - 1
+    num_classes = len(raw['class_names'])
+
+    unknown = sorted(int(cls) for cls in (class_conf or {}) if not 0 <= int(cls) < num_classes)
+    if unknown:
+        raise ValueError(
+            f"conf por classe com id fora do modelo: {unknown} (o modelo tem {num_classes} classes, 0 a {num_classes - 1})"
+        )
+
+    conf_grid = sorted(conf_grid)
+    min_conf = min(conf_grid + list((class_conf or {}).values()))
+    # um vetor por conf da grade, montado uma vez e nao a cada imagem
+    thresholds = {conf: class_conf_vector(class_conf, conf, num_classes) for conf in conf_grid}
+
+    summary = {}
+    for iou in iou_grid:
+        for conf in conf_grid:
+            summary[(conf, iou)] = {
+                'conf': conf,
+                'iou': iou,
+                'detections': 0,
+                'images_with_detections': 0,
+                'per_class': np.zeros(num_classes, dtype=np.int64)
+            }
+
+    start_time = time.perf_counter()
+
+    for idx in range(num_images):
+        image_boxes = boxes[offsets[idx]:offsets[idx + 1]]
+        image_boxes = image_boxes[image_boxes[:, 4] >= min_conf]
+
+        for iou in iou_grid:
+            kept = image_boxes[nms_numpy(image_boxes, iou)]
+
+            kept_classes = kept[:, 5].astype(np.int64)
+
+            for conf in conf_grid:
+                # kept vem em conf decrescente: o corte em max_det pega as mesmas caixas do apply_thresholds
+                final = kept[kept[:, 4] >= thresholds[conf][kept_classes]][:max_det]
+
+                entry = summary[(conf, iou)]
+                entry['detections'] += len(final)
+                entry['images_with_detections'] += int(len(final) > 0)
+                entry['per_class'] += np.bincount(final[:, 5].astype(np.int64), minlength=num_classes)
+
+        if progress_callback and (idx + 1) % 100 == 0:
+            progress_callback((idx + 1) / num_images * 100, f"varrendo: {idx + 1}/{num_images}")
+
+    elapsed = time.perf_counter() - start_time
+
+    rows = list(summary.values())
+    for row in rows:
+        row['per_class'] = {
+            raw['class_names'][c]: int(n) for c, n in enumerate(row['per_class']) if n > 0
+        }
+
+    return rows, elapsed
+
+
+def derive_detections(raw, conf=0.25, iou=0.7, class_conf=None, max_det=DEFAULT_MAX_DET):
+    """gera as deteccoes finais {caminho: array (N, 6)} para um unico par de limiares"""
+    boxes = raw['boxes']
+    offsets = raw['offsets']
+    return {
+        path: apply_thresholds(boxes[offsets[i]:offsets[i + 1]], conf, iou, class_conf, max_det)
+        for i, path in enumerate(raw['paths'])
+    }
+
+
+def parse_grid(text):
+    """'0.1, 0.25, 0.5' -> [0.1, 0.25, 0.5]"""
+    return [float(v) for v in text.replace(';', ',').split(',') if v.strip()]
+
+
+class ThresholdSweepGUI:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("varredura de limiares - conf / iou")
+        self.root.geometry("800x650")
+
+        self.model_path = tk.StringVar(value="yolov8n-detector-gamba.pt")
+        self.folder_path = tk.StringVar()
+        self.raw_path = tk.StringVar(value="runs/sweep/raw_predictions.npz")
+        self.conf_grid = tk.StringVar(value="0.1, 0.25, 0.4, 0.5")
+        self.iou_grid = tk.StringVar(value="0.5, 0.7")
+        self.class_conf = tk.StringVar(value="")
+        self.is_processing = False
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        collect_frame = ttk.LabelFrame(main_frame, text="1. coletar candidatos (roda o modelo uma vez)", padding="10")
+        collect_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=5)
+
+        ttk.Label(collect_frame, text="modelo (.pt):").grid(row=0, column=0, sticky=tk.W)
+        ttk.Entry(collect_frame, textvariable=self.model_path, width=50).grid(row=0, column=1, sticky=(tk.W, tk.E))
+        ttk.Button(collect_frame, text="procurar", command=self.browse_model).grid(row=0, column=2, padx=5)
+
+        ttk.Label(collect_frame, text="pasta de imagens:").grid(row=1, column=0, sticky=tk.W)
+        ttk.Entry(collect_frame, textvariable=self.folder_path, width=50).grid(row=1, column=1, sticky=(tk.W, tk.E))
+        ttk.Button(collect_frame, text="procurar", command=self.browse_folder).grid(row=1, column=2, padx=5)
+
+        ttk.Label(collect_frame, text="arquivo de candidatos (.npz):").grid(row=2, column=0, sticky=tk.W)
+        ttk.Entry(collect_frame, textvariable=self.raw_path, width=50).grid(row=2, column=1, sticky=(tk.W, tk.E))
+        ttk.Button(collect_frame, text="procurar", command=self.browse_raw).grid(row=2, column=2, padx=5)
+
+        ttk.Button(collect_frame, text="coletar", command=self.start_collect).grid(row=3, column=1, pady=5)
+
+        sweep_frame = ttk.LabelFrame(main_frame, text="2. varrer limiares (sem rodar o modelo)", padding="10")
+        sweep_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=5)
+
+        ttk.Label(sweep_frame, text="grade de conf:").grid(row=0, column=0, sticky=tk.W)
+        ttk.Entry(sweep_frame, textvariable=self.conf_grid, width=40).grid(row=0, column=1, sticky=tk.W)
+
+        ttk.Label(sweep_frame, text="grade de iou:").grid(row=1, column=0, sticky=tk.W)
+        ttk.Entry(sweep_frame, textvariable=self.iou_grid, width=40).grid(row=1, column=1, sticky=tk.W)
+
+        ttk.Label(sweep_frame, text="conf por classe (ex: 0=0.4, 11=0.2):").grid(row=2, column=0, sticky=tk.W)
+        ttk.Entry(sweep_frame, textvariable=self.class_conf, width=40).grid(row=2, column=1, sticky=tk.W)
+
+        ttk.Button(sweep_frame, text="varrer", command=self.start_sweep).grid(row=3, column=1, pady=5, sticky=tk.W)
+
+        self.progress_bar = ttk.Progressbar(main_frame, mode='determinate', length=400)
+        self.progress_bar.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=5)
+
+        self.status_label = ttk.Label(main_frame, text="aguardando...", foreground="blue")
+        self.status_label.grid(row=3, column=0, sticky=tk.W, pady=5)
+
+        log_frame = ttk.LabelFrame(main_frame, text="log", padding="5")
+        log_frame.grid(row=4, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+
+        self.log_text = tk.Text(log_frame, height=12, width=90)
+        self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.log_text.config(yscrollcommand=scrollbar.set)
+
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(4, weight=1)
+
+    def browse_model(self):
+        file_path = filedialog.askopenfilename(
+            title="selecionar modelo yolo",
+            filetypes=[("modelo yolo", "*.pt"), ("todos os arquivos", "*.*")]
+        )
+        if file_path:
+            self.model_path.set(file_path)
+
+    def browse_folder(self):
+        folder = filedialog.askdirectory(title="selecionar pasta com imagens")
+        if folder:
+            self.folder_path.set(folder)
+
+    def browse_raw(self):
+        file_path = filedialog.askopenfilename(
+            title="selecionar candidatos",
+            filetypes=[("candidatos", "*.npz"), ("todos os arquivos", "*.*")]
+        )
+        if file_path:
+            self.raw_path.set(file_path)
+
+    def log_message(self, message):
+        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.see(tk.END)
+        self.root.update_idletasks()
+
+    def update_progress(self, value, status):
+        if value is not None:
+            self.progress_bar['value'] = value
+        if status:
+            self.status_label.config(text=status)
+        self.root.update_idletasks()
+
+    def start_collect(self):
+        if self.is_processing:
+            messagebox.showwarning("aviso", "processamento ja em andamento")
+            return
+
+        if not Path(self.model_path.get()).exists():
+            messagebox.showerror("erro", "selecione um modelo valido")
+            return
+
+        if not self.folder_path.get():
+            messagebox.showerror("erro", "selecione a pasta de imagens")
+            return
+
+        self.is_processing = True
+        thread = threading.Thread(target=self.collect, daemon=True)
+        thread.start()
+
+    def collect(self):
+        try:
+            from ultralytics import YOLO
+
+            self.log_message("carregando modelo...")
+            model = YOLO(self.model_path.get())
+            images = sorted(Path(self.folder_path.get()).glob("*.jpg"))
+
+            success, result = collect_raw_predictions(
+                model, images, self.raw_path.get(), progress_callback=self.update_progress
+            )
+
+            if not success:
+                self.log_message(f"erro: {result}")
+                messagebox.showerror("erro", result)
+                return
+
+            self.log_message(f"imagens: {result['images']} | candidatos salvos: {result['candidates']}")
+            self.log_message(f"arquivo: {result['output']}")
+            self.update_progress(100, "coleta concluida")
+
+        except Exception as e:
+            self.log_message(f"\nerro durante processamento: {str(e)}")
+            messagebox.showerror("erro", f"erro durante processamento:\n{str(e)}")
+
+        finally:
+            self.is_processing = False
+
+    def start_sweep(self):
+        if self.is_processing:
+            messagebox.showwarning("aviso", "processamento ja em andamento")
+            return
+
+        if not Path(self.raw_path.get()).exists():
+            messagebox.showerror("erro", "colete os candidatos primeiro")
+            return
+
+        try:
+            conf_grid = parse_grid(self.conf_grid.get())
+            iou_grid = parse_grid(self.iou_grid.get())
+            class_conf = {}
+            for item in self.class_conf.get().split(','):
+                if '=' in item:
+                    cls, value = item.split('=')
+                    class_conf[int(cls)] = float(value)
+        except ValueError:
+            messagebox.showerror("erro", "grade de limiares invalida")
+            return
+
+        if not conf_grid or not iou_grid:
+            messagebox.showerror("erro", "informe ao menos um valor de conf e de iou")
+            return
+
+        self.is_processing = True
+        thread = threading.Thread(target=self.sweep, args=(conf_grid, iou_grid, class_conf), daemon=True)
+        thread.start()
+
+    def sweep(self, conf_grid, iou_grid, class_conf):
+        try:
+            raw = load_raw_predictions(self.raw_path.get())
+            rows, elapsed = sweep_thresholds(
+                raw, conf_grid, iou_grid, class_conf, progress_callback=self.update_progress
+            )
+
+            num_images = len(raw['paths'])
+            self.log_message(f"\n{len(rows)} combinacoes em {num_images} imagens ({elapsed:.2f}s)")
+            self.log_message(f"{'conf':>6} {'iou':>6} {'deteccoes':>10} {'imagens':>8}  por classe")
+
+            for row in rows:
+                per_class = ", ".join(f"{name}: {n}" for name, n in row['per_class'].items())
+                self.log_message(
+                    f"{row['conf']:>6.2f} {row['iou']:>6.2f} {row['detections']:>10} "
+                    f"{row['images_with_detections']:>8}  {per_class}"
+                )
+
+            self.update_progress(100, "varredura concluida")
+
+        except Exception as e:
+            self.log_message(f"\nerro durante processamento: {str(e)}")
+            messagebox.showerror("erro", f"erro durante processamento:\n{str(e)}")
+
+        finally:
+            self.is_processing = False
+
+
+def main():
+    root = tk.Tk()
+    app = ThresholdSweepGUI(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
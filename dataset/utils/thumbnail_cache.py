@@ -0,0 +1,152 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from image_prefetch import load_preview
+
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / "runs" / "cache" / "thumbnails"
+DEFAULT_THUMB_SIZE = (160, 120)
+# limite do cache em disco; prune() apaga as miniaturas usadas ha mais tempo ate ficar em 90% disso
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class ThumbnailCache:
+    """
+    miniaturas jpeg em disco, uma por imagem, em subpastas de 2 caracteres para nao criar pastas gigantes
+    chave = (caminho, tamanho, mtime, tamanho da miniatura): editou a imagem, a miniatura e refeita
+    o mtime da miniatura marca o ultimo uso (build() renova as da pasta aberta)
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, size=DEFAULT_THUMB_SIZE, quality=80, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.size = tuple(size)
+        self.quality = quality
+        self.max_bytes = max_bytes
+
+    def _key(self, path, stat):
+        content = f"{Path(path).resolve()}|{stat.st_size}|{stat.st_mtime_ns}|{self.size}"
+        return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+    def _thumb_for(self, path, stat):
+        key = self._key(path, stat)
+        return self.cache_dir / key[:2] / f"{key}.jpg"
+
+    def thumb_path(self, path):
+        return self._thumb_for(path, os.stat(path))
+
+    def get(self, path):
+        """caminho da miniatura se ja existir, senao None (nao decodifica nada)"""
+        thumb = self.thumb_path(path)
+        return thumb if thumb.exists() else None
+
+    def get_or_create(self, path):
+        thumb = self.thumb_path(path)
+
+        if not thumb.exists():
+            thumb.parent.mkdir(parents=True, exist_ok=True)
+            img = load_preview(path, self.size)
+            # grava num temporario e troca: outra thread nunca le uma miniatura pela metade
+            tmp = thumb.with_name(f"{thumb.stem}.{threading.get_ident()}.tmp")
+            img.save(tmp, 'JPEG', quality=self.quality)
+            os.replace(tmp, thumb)
+
+        return thumb
+
+    def rename(self, old_path, new_path):
+        """renomear nao muda tamanho nem mtime, entao a miniatura antiga e so movida para a chave nova"""
+        stat = os.stat(new_path)
+        old_thumb = self._thumb_for(old_path, stat)
+        if old_thumb.exists():
+            new_thumb = self._thumb_for(new_path, stat)
+            new_thumb.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(old_thumb, new_thumb)
+
+    def discard(self, path):
+        """apaga a miniatura de uma imagem; chamar antes de excluir a imagem (a chave usa o stat dela)"""
+        try:
+            self.thumb_path(path).unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def prune(self):
+        """
+        mantem o cache abaixo de max_bytes: passou do limite, apaga as miniaturas menos usadas
+        ate 90% dele; temporarios que sobraram de uma queda tambem saem
+        devolve quantos arquivos foram apagados
+        """
+        entries = []
+        total = 0
+        removed = 0
+
+        for bucket in (self.cache_dir.iterdir() if self.cache_dir.exists() else ()):
+            if not bucket.is_dir():
+                continue
+            with os.scandir(bucket) as files:
+                for entry in files:
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if entry.name.endswith('.tmp'):
+                        Path(entry.path).unlink(missing_ok=True)
+                        removed += 1
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+        if total <= self.max_bytes:
+            return removed
+
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        return removed
+
+    def build(self, paths, workers=None, progress_callback=None, stop_event=None):
+        """gera em paralelo as miniaturas que faltam; devolve (criadas, erros)"""
+        workers = workers or min(os.cpu_count() or 2, 8)
+        paths = list(paths)
+        created = 0
+        errors = 0
+        done = 0
+
+        def work(path):
+            if stop_event is not None and stop_event.is_set():
+                return None
+            thumb = self.get(path)
+            if thumb is not None:
+                # usada agora: fica por ultimo na fila do prune
+                os.utime(thumb)
+                return False
+            self.get_or_create(path)
+            return True
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # em blocos para poder parar no meio sem ter enfileirado a pasta inteira
+            for start in range(0, len(paths), workers * 16):
+                if stop_event is not None and stop_event.is_set():
+                    break
+
+                futures = [executor.submit(work, path) for path in paths[start:start + workers * 16]]
+                for future in futures:
+                    try:
+                        created += bool(future.result())
+                    except Exception:
+                        errors += 1
+                    done += 1
+
+                if progress_callback:
+                    progress_callback(done, len(paths))
+
+        return created, errors
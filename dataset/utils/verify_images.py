@@ -0,0 +1,442 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+import tkinter as tk
+from tkinter import filedialog, ttk, messagebox
+
+from image_metadata import (
+    ImageIndex, INDEX_FILE, QUARANTINE_DIR, STATUS_NAMES, STATUS_OK, STATUS_BAD_HEADER, STATUS_TRUNCATED,
+    STATUS_DECODE_ERROR, STATUS_UNCHECKED, STATUS_UNREADABLE, find_images, label_for
+)
+
+
+QUARANTINE_LOG = "motivos.jsonl"
+
+# exif com miniatura embutida pode passar de 64kb antes do SOF
+HEAD_BYTES = 64 * 1024
+MAX_HEAD_BYTES = 1024 * 1024
+TAIL_BYTES = 1024
+
+# SOF0..SOF15 menos DHT (c4), JPG (c8) e DAC (cc)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_CHANNELS = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}
+
+
+def parse_jpeg_header(data):
+    """
+    percorre os segmentos do jpeg ate o SOF e devolve (largura, altura, canais)
+    None se o SOF nao estiver dentro de data; ValueError se a estrutura estiver quebrada
+    """
+    if data[:2] != b'\xff\xd8':
+        raise ValueError("assinatura jpeg ausente")
+
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            raise ValueError(f"marcador invalido no byte {i}")
+
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            i += 2
+            continue
+        if marker == 0xDA:
+            raise ValueError("dados da imagem antes do SOF")
+
+        length = int.from_bytes(data[i + 2:i + 4], 'big')
+        if length < 2:
+            raise ValueError(f"segmento com tamanho invalido no byte {i}")
+
+        if marker in JPEG_SOF_MARKERS:
+            if i + 10 > len(data):
+                return None
+            height = int.from_bytes(data[i + 5:i + 7], 'big')
+            width = int.from_bytes(data[i + 7:i + 9], 'big')
+            channels = data[i + 9]
+            if width == 0 or height == 0:
+                raise ValueError("dimensoes zeradas no SOF")
+            return width, height, channels
+
+        i += 2 + length
+
+    return None
+
+
+def parse_png_header(data):
+    if data[:8] != PNG_SIGNATURE or data[12:16] != b'IHDR':
+        raise ValueError("assinatura png ausente")
+
+    width = int.from_bytes(data[16:20], 'big')
+    height = int.from_bytes(data[20:24], 'big')
+    if width == 0 or height == 0:
+        raise ValueError("dimensoes zeradas no IHDR")
+    return width, height, PNG_CHANNELS.get(data[25], 0)
+
+
+def quick_check(path):
+    """
+    checagem barata: so le o comeco (cabecalho/dimensoes) e o fim do arquivo (marcador de fim)
+    pega a maioria dos jpegs truncados por copia interrompida ou crash do cv2.imwrite
+    """
+    path = Path(path)
+    stat = path.stat()
+    record = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'width': 0,
+        'height': 0,
+        'channels': 0,
+        'decoded': False
+    }
+
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(HEAD_BYTES)
+            f.seek(max(0, stat.st_size - TAIL_BYTES))
+            tail = f.read(TAIL_BYTES)
+
+            is_png = head[:8] == PNG_SIGNATURE
+            if is_png:
+                info = parse_png_header(head)
+            else:
+                info = parse_jpeg_header(head)
+                if info is None and stat.st_size > len(head):
+                    f.seek(0)
+                    head = f.read(MAX_HEAD_BYTES)
+                    info = parse_jpeg_header(head)
+
+    except ValueError as e:
+        return dict(record, status=STATUS_BAD_HEADER), str(e)
+    except OSError as e:
+        return dict(record, status=STATUS_UNREADABLE), str(e)
+
+    if info is None:
+        return dict(record, status=STATUS_TRUNCATED), "cabecalho sem dimensoes"
+
+    record['width'], record['height'], record['channels'] = info
+
+    # alguns programas completam o arquivo com zeros depois do fim
+    tail = tail.rstrip(b'\x00')
+    if is_png:
+        if b'IEND' not in tail[-12:]:
+            return dict(record, status=STATUS_TRUNCATED), "sem IEND no fim do png"
+    elif not tail.endswith(b'\xff\xd9'):
+        return dict(record, status=STATUS_TRUNCATED), "sem marcador de fim (FFD9)"
+
+    return dict(record, status=STATUS_OK), None
+
+
+def decode_image(path):
+    """decodificacao completa; roda em outro processo, por isso recebe e devolve so tipos simples"""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            img.load()
+            width, height = img.size
+            channels = len(img.getbands())
+    except Exception as e:
+        return {'status': STATUS_DECODE_ERROR, 'decoded': True}, str(e)
+
+    return {'width': width, 'height': height, 'channels': channels, 'status': STATUS_OK, 'decoded': True}, None
+
+
+def quarantine_file(folder, image_path, reason):
+    """move a imagem (e o label) para <pasta>/_quarentena mantendo o caminho relativo"""
+    folder = Path(folder)
+    quarantine = folder / QUARANTINE_DIR
+    moved = []
+
+    label = label_for(image_path)
+    for path in [image_path] + ([label] if label else []):
+        target = quarantine / path.relative_to(folder)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(path), str(target))
+        moved.append(str(target.relative_to(folder)))
+
+    with open(quarantine / QUARANTINE_LOG, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'arquivo': str(image_path.relative_to(folder)), 'motivo': reason, 'movidos': moved}) + "\n")
+
+
+def verify_dataset(folder, full_decode=False, workers=None, move_bad=True, recheck=False,
+                   progress_callback=None, stop_event=None):
+    """
+    verifica todas as imagens da pasta e grava largura/altura/canais no indice (.image_index.npz)
+    arquivos sem alteracao desde a ultima verificacao sao pulados, a menos que recheck=True
+    com full_decode as imagens que passaram na checagem rapida sao decodificadas num pool de processos
+    """
+    folder = Path(folder)
+    workers = workers or os.cpu_count() or 2
+
+    images = find_images(folder)
+    index = ImageIndex(folder)
+    reasons = {}
+
+    pending = []
+    skipped = 0
+    for path in images:
+        record = None if recheck else index.get(path)
+        if record is None or record['status'] == STATUS_UNCHECKED or \
+                (full_decode and not record['decoded'] and record['status'] == STATUS_OK):
+            pending.append(path)
+        else:
+            skipped += 1
+            if record['status'] != STATUS_OK:
+                reasons[path] = STATUS_NAMES[int(record['status'])]
+
+    if progress_callback:
+        progress_callback(0, f"{len(images)} imagens, {skipped} sem alteracao desde a ultima verificacao")
+
+    # fase 1: cabecalho e fim do arquivo; e so i/o, threads bastam
+    chunk = max(workers * 32, 256)
+    to_decode = []
+    checked = 0
+    with ThreadPoolExecutor(max_workers=min(workers * 2, 16)) as executor:
+        for start in range(0, len(pending), chunk):
+            if stop_event is not None and stop_event.is_set():
+                break
+
+            batch = pending[start:start + chunk]
+            results = list(executor.map(quick_check, batch))
+            index.update((path, record) for path, (record, _) in zip(batch, results))
+
+            for path, (record, reason) in zip(batch, results):
+                if record['status'] != STATUS_OK:
+                    reasons[path] = reason or STATUS_NAMES[record['status']]
+                elif full_decode:
+                    to_decode.append(path)
+
+            checked += len(batch)
+            if progress_callback:
+                progress_callback(
+                    checked / len(pending) * (50 if full_decode else 100),
+                    f"cabecalhos verificados: {checked}/{len(pending)}"
+                )
+
+    index.save()
+
+    # fase 2: decodificacao completa; cpu, entao processos
+    decoded = 0
+    if to_decode and not (stop_event is not None and stop_event.is_set()):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for start in range(0, len(to_decode), chunk):
+                if stop_event is not None and stop_event.is_set():
+                    break
+
+                batch = to_decode[start:start + chunk]
+                results = list(executor.map(decode_image, [str(p) for p in batch], chunksize=8))
+                index.update((path, record) for path, (record, _) in zip(batch, results))
+
+                for path, (record, reason) in zip(batch, results):
+                    if record['status'] != STATUS_OK:
+                        reasons[path] = reason
+
+                decoded += len(batch)
+                if progress_callback:
+                    progress_callback(50 + decoded / len(to_decode) * 50, f"imagens decodificadas: {decoded}/{len(to_decode)}")
+
+        index.save()
+
+    bad = sorted(reasons.items())
+    quarantined = 0
+    if move_bad and bad:
+        for path, reason in bad:
+            try:
+                quarantine_file(folder, path, reason)
+                quarantined += 1
+            except OSError as e:
+                if progress_callback:
+                    progress_callback(None, f"erro ao mover {path.name} para a quarentena: {str(e)}")
+        index.remove(path for path, _ in bad)
+        index.save()
+
+    return True, {
+        'total': len(images),
+        'checked': checked,
+        'decoded': decoded,
+        'skipped': skipped,
+        'bad': [(str(path), reason) for path, reason in bad],
+        'quarantined': quarantined
+    }
+
+
+class ImageVerifierGUI:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("verificador de imagens do dataset")
+        self.root.geometry("700x550")
+
+        self.folder_path = tk.StringVar()
+        self.full_decode = tk.BooleanVar(value=False)
+        self.move_bad = tk.BooleanVar(value=True)
+        self.recheck = tk.BooleanVar(value=False)
+        self.workers = tk.IntVar(value=os.cpu_count() or 2)
+        self.stop_event = None
+        self.is_processing = False
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        ttk.Label(main_frame, text="pasta do dataset (subpastas incluidas):").grid(row=0, column=0, sticky=tk.W, pady=5)
+
+        folder_frame = ttk.Frame(main_frame)
+        folder_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=5)
+        ttk.Entry(folder_frame, textvariable=self.folder_path, width=50).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(folder_frame, text="procurar", command=self.browse_folder).pack(side=tk.LEFT, padx=5)
+
+        options_frame = ttk.Frame(main_frame)
+        options_frame.grid(row=2, column=0, sticky=tk.W, pady=5)
+        ttk.Checkbutton(options_frame, text="decodificar imagens inteiras (mais lento)", variable=self.full_decode).pack(side=tk.LEFT)
+        ttk.Label(options_frame, text="processos:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Spinbox(options_frame, from_=1, to=64, textvariable=self.workers, width=5).pack(side=tk.LEFT, padx=5)
+
+        options_frame2 = ttk.Frame(main_frame)
+        options_frame2.grid(row=3, column=0, sticky=tk.W, pady=5)
+        ttk.Checkbutton(options_frame2, text=f"mover arquivos com problema para {QUARANTINE_DIR}/", variable=self.move_bad).pack(side=tk.LEFT)
+        ttk.Checkbutton(options_frame2, text="verificar de novo mesmo sem alteracao", variable=self.recheck).pack(side=tk.LEFT, padx=10)
+
+        info_frame = ttk.LabelFrame(main_frame, text="o que sera verificado:", padding="10")
+        info_frame.grid(row=4, column=0, sticky=(tk.W, tk.E), pady=10)
+
+        ttk.Label(info_frame, text="1. cabecalho jpeg/png valido e com dimensoes").pack(anchor=tk.W)
+        ttk.Label(info_frame, text="2. marcador de fim presente (pega copias e gravacoes interrompidas)").pack(anchor=tk.W)
+        ttk.Label(info_frame, text=f"3. largura/altura/canais ficam em {INDEX_FILE} para as outras ferramentas").pack(anchor=tk.W)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=5, column=0, pady=10)
+        self.start_button = ttk.Button(button_frame, text="verificar", command=self.start_processing)
+        self.start_button.pack(side=tk.LEFT, padx=5)
+        self.stop_button = ttk.Button(button_frame, text="parar", command=self.stop_processing, state='disabled')
+        self.stop_button.pack(side=tk.LEFT, padx=5)
+
+        self.progress = ttk.Progressbar(main_frame, mode='determinate', length=400)
+        self.progress.grid(row=6, column=0, pady=5)
+
+        self.status_label = ttk.Label(main_frame, text="pronto")
+        self.status_label.grid(row=7, column=0, pady=5)
+
+        log_frame = ttk.LabelFrame(main_frame, text="log", padding="5")
+        log_frame.grid(row=8, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
+
+        self.log_text = tk.Text(log_frame, height=10, width=70)
+        self.log_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.log_text.config(yscrollcommand=scrollbar.set)
+
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(8, weight=1)
+
+    def browse_folder(self):
+        folder = filedialog.askdirectory(title="selecionar pasta do dataset")
+        if folder:
+            self.folder_path.set(folder)
+
+    def log_message(self, message):
+        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.see(tk.END)
+        self.root.update_idletasks()
+
+    def update_progress(self, value, status):
+        if value is not None:
+            self.progress['value'] = value
+        self.status_label.config(text=status)
+        self.log_message(status)
+
+    def start_processing(self):
+        if self.is_processing:
+            messagebox.showwarning("aviso", "processamento ja em andamento")
+            return
+
+        if not self.folder_path.get() or not Path(self.folder_path.get()).exists():
+            messagebox.showerror("erro", "selecione uma pasta valida")
+            return
+
+        self.is_processing = True
+        self.stop_event = threading.Event()
+        self.start_button.config(state='disabled')
+        self.stop_button.config(state='normal')
+        self.progress['value'] = 0
+
+        thread = threading.Thread(target=self.process_folder, daemon=True)
+        thread.start()
+
+    def process_folder(self):
+        try:
+            success, result = verify_dataset(
+                self.folder_path.get(),
+                full_decode=self.full_decode.get(),
+                workers=self.workers.get(),
+                move_bad=self.move_bad.get(),
+                recheck=self.recheck.get(),
+                progress_callback=self.update_progress,
+                stop_event=self.stop_event
+            )
+
+            for path, reason in result['bad']:
+                self.log_message(f"problema: {Path(path).name} ({reason})")
+
+            summary = (
+                f"imagens: {result['total']}\n"
+                f"verificadas agora: {result['checked']} (decodificadas: {result['decoded']})\n"
+                f"sem alteracao: {result['skipped']}\n"
+                f"com problema: {len(result['bad'])} (movidas: {result['quarantined']})"
+            )
+            self.log_message("\n" + summary)
+            messagebox.showinfo("concluido", summary)
+
+        except Exception as e:
+            self.log_message(f"\nerro durante processamento: {str(e)}")
+            messagebox.showerror("erro", f"erro durante processamento:\n{str(e)}")
+
+        finally:
+            self.is_processing = False
+            self.start_button.config(state='normal')
+            self.stop_button.config(state='disabled')
+
+    def stop_processing(self):
+        if self.stop_event is not None:
+            self.stop_event.set()
+            self.log_message("parando depois do bloco atual...")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="verifica a integridade das imagens e monta o indice de dimensoes")
+    parser.add_argument("--folder", help="pasta do dataset; sem isso abre a interface grafica")
+    parser.add_argument("--decode", action="store_true", help="decodifica as imagens inteiras num pool de processos")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-quarantine", action="store_true", help="so relata, nao move nada")
+    parser.add_argument("--recheck", action="store_true", help="ignora o que ja esta no indice")
+    args = parser.parse_args()
+
+    if args.folder:
+        success, result = verify_dataset(
+            args.folder, full_decode=args.decode, workers=args.workers,
+            move_bad=not args.no_quarantine, recheck=args.recheck,
+            progress_callback=lambda value, status: print(status)
+        )
+        for path, reason in result['bad']:
+            print(f"problema: {path} ({reason})")
+        print(f"{result['total']} imagens, {len(result['bad'])} com problema, {result['quarantined']} movidas")
+        return
+
+    root = tk.Tk()
+    app = ImageVerifierGUI(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
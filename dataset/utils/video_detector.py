@@ -1,9 +1,31 @@
-from ultralytics import YOLO
 import cv2
+import numpy as np
 from pathlib import Path
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 
+from inference_cache import InferenceCache, weights_digest, make_key, draw_detections
+from hashing import sampled_digest
+from inference_server import InferenceClient
+from sliced_inference import sliced_predict, model_batch_fn, client_batch_fn
+from camera_roi import load_rois, roi_for, MotionGate
+from video_writer import AnnotatedVideoWriter
+from crossing_events import CrossingEventAggregator
+from stage_timer import StageTimer, profile_run, PROFILERS
+
+
+CACHE_PATH = Path(__file__).resolve().parent.parent.parent / "runs" / "cache" / "inference.sqlite"
+# frames do video vao para o cache em commits agrupados, nao um fsync por frame
+CACHE_COMMIT_EVERY = 256
+
+# fatiado: passada barata em 640 no frame inteiro + janelas 640 so onde ha candidatos
+MODES = ["frame inteiro (imgsz 1920)", "fatiado (janelas 640)"]
+
+OUTPUT_DIR = Path(__file__).resolve().parent.parent.parent / "runs" / "detect" / "videos"
+OUTPUT_SCALES = ["1.0", "0.75", "0.5", "0.25"]
+EVENTS_DIR = Path(__file__).resolve().parent.parent.parent / "runs" / "detect" / "events"
+PERF_DIR = Path(__file__).resolve().parent.parent.parent / "runs" / "perf"
+
 
 class VideoDetectorGUI:
     def __init__(self, root):
@@ -13,6 +35,16 @@ class VideoDetectorGUI:
         
         self.video_path = tk.StringVar()
         self.model_path = tk.StringVar(value="yolov8n-detector-gamba.pt")
+        self.use_cache = tk.BooleanVar(value=True)
+        self.mode = tk.StringVar(value=MODES[0])
+        self.use_roi = tk.BooleanVar(value=True)
+        self.use_motion_gate = tk.BooleanVar(value=False)
+        self.save_video = tk.BooleanVar(value=False)
+        self.show_window = tk.BooleanVar(value=True)
+        self.output_scale = tk.StringVar(value=OUTPUT_SCALES[0])
+        self.save_events = tk.BooleanVar(value=True)
+        self.save_timings = tk.BooleanVar(value=False)
+        self.profiler = tk.StringVar(value=PROFILERS[0])
         
         self.setup_ui()
     
@@ -36,11 +68,50 @@ class VideoDetectorGUI:
         ttk.Entry(video_frame, textvariable=self.video_path, width=40).pack(side=tk.LEFT, fill=tk.X, expand=True)
         ttk.Button(video_frame, text="procurar", command=self.browse_video).pack(side=tk.LEFT, padx=5)
         
+        ttk.Checkbutton(
+            main_frame, text="usar cache de inferencia (frames ja vistos nao sao processados de novo)",
+            variable=self.use_cache
+        ).grid(row=4, column=0, sticky=tk.W, pady=5)
+        
+        mode_frame = ttk.Frame(main_frame)
+        mode_frame.grid(row=5, column=0, sticky=tk.W, pady=5)
+        
+        ttk.Label(mode_frame, text="modo de inferencia:").pack(side=tk.LEFT)
+        ttk.Combobox(mode_frame, textvariable=self.mode, values=MODES, state="readonly", width=30).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Checkbutton(
+            main_frame, text="usar roi da camera (dataset/camera_rois.yaml)", variable=self.use_roi
+        ).grid(row=6, column=0, sticky=tk.W, pady=2)
+        
+        ttk.Checkbutton(
+            main_frame, text="pular inferencia em frames sem movimento dentro da roi", variable=self.use_motion_gate
+        ).grid(row=7, column=0, sticky=tk.W, pady=2)
+        
+        output_frame = ttk.Frame(main_frame)
+        output_frame.grid(row=8, column=0, sticky=tk.W, pady=5)
+        
+        ttk.Checkbutton(output_frame, text="salvar video anotado em runs/detect/videos", variable=self.save_video).pack(side=tk.LEFT)
+        ttk.Label(output_frame, text="escala da saida:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Combobox(output_frame, textvariable=self.output_scale, values=OUTPUT_SCALES, state="readonly", width=6).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(output_frame, text="mostrar janela", variable=self.show_window).pack(side=tk.LEFT, padx=10)
+        
+        ttk.Checkbutton(
+            main_frame, text="gerar eventos de travessia (runs/detect/events/<video>_eventos.jsonl)",
+            variable=self.save_events
+        ).grid(row=9, column=0, sticky=tk.W, pady=2)
+        
+        perf_frame = ttk.Frame(main_frame)
+        perf_frame.grid(row=10, column=0, sticky=tk.W, pady=5)
+        
+        ttk.Checkbutton(perf_frame, text="salvar tempos por etapa em runs/perf (json + prometheus)", variable=self.save_timings).pack(side=tk.LEFT)
+        ttk.Label(perf_frame, text="profiler:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Combobox(perf_frame, textvariable=self.profiler, values=PROFILERS, state="readonly", width=12).pack(side=tk.LEFT, padx=5)
+        
         ttk.Label(main_frame, text="pressione 'q' no video para sair").grid(
-            row=4, column=0, sticky=tk.W, pady=10
+            row=11, column=0, sticky=tk.W, pady=10
         )
         
-        ttk.Button(main_frame, text="iniciar deteccao", command=self.start_detection).grid(row=5, column=0, pady=10)
+        ttk.Button(main_frame, text="iniciar deteccao", command=self.start_detection).grid(row=12, column=0, pady=10)
         
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(0, weight=1)
@@ -76,9 +147,55 @@ class VideoDetectorGUI:
         
         self.root.withdraw()
         
+        cache = None
+        writer = None
+        events = None
+        # threads de envio ao servidor (so no modo servidor), encerradas no finally
+        client_batch = None
+        
         try:
-            print("carregando modelo...")
-            model = YOLO(model_path)
+            client = InferenceClient()
+            
+            # com o servidor de inferencia rodando, o modelo ja esta aquecido e o torch nem e importado aqui
+            if client.available():
+                print("usando servidor de inferencia...")
+                names = client.model_names(model_path)
+                client_batch = infer_batch = client_batch_fn(client, model_path)
+            else:
+                print("carregando modelo...")
+                from ultralytics import YOLO
+                model = YOLO(model_path)
+                names = model.names
+                infer_batch = model_batch_fn(model)
+            
+            if self.mode.get() == MODES[1]:
+                cache_imgsz = "tiles640"
+                
+                def infer(frame):
+                    detections, _ = sliced_predict(infer_batch, frame, tile=640)
+                    return detections
+            else:
+                cache_imgsz = 1920
+                
+                def infer(frame):
+                    return infer_batch([frame], 1920, 0.25)[0]
+            
+            # camera fixa: infere so no retangulo da passagem e ignora ceu/estrada/carimbo de data
+            roi = roi_for(video_path, load_rois()) if self.use_roi.get() else None
+            if roi is not None:
+                print(f"roi da camera: {roi.name}")
+            
+            gate = MotionGate(roi=roi) if self.use_motion_gate.get() else None
+            detections = np.zeros((0, 6), dtype=np.float32)
+            
+            if self.use_cache.get():
+                cache = InferenceCache(CACHE_PATH, commit_every=CACHE_COMMIT_EVERY)
+                weights_hash = weights_digest(model_path)
+                # frames decodificados quase nunca se repetem byte a byte: a chave e (video, indice do frame),
+                # sem hashear cada frame; reabrir o mesmo video reaproveita tudo
+                video_key = sampled_digest(video_path)
+                if roi is not None:
+                    video_key = f"{video_key}-{roi.key}"
             
             print("abrindo video...")
             cap = cv2.VideoCapture(video_path)
@@ -88,39 +205,132 @@ class VideoDetectorGUI:
                 self.root.deiconify()
                 return
             
-            # Criar janela redimensionavel para exibir video completo
-            window_name = 'deteccao - pressione q para sair'
-            cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
-            cv2.resizeWindow(window_name, 1920, 1080)
+            show_window = self.show_window.get()
             
-            print("processando video - pressione 'q' para sair")
+            if self.save_events.get():
+                stem = Path(video_path).stem
+                events = CrossingEventAggregator(
+                    EVENTS_DIR / f"{stem}_eventos.jsonl", names, cap.get(cv2.CAP_PROP_FPS),
+                    video_name=Path(video_path).name, thumbnails_dir=EVENTS_DIR / stem
+                )
             
-            while cap.isOpened():
-                ret, frame = cap.read()
-                
-                if not ret:
-                    break
-                
-                # imgsz define o tamanho da imagem para inferencia (maior = mais detalhes, mais lento)
-                # o video continua na resolucao original, imgsz afeta apenas o processamento
-                results = model(frame, imgsz=1920, verbose=False)
-                annotated_frame = results[0].plot()
+            if self.save_video.get():
+                frame_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+                output_path = OUTPUT_DIR / f"{Path(video_path).stem}_anotado.mp4"
+                writer = AnnotatedVideoWriter(
+                    output_path, cap.get(cv2.CAP_PROP_FPS), frame_size, scale=float(self.output_scale.get())
+                )
+                print(f"salvando video anotado em: {output_path}")
+            
+            if show_window:
+                # Criar janela redimensionavel para exibir video completo
+                window_name = 'deteccao - pressione q para sair'
+                cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+                cv2.resizeWindow(window_name, 1920, 1080)
                 
-                cv2.imshow(window_name, annotated_frame)
+                print("processando video - pressione 'q' para sair")
+            else:
+                print("processando video...")
+            
+            # tempos por etapa (decode, preprocess, inference, postprocess, plot, write, display)
+            timer = StageTimer("video_detector")
+            if writer is not None:
+                writer.timer = timer
+            
+            with profile_run(self.profiler.get(), PERF_DIR, "video_detector"):
+                frames = 0
                 
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    break
+                while cap.isOpened():
+                    with timer.stage("decode"):
+                        ret, frame = cap.read()
+                    
+                    if not ret:
+                        break
+                    
+                    frames += 1
+                    
+                    # imgsz define o tamanho da imagem para inferencia (maior = mais detalhes, mais lento)
+                    # o video continua na resolucao original, imgsz afeta apenas o processamento
+                    # sem movimento na passagem, repete as ultimas deteccoes sem rodar o modelo
+                    with timer.stage("preprocess"):
+                        run_model = gate is None or gate.has_motion(frame)
+                        if run_model:
+                            region, offset = roi.crop(frame) if roi is not None else (frame, (0, 0))
+                            key = None
+                            if cache is not None:
+                                key = make_key(f"{video_key}:{frames - 1}", weights_hash, cache_imgsz, 0.25, 0.7)
+                    
+                    if run_model:
+                        cached = cache.get(key) if key is not None else None
+                        
+                        if cached is None:
+                            with timer.stage("inference"):
+                                detections = infer(region)
+                            if key is not None:
+                                cache.put(key, detections)
+                        else:
+                            detections = cached
+                    
+                    with timer.stage("postprocess"):
+                        if run_model and roi is not None:
+                            detections = roi.map_back(detections, offset)
+                        
+                        if events is not None:
+                            events.update(frames - 1, frame, detections)
+                    
+                    with timer.stage("plot"):
+                        annotated_frame = draw_detections(frame, detections, names)
+                    
+                    if writer is not None:
+                        with timer.stage("write"):
+                            writer.write(annotated_frame)
+                    
+                    if show_window:
+                        with timer.stage("display"):
+                            cv2.imshow(window_name, annotated_frame)
+                            key_pressed = cv2.waitKey(1) & 0xFF
+                        
+                        if key_pressed == ord('q'):
+                            break
             
             cap.release()
             cv2.destroyAllWindows()
             
             print("video finalizado")
             
+            if events is not None:
+                total_events = events.close()
+                events = None
+                print(f"eventos de travessia: {total_events} -> {EVENTS_DIR}")
+            
+            if writer is not None:
+                result = writer.close()
+                writer = None
+                print(f"video anotado: {result['frames']} frames -> {result['output']}")
+            
+            print(timer.summary())
+            
+            if self.save_timings.get():
+                json_path, prom_path = timer.export(PERF_DIR)
+                print(f"relatorio de tempos: {json_path} | {prom_path}")
+            
+            if cache is not None:
+                stats = cache.stats()
+                print(f"cache: {stats['hits']} hits, {stats['misses']} misses")
+            
         except Exception as e:
             messagebox.showerror("erro", f"erro: {str(e)}")
             cv2.destroyAllWindows()
         
         finally:
+            if events is not None:
+                events.close()
+            if writer is not None:
+                writer.close()
+            if cache is not None:
+                cache.close()
+            if client_batch is not None:
+                client_batch.close()
             self.root.deiconify()
 
 
@@ -1,10 +1,20 @@
 import cv2
-import hashlib
+import json
+import os
+import time
 from pathlib import Path
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 import threading
 
+from stage_timer import StageTimer, NullTimer, profile_run, PROFILERS
+from naming import NameIndex
+from hashing import sampled_digest
+from file_stream import iter_names
+
+
+PERF_DIR = Path(__file__).resolve().parent.parent.parent / "runs" / "perf"
+
 
 CLASSES = [
     "Bicho-Preguica",
@@ -21,55 +31,204 @@ CLASSES = [
     "Oucico Cacheiro",
     "Paca",
     "Tamandua Mirim",
-    "Tatu"
+    "Tatu",
     "0-Banco-de-Fotos"
 ]
 
 
-def generate_hash(video_name):
-    content = video_name.encode()
-    hash_obj = hashlib.md5(content)
-    return hash_obj.hexdigest()[:4]
+VIDEO_MANIFEST = ".video_ids.json"
+CHECKPOINT_DIR = ".checkpoints"
+LEDGER_FILE = ".ledger.jsonl"
+# a cada quantos frames salvos o checkpoint e regravado
+CHECKPOINT_EVERY = 25
+
+
+def load_video_index(output_dir):
+    """
+    ids de video ja usados na pasta (prefixo dos frames + manifest)
+    varre a pasta uma vez: quem processa varios videos carrega aqui e passa o mesmo indice para todos
+    """
+    output_dir = Path(output_dir)
+    prefixes = {name.split('.')[0] for name in iter_names(output_dir, ('.jpg',))}
+    return NameIndex(prefixes, manifest_path=output_dir / VIDEO_MANIFEST)
+
+
+def video_id(video_path, output_dir, index=None):
+    """
+    id do video derivado do conteudo (nao do nome), unico entre os prefixos ja usados na pasta
+    o manifest guarda {id: digest} para o mesmo video sempre cair no mesmo id
+    index: NameIndex de load_video_index(output_dir); sem ele a pasta e varrida de novo
+    """
+    if index is None:
+        index = load_video_index(output_dir)
+    
+    identifier = index.assign("", sampled_digest(video_path))
+    index.save()
+    return identifier
+
+
+def _write_json_atomic(path, data):
+    # grava num temporario e troca: queda de energia nunca deixa um checkpoint pela metade
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def load_ledger(output_dir):
+    """{id do video: registro} dos videos ja extraidos por completo nesta pasta"""
+    ledger_path = Path(output_dir) / LEDGER_FILE
+    done = {}
+    
+    if ledger_path.exists():
+        with open(ledger_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # ultima linha cortada por uma queda no meio da escrita
+                    continue
+                done[entry['id']] = entry
+    
+    return done
+
+
+def _append_ledger(output_dir, entry):
+    with open(Path(output_dir) / LEDGER_FILE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _seek(video, frame_index):
+    """posiciona o video no frame; se o seek do container falhar, avanca com grab() (sem decodificar)"""
+    if video.set(cv2.CAP_PROP_POS_FRAMES, frame_index) and int(video.get(cv2.CAP_PROP_POS_FRAMES)) == frame_index:
+        return True
+    
+    video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    for _ in range(frame_index):
+        if not video.grab():
+            return False
+    return True
 
 
-def extract_frames_from_video(video_path, animal_class, fps, output_base_dir, progress_callback=None):
+def _remove_checkpoint(checkpoint_path):
+    checkpoint_path.unlink(missing_ok=True)
+    try:
+        # a pasta .checkpoints some quando nao ha mais nenhum video pela metade
+        checkpoint_path.parent.rmdir()
+    except OSError:
+        pass
+
+
+def extract_frames_from_video(video_path, animal_class, fps, output_base_dir, progress_callback=None, timer=None,
+                              resume=True, name_index=None):
+    """
+    extrai fps frames por segundo do video para output_base_dir/animal_class
+    com resume=True o progresso fica em .checkpoints/<id>.json: uma execucao interrompida recomeca
+    do ultimo frame salvo, e videos que ja estao no .ledger.jsonl (mesmo conteudo e fps) sao pulados
+    name_index: load_video_index(output_base_dir/animal_class), reaproveitado entre videos da mesma classe
+    """
+    timer = timer or NullTimer()
     output_dir = Path(output_base_dir) / animal_class
     output_dir.mkdir(parents=True, exist_ok=True)
     
+    hash_code = video_id(video_path, output_dir, name_index)
+    checkpoint_path = output_dir / CHECKPOINT_DIR / f"{hash_code}.json"
+    
+    if resume:
+        entry = load_ledger(output_dir).get(hash_code)
+        if entry is not None and entry['fps'] == fps:
+            _remove_checkpoint(checkpoint_path)
+            return True, f"Ja extraido ({entry['saved']} frames), pulado: {Path(video_path).name}"
+    
     video = cv2.VideoCapture(video_path)
     
     if not video.isOpened():
         return False, f"Erro ao abrir o video: {video_path}"
     
-    video_fps = video.get(cv2.CAP_PROP_FPS)
-    total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    video_fps = video.get(cv2.CAP_PROP_FPS) or fps
+    frame_interval = max(int(video_fps / fps), 1)
     
-    frame_interval = int(video_fps / fps)
+    # sem resume nao ha para que gravar checkpoint: nada vai le-lo
+    if resume:
+        checkpoint_path.parent.mkdir(exist_ok=True)
     
-    video_name = Path(video_path).stem
-    hash_code = generate_hash(video_name)
     frame_count = 0
     saved_count = 0
+    resumed_from = None
     
-    while True:
-        ret, frame = video.read()
+    if resume and checkpoint_path.exists():
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
         
-        if not ret:
-            break
+        if checkpoint['fps'] == fps and _seek(video, checkpoint['frame_index'] + 1):
+            frame_count = checkpoint['frame_index'] + 1
+            saved_count = checkpoint['saved']
+            resumed_from = checkpoint['frame_index']
+        else:
+            video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    
+    def save_checkpoint(frame_index, timestamp_ms):
+        _write_json_atomic(checkpoint_path, {
+            'video': str(video_path),
+            'fps': fps,
+            'frame_index': frame_index,
+            'timestamp_ms': timestamp_ms,
+            'saved': saved_count,
+            'updated': time.time()
+        })
+    
+    while True:
+        # grab() so avanca o stream; o frame so e decodificado (retrieve) quando vai ser salvo
+        with timer.stage("decode"):
+            if not video.grab():
+                break
+            
+            keep = frame_count % frame_interval == 0
+            if keep:
+                ret, frame = video.retrieve()
+                keep = ret
         
-        if frame_count % frame_interval == 0:
+        if keep:
             filename = f"{hash_code}.{saved_count:04d}.jpg"
             output_path = output_dir / filename
             
-            cv2.imwrite(str(output_path), frame)
-            saved_count += 1
+            # imencode + tofile separa o custo da codificacao jpeg do custo de disco
+            with timer.stage("encode"):
+                ok, encoded = cv2.imencode('.jpg', frame)
             
-            if progress_callback:
-                progress_callback(saved_count)
+            if ok:
+                with timer.stage("write"):
+                    encoded.tofile(str(output_path))
+                
+                saved_count += 1
+                
+                # o frame ja esta no disco antes do checkpoint apontar para ele
+                if resume and saved_count % CHECKPOINT_EVERY == 0:
+                    save_checkpoint(frame_count, video.get(cv2.CAP_PROP_POS_MSEC))
+                
+                if progress_callback:
+                    progress_callback(saved_count)
         
         frame_count += 1
     
     video.release()
+    
+    if resume:
+        _append_ledger(output_dir, {
+            'id': hash_code,
+            'video': str(video_path),
+            'fps': fps,
+            'saved': saved_count,
+            'frames': frame_count,
+            'finished': time.strftime("%Y-%m-%dT%H:%M:%S")
+        })
+    # video completo: o ledger ja registra, um checkpoint antigo so faria retomar o que acabou
+    _remove_checkpoint(checkpoint_path)
+    
+    if resumed_from is not None:
+        return True, f"Extraidos {saved_count} frames em {output_dir} (retomado do frame {resumed_from})"
     return True, f"Extraidos {saved_count} frames em {output_dir}"
 
 
@@ -118,6 +277,9 @@ class VideoToFramesApp:
         self.fps_var = tk.IntVar(value=2)
         ttk.Spinbox(fps_frame, from_=1, to=10, textvariable=self.fps_var, width=10).pack(side=tk.LEFT)
         
+        self.resume_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(fps_frame, text="Retomar de onde parou / pular videos ja extraidos", variable=self.resume_var).pack(side=tk.LEFT, padx=10)
+        
         ttk.Label(main_frame, text="Diretorio de Saida:", font=('Arial', 10, 'bold')).grid(row=7, column=0, sticky=tk.W, pady=(10, 5))
         
         output_frame = ttk.Frame(main_frame)
@@ -127,11 +289,21 @@ class VideoToFramesApp:
         ttk.Entry(output_frame, textvariable=self.output_var, width=50).pack(side=tk.LEFT, padx=5)
         ttk.Button(output_frame, text="Selecionar", command=self.select_output_dir).pack(side=tk.LEFT)
         
+        perf_frame = ttk.Frame(main_frame)
+        perf_frame.grid(row=9, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        self.timings_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(perf_frame, text="Medir tempos por etapa (runs/perf)", variable=self.timings_var).pack(side=tk.LEFT)
+        
+        ttk.Label(perf_frame, text="Profiler:").pack(side=tk.LEFT, padx=(10, 0))
+        self.profiler_var = tk.StringVar(value=PROFILERS[0])
+        ttk.Combobox(perf_frame, textvariable=self.profiler_var, values=PROFILERS, state='readonly', width=12).pack(side=tk.LEFT, padx=5)
+        
         self.process_btn = ttk.Button(main_frame, text="Processar Videos", command=self.process_videos, style='Accent.TButton')
-        self.process_btn.grid(row=9, column=0, pady=20)
+        self.process_btn.grid(row=10, column=0, pady=20)
         
         self.progress_label = ttk.Label(main_frame, text="", foreground="blue")
-        self.progress_label.grid(row=10, column=0, columnspan=2)
+        self.progress_label.grid(row=11, column=0, columnspan=2)
         
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(0, weight=1)
@@ -175,18 +347,35 @@ class VideoToFramesApp:
         output_dir = self.output_var.get()
         
         total = len(self.video_files)
+        timer = StageTimer("video_to_frames") if self.timings_var.get() else None
+        # ids ja usados na pasta da classe: uma varredura para o lote todo
+        name_index = load_video_index(Path(output_dir) / animal_class)
         
-        for i, video_path in enumerate(self.video_files, 1):
-            self.update_progress(f"Processando video {i}/{total}: {Path(video_path).name}")
-            
-            success, message = extract_frames_from_video(video_path, animal_class, fps, output_dir)
-            
-            if not success:
-                messagebox.showerror("Erro", message)
-                continue
+        with profile_run(self.profiler_var.get(), PERF_DIR, "video_to_frames"):
+            for i, video_path in enumerate(self.video_files, 1):
+                self.update_progress(f"Processando video {i}/{total}: {Path(video_path).name}")
+                
+                # um video com problema nao derruba o lote; com checkpoints, rodar de novo continua dali
+                try:
+                    success, message = extract_frames_from_video(
+                        video_path, animal_class, fps, output_dir, timer=timer, resume=self.resume_var.get(),
+                        name_index=name_index
+                    )
+                except Exception as e:
+                    success, message = False, f"Erro ao processar {Path(video_path).name}: {str(e)}"
+                
+                if not success:
+                    messagebox.showerror("Erro", message)
+                    continue
+        
+        # os tempos por etapa ficam no json exportado, nao no console
+        timings = ""
+        if timer is not None:
+            json_path, _ = timer.export(PERF_DIR)
+            timings = f"\n\nTempos por etapa em:\n{json_path}"
         
         self.update_progress(f"Concluido! {total} video(s) processado(s)")
-        messagebox.showinfo("Sucesso", f"Processamento concluido!\n\nFrames salvos em:\n{Path(output_dir) / animal_class}")
+        messagebox.showinfo("Sucesso", f"Processamento concluido!\n\nFrames salvos em:\n{Path(output_dir) / animal_class}{timings}")
         self.process_btn.config(state='normal')
     
     def process_videos(self):
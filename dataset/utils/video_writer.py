@@ -0,0 +1,77 @@
+import queue
+import threading
+import time
+from pathlib import Path
+
+import cv2
+
+
+class AnnotatedVideoWriter:
+    """
+    grava frames anotados num arquivo de video a partir de uma thread dedicada,
+    assim a codificacao nao trava o loop de inferencia
+    scale < 1 reduz a resolucao da saida (clipes menores para mandar aos biologos)
+    """
+
+    def __init__(self, output_path, fps, frame_size, scale=1.0, fourcc="mp4v", queue_size=64):
+        self.output_path = Path(output_path)
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        width, height = frame_size
+        self.scale = scale
+        self.size = (int(width * scale) // 2 * 2, int(height * scale) // 2 * 2)
+
+        self.writer = cv2.VideoWriter(
+            str(self.output_path), cv2.VideoWriter_fourcc(*fourcc), fps or 30, self.size
+        )
+        if not self.writer.isOpened():
+            raise RuntimeError(f"nao foi possivel criar o video de saida: {self.output_path}")
+
+        self.frames_written = 0
+        self.encode_time = 0.0
+        self.error = None
+        # StageTimer opcional: o tempo de codificacao entra como etapa "encode"
+        self.timer = None
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, frame):
+        """enfileira o frame; so bloqueia se a fila encher (codificacao mais lenta que a inferencia)"""
+        if self.error is not None:
+            raise self.error
+        self._queue.put(frame)
+
+    def _run(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                break
+
+            # depois de um erro continua esvaziando a fila para o write() nunca travar
+            if self.error is not None:
+                continue
+
+            try:
+                start = time.perf_counter()
+                if frame.shape[1] != self.size[0] or frame.shape[0] != self.size[1]:
+                    frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+                self.writer.write(frame)
+                elapsed = time.perf_counter() - start
+                self.encode_time += elapsed
+                if self.timer is not None:
+                    self.timer.record("encode", elapsed)
+                self.frames_written += 1
+            except Exception as e:
+                self.error = e
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self.writer.release()
+        return {
+            'frames': self.frames_written,
+            'encode_time': self.encode_time,
+            'output': str(self.output_path)
+        }
@@ -1,20 +1,90 @@
-from ultralytics import YOLO
 import os
+import sys
+from pathlib import Path
 
 #garantindo commit 3
 
 # Garantir que estamos no diretório correto
 script_dir = os.path.dirname(os.path.abspath(__file__))
 os.chdir(script_dir)
+sys.path.insert(0, os.path.join(script_dir, "dataset", "utils"))
+
+import cv2
+
+from inference_server import InferenceClient
+from inference_cache import draw_detections
+from camera_roi import load_rois, roi_for
+from image_metadata import IMAGE_EXTENSIONS
 
 #garantindo o commit dnovo, po to na ccxp vei
 # model = YOLO('yolov8x-seg.pt') # modelo de segmentacao
 # model = YOLO('yolov8x-cls.pt') # modelo de classificao
 
-model = YOLO('yolov8n-detector-gamba.pt') # modelo de deteccao com meu dataset proprio
+MODEL_PATH = 'yolov8n-detector-gamba.pt'
+SOURCE = "dataset/all-images/Teste"
+USE_CACHE = True # reaproveita deteccoes de imagens ja vistas (mesmos pesos/imgsz/conf/iou)
+
+# imagens de cameras com roi em dataset/camera_rois.yaml sao recortadas antes da inferencia em todos os caminhos
+rois = load_rois()
+# mesmas extensoes do resto do dataset (o predict(source=pasta) antigo tambem lia png/jpeg)
+images = sorted(p for p in Path(SOURCE).iterdir() if p.name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def save_annotated(detections, names, output_dir):
+    """desenha as deteccoes (N, 6) de cada imagem com opencv e grava em output_dir"""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for path, dets in detections.items():
+        image = cv2.imread(str(path))
+        if image is not None:
+            cv2.imwrite(str(output_dir / Path(path).name), draw_detections(image, dets, names))
+    return output_dir
+
+
+# se o servidor de inferencia estiver rodando (python dataset/utils/inference_server.py),
+# o modelo ja esta carregado e aquecido la, entao nao importamos torch aqui
+client = InferenceClient()
+
+if client.available():
+    # frame a frame para poder recortar a roi aqui; as caixas voltam para a imagem inteira
+    detections = {}
+    for path in images:
+        image = cv2.imread(str(path))
+        if image is None:
+            print(f"erro ao ler {path}: imagem pulada")
+            continue
+        roi = roi_for(path, rois, SOURCE) if rois else None
+        region, offset = roi.crop(image) if roi is not None else (image, (0, 0))
+        dets = client.predict_frame(MODEL_PATH, region)
+        detections[path] = roi.map_back(dets, offset) if roi is not None else dets
+
+    output_dir = save_annotated(detections, client.model_names(MODEL_PATH), Path(script_dir) / "runs" / "detect" / "servidor")
+    total = sum(len(d) for d in detections.values())
+    print(f"servidor: {len(detections)} imagens, {total} deteccoes (anotadas em {output_dir})")
+    sys.exit(0)
+
+from ultralytics import YOLO
+from inference_cache import InferenceCache, cached_predict
+
+model = YOLO(MODEL_PATH) # modelo de deteccao com meu dataset proprio
+
 # predizer uma pasta inteira
-model.predict(source="dataset/all-images/Teste", save=True)
+if USE_CACHE:
+    cache = InferenceCache("runs/cache/inference.sqlite")
+    # o save do ultralytics so veria as imagens que nao estavam no cache (e so o recorte da roi):
+    # hits e misses sao desenhados juntos a partir das deteccoes
+    detections = cached_predict(model, MODEL_PATH, images, cache, rois=rois, roi_root=SOURCE)
+    stats = cache.stats()
+    print(f"cache: {stats['hits']} hits, {stats['misses']} misses ({stats['entries']} entradas)")
+    cache.close()
+    output_dir = save_annotated(detections, model.names, Path(script_dir) / "runs" / "detect" / "cache")
+    print(f"Resultados salvos em: {output_dir}")
+else:
+    # sem cache, mas com o mesmo recorte de roi; o save do ultralytics gravaria so o recorte,
+    # entao a imagem anotada inteira e desenhada aqui
+    detections = cached_predict(model, MODEL_PATH, images, None, rois=rois, roi_root=SOURCE)
+    output_dir = save_annotated(detections, model.names, Path(script_dir) / "runs" / "detect" / "sem_cache")
+    print(f"Resultados salvos em: {output_dir}")
 
 # treinar o modelo
 #model.train(data='dataset/data.yaml', epochs=20, batch=16, workers=1)
-print(f"Resultados salvos em: {model.predictor.save_dir}")
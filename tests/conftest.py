@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# os scripts de dataset/utils importam uns aos outros pelo nome do modulo
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "dataset" / "utils"))
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+import yaml
+
+from balanced_sampler import write_training_list
+
+
+def resolve(data, key):
+    # mesma regra do ultralytics: relativo a 'path', que e absoluto aqui
+    root = Path(data['path'])
+    assert root.is_absolute()
+    return root / data[key]
+
+
+def test_written_yaml_resolves_val_from_source_folder(tmp_path):
+    dataset = tmp_path / "dataset"
+    (dataset / "all-images" / "Gamba").mkdir(parents=True)
+    data_yaml = dataset / "data.yaml"
+    data_yaml.write_text("train: all-images/Gamba\nval: all-images/Gamba\nnc: 1\nnames: ['Gamba']\n",
+                         encoding='utf-8')
+
+    # saida padrao da gui: <train>/../train_balanced.txt, outra pasta que a do data.yaml
+    output = tmp_path / "images" / "train_balanced.txt"
+    yaml_out = write_training_list([dataset / "all-images" / "Gamba" / "a.jpg"], output, data_yaml)
+
+    with open(yaml_out, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    assert resolve(data, 'val').is_dir()
+    assert Path(data['train']) == output.resolve()
+
+
+def test_existing_path_key_is_kept(tmp_path):
+    data_yaml = tmp_path / "data.yaml"
+    data_yaml.write_text(f"path: {tmp_path}\nval: val\nnames: ['Gamba']\n", encoding='utf-8')
+
+    yaml_out = write_training_list([], tmp_path / "out" / "lista.txt", data_yaml)
+
+    with open(yaml_out, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    assert data['path'] == str(tmp_path)
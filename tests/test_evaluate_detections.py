@@ -0,0 +1,38 @@
+import numpy as np
+
+from evaluate_detections import IOU_THRESHOLDS, ap_per_class, average_precision, read_yolo_label
+
+
+def test_perfect_detector_has_ap_one():
+    recall = np.array([0.25, 0.5, 0.75, 1.0])
+    precision = np.ones(4)
+    assert average_precision(recall, precision) == 1.0
+
+
+def test_perfect_detector_per_class():
+    # 2 classes, 3 caixas cada, todas acertadas em todos os limiares de iou
+    pred_cls = np.array([0, 0, 0, 1, 1, 1])
+    conf = np.array([0.9, 0.8, 0.7, 0.95, 0.6, 0.5])
+    tp = np.ones((6, len(IOU_THRESHOLDS)), dtype=bool)
+
+    result = ap_per_class(tp, conf, pred_cls, pred_cls.copy(), num_classes=2)
+    assert np.allclose(result['ap'], 1.0)
+
+
+def test_partial_recall_caps_ap():
+    # metade dos objetos achados com precisao 1: ap ~ 0.5, nunca acima
+    ap = average_precision(np.array([0.25, 0.5]), np.ones(2))
+    assert 0.49 < ap <= 0.51
+
+
+def test_no_predictions():
+    assert average_precision(np.array([]), np.array([])) == 0.0
+
+
+def test_label_mixing_5_and_6_columns(tmp_path):
+    label = tmp_path / "a.txt"
+    label.write_text("0 0.5 0.5 0.2 0.2\n1 0.3 0.3 0.1 0.1 0.8\n\n", encoding='utf-8')
+
+    rows = read_yolo_label(label)
+    assert rows.shape == (2, 6)
+    assert np.allclose(rows[:, 5], [1.0, 0.8])
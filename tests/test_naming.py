@@ -0,0 +1,37 @@
+import hashlib
+
+from naming import NameIndex, initial_length
+
+
+def digest_of(i):
+    return hashlib.blake2b(str(i).encode(), digest_size=16).hexdigest()
+
+
+def test_same_digest_keeps_name_above_10k_entries():
+    index = NameIndex()
+    for i in range(12000):
+        index.assign("gamba_dia", digest_of(i))
+
+    # com mais de ~10k nomes o id novo nasce com tamanho impar (9)
+    assert initial_length(len(index) + 1) % 2 == 1
+
+    digest = digest_of("novo")
+    first = index.assign("gamba_dia", digest)
+    assert index.assign("gamba_dia", digest) == first
+    assert len(index) == 12001
+
+
+def test_manifest_reload_keeps_names(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    index = NameIndex(manifest_path=manifest)
+    names = [index.assign("tatu_noite", digest_of(i)) for i in range(50)]
+    index.save()
+
+    reloaded = NameIndex(manifest_path=manifest)
+    assert [reloaded.assign("tatu_noite", digest_of(i)) for i in range(50)] == names
+
+
+def test_same_digest_other_prefix_gets_own_name():
+    index = NameIndex()
+    digest = digest_of(1)
+    assert index.assign("gamba_dia", digest) != index.assign("gamba_noite", digest)